@@ -9,6 +9,20 @@ export interface AiImportParams {
   anzahlErgebnisse: 10 | 25 | 50 | 100 | 250 | 1000
   websiteAnalysieren: boolean
   kontaktdatenHinzufuegen: boolean
+  kachelSuche?: boolean              // Gekachelte Suche (Default: bei mehr als 60 Ergebnissen)
+  suchFelder?: 'ids' | 'basis' | 'kontakt'  // Feldumfang der Suche ('kontakt' = ohne Details-Abrufe)
+  queries?: Array<{                  // Batch-Job: mehrere Suchanfragen in einem Job
+    branche: string
+    standort: string
+  }>
+}
+
+// Statistik pro Suchanfrage eines (Batch-)Jobs
+export interface JobQueryStats {
+  branche: string
+  standort: string
+  found: number                      // Treffer der Suche
+  unique: number                     // Davon nicht bereits durch frühere Suchanfragen gefunden
 }
 
 // Job-Status
@@ -52,8 +66,10 @@ export interface AiImportResult {
       email?: string
       telefon?: string
     }>
+    truncatedPages?: string[]        // Seiten, die beim Größenlimit abgeschnitten wurden
   }
   analyseScore?: number              // 0-100, Vollständigkeit
+  suchanfrage?: string               // z.B. "Bauunternehmen in Berlin" (bei Batch-Jobs relevant)
   istDuplikat?: boolean              // Ähnlicher Kunde existiert bereits
   duplikatKundeId?: string
 }
@@ -62,6 +78,7 @@ export interface AiImportResult {
 export interface CustomerImportJob {
   _id?: string                       // MongoDB ID (primär)
   jobId?: string                     // Backwards compatibility
+  type?: 'batch'                     // Batch-Job (params.queries)
   status: JobStatus
   params: AiImportParams
   progress: {
@@ -70,6 +87,7 @@ export interface CustomerImportJob {
     phase: JobPhase
   }
   results: AiImportResult[]
+  queryStats?: JobQueryStats[]
   error?: string
   createdAt: Date
 }
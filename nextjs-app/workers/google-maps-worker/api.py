@@ -4,22 +4,111 @@ FastAPI REST API für Google Maps Customer Import Worker
 Läuft als eigenständiger Service auf einem Docker Server
 """
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, Header, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Tuple
+from contextlib import asynccontextmanager
+import asyncio
+import json
 import os
+import re
 import sys
+import threading
+import time
 from datetime import datetime
 import uvicorn
 
+from bson import ObjectId
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
 # Import worker logic
-from worker import process_job_sync
+from worker import SEARCH_FIELD_TIERS, WorkerRuntime, expand_queries
+from job_queue import JobQueue, JobQueueRunner, default_worker_id
+from metrics import ACTIVE_JOBS, QUEUE_DEPTH
+from job_events import JobEvent
+
+# Obergrenzen für Batch-Jobs (Kosten-Guard)
+BATCH_MAX_QUERIES = int(os.getenv('BATCH_MAX_QUERIES', '100'))
+BATCH_MAX_RESULTS_PER_QUERY = int(os.getenv('BATCH_MAX_RESULTS_PER_QUERY', '1000'))
+# Alle Ergebnisse liegen im Job-Dokument (MongoDB-Limit 16 MB, ca. 1,5 KB pro
+# Ergebnis, bei suchFelder 'kontakt' zusätzlich ca. 1 KB Suchdaten im
+# Checkpoint) -> Summe über alle Suchanfragen begrenzen
+BATCH_MAX_TOTAL_RESULTS = int(os.getenv('BATCH_MAX_TOTAL_RESULTS', '5000'))
+
+# Job-Queue Konfiguration
+JOB_SLOTS = int(os.getenv('JOB_SLOTS', '2'))                      # Parallele Jobs pro Prozess
+JOB_LEASE_SECONDS = float(os.getenv('JOB_LEASE_SECONDS', '60'))   # Lease-Dauer, per Heartbeat verlängert
+JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', '5'))    # Abfrage-Intervall für neue Jobs
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '3'))        # Versuche, bevor ein hängender Job fehlschlägt
+
+# Live-Stream der Job-Ereignisse (SSE)
+SSE_HEARTBEAT_SECONDS = float(os.getenv('SSE_HEARTBEAT_SECONDS', '15'))  # Keep-Alive ohne neue Ereignisse
+SSE_RETRY_MS = 3000                                                       # Reconnect-Wartezeit für EventSource
+SSE_POLL_SECONDS = float(os.getenv('SSE_POLL_SECONDS', '2'))             # MongoDB-Abfrage für Jobs anderer Worker
+SSE_RESULT_PAGE_SIZE = 200                                                # Ergebnisse pro Abfrage
+
+# Endzustände eines Jobs (Stream wird danach beendet)
+TERMINAL_STATUSES = ('completed', 'failed', 'cancelled')
+
+# Ereignis-IDs beider Stream-Arten: r<Ergebnis-Offset>[.<Position im Ereignis-Log>]
+EVENT_ID_PATTERN = re.compile(r'r(\d+)(?:\.(\d+))?')
+
+# Geteilte Worker-Runtime (MongoClient, HTTP-Pools, Caches) für alle Jobs
+runtime: Optional[WorkerRuntime] = None
+job_queue: Optional[JobQueue] = None
+queue_runner: Optional[JobQueueRunner] = None
+runtime_lock = threading.Lock()
+
+def get_runtime(mongo_uri: Optional[str] = None, google_maps_key: Optional[str] = None) -> WorkerRuntime:
+    """
+    Liefert die geteilte Runtime und erzeugt sie bei Bedarf
+    
+    Ist beim Start keine Konfiguration per ENV vorhanden, wird die Runtime
+    mit den Zugangsdaten des ersten Requests angelegt. Die Runtime (und ihre
+    Job-Queue) gehört zu genau einer Datenbank und einem API-Key; Requests
+    mit abweichenden Zugangsdaten werden abgelehnt (409), statt ihre Jobs
+    stillschweigend mit fremden Zugangsdaten zu verarbeiten.
+    """
+    global runtime, job_queue, queue_runner
+    with runtime_lock:
+        if runtime is not None:
+            if (mongo_uri and mongo_uri != runtime.mongo_uri) or (
+                google_maps_key and google_maps_key != runtime.api_key
+            ):
+                raise HTTPException(
+                    status_code=409,
+                    detail="Worker ist mit anderen Zugangsdaten (mongoUri/googleMapsApiKey) konfiguriert"
+                )
+        else:
+            runtime = WorkerRuntime(mongo_uri, google_maps_key)
+            job_queue = JobQueue(
+                runtime.db['customer_import_jobs'],
+                default_worker_id(),
+                JOB_LEASE_SECONDS,
+                JOB_MAX_ATTEMPTS
+            )
+            queue_runner = JobQueueRunner(job_queue, runtime.process_job, JOB_SLOTS, JOB_POLL_INTERVAL)
+            queue_runner.start()
+        return runtime
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Erzeugt Runtime und Job-Queue beim Start und schließt sie beim Herunterfahren"""
+    if os.getenv('MONGODB_URI') and os.getenv('GOOGLE_MAPS_API_KEY'):
+        get_runtime()
+    yield
+    if queue_runner:
+        queue_runner.stop()
+    if runtime:
+        runtime.close()
 
 app = FastAPI(
     title="Customer Import Worker API",
     description="Google Maps & Website Analysis Service",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS Configuration - erlaubt Requests von Vercel
@@ -42,6 +131,23 @@ class ProcessJobRequest(BaseModel):
     mongoUri: str
     googleMapsApiKey: str
 
+class BatchQuery(BaseModel):
+    branche: str
+    standort: str
+
+class ProcessBatchRequest(BaseModel):
+    mongoUri: str
+    googleMapsApiKey: str
+    # Entweder explizite Kombinationen oder Kreuzprodukt branchen x standorte
+    queries: Optional[List[BatchQuery]] = None
+    branchen: Optional[List[str]] = None
+    standorte: Optional[List[str]] = None
+    anzahlErgebnisse: int = 60                # Pro Suchanfrage
+    websiteAnalysieren: bool = False
+    kontaktdatenHinzufuegen: bool = False
+    kachelSuche: Optional[bool] = None
+    suchFelder: Optional[str] = None          # ids, basis, kontakt (Default: SEARCH_FIELD_TIER)
+
 class HealthResponse(BaseModel):
     status: str
     timestamp: str
@@ -49,9 +155,6 @@ class HealthResponse(BaseModel):
     mongodb_connected: bool
     google_maps_configured: bool
 
-# In-Memory Job Status (für einfaches Tracking)
-active_jobs = {}
-
 @app.get("/")
 async def root():
     """Root endpoint - zeigt API Info"""
@@ -61,7 +164,11 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "health": "/health",
-            "process": "POST /process-job"
+            "process": "POST /process-job",
+            "batch": "POST /process-batch",
+            "status": "/job-status/{job_id}",
+            "events": "/jobs/{job_id}/events",
+            "metrics": "/metrics"
         }
     }
 
@@ -69,11 +176,11 @@ async def root():
 async def health_check():
     """Health Check - prüft ob Service bereit ist"""
     
-    # Prüfe MongoDB Connection
-    mongodb_ok = bool(os.getenv('MONGODB_URI'))
+    # Prüfe MongoDB Connection (Runtime kann auch per Request konfiguriert sein)
+    mongodb_ok = runtime is not None or bool(os.getenv('MONGODB_URI'))
     
     # Prüfe Google Maps API Key
-    gmaps_ok = bool(os.getenv('GOOGLE_MAPS_API_KEY'))
+    gmaps_ok = runtime is not None or bool(os.getenv('GOOGLE_MAPS_API_KEY'))
     
     return HealthResponse(
         status="healthy" if (mongodb_ok and gmaps_ok) else "degraded",
@@ -83,92 +190,296 @@ async def health_check():
         google_maps_configured=gmaps_ok
     )
 
+def format_sse(event_type: str, data: dict, event_id: Optional[str] = None) -> str:
+    """Formatiert ein Server-Sent Event"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event_type}")
+    lines.append(f"data: {json.dumps(data, default=str, ensure_ascii=False)}")
+    return '\n'.join(lines) + '\n\n'
+
+def event_id(offset: int, position: Optional[int] = None) -> str:
+    """
+    Ereignis-ID für beide Stream-Arten
+    
+    Enthält immer die Anzahl bereits gesendeter Ergebnisse (Offset in
+    `results`), bei Jobs dieses Prozesses zusätzlich die Position im
+    Ereignis-Log. Ein Client kann so über jeden Worker fortsetzen.
+    """
+    return f"r{offset}" if position is None else f"r{offset}.{position}"
+
+def local_event_id(event: JobEvent) -> str:
+    return event_id(event.offset, event.id)
+
+def parse_event_id(value: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+    """(Ergebnis-Offset, Position im Ereignis-Log) aus Last-Event-ID; None, was fehlt"""
+    match = EVENT_ID_PATTERN.fullmatch(value or '')
+    if not match:
+        return None, None
+    return int(match.group(1)), int(match.group(2)) if match.group(2) else None
+
+async def stream_job_events(job_id: str, after_id: int, request: Request):
+    """
+    Live-Ereignisse eines Jobs, der in diesem Prozess läuft
+    
+    Gewartet wird auf ein asyncio.Event, das der Ereignis-Bus bei jeder
+    Änderung setzt; offene Streams belegen so keine Threads.
+    """
+    loop = asyncio.get_running_loop()
+    changed = asyncio.Event()
+    
+    def wake():
+        loop.call_soon_threadsafe(changed.set)
+    
+    runtime.events.subscribe(job_id, wake)
+    try:
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+        
+        while not await request.is_disconnected():
+            # Erst zurücksetzen, dann lesen: Änderungen dazwischen wecken erneut
+            changed.clear()
+            events, finished = runtime.events.read(job_id, after_id, timeout=0)
+            for event in events:
+                yield format_sse(event.type, event.data, local_event_id(event))
+                after_id = event.id
+            
+            if finished:
+                return
+            if events:
+                continue
+            try:
+                await asyncio.wait_for(changed.wait(), SSE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+    finally:
+        runtime.events.unsubscribe(job_id, wake)
+
+async def poll_job_events(job_id: str, offset: int, request: Request):
+    """
+    Ereignisse eines Jobs aus MongoDB (Job läuft nicht in diesem Prozess)
+    
+    Fragt alle SSE_POLL_SECONDS Status, Fortschritt und neue Ergebnisse ab.
+    Ergebnisse tragen ihren Offset als ID (r<n>, siehe event_id), sodass
+    ein Reconnect mit Last-Event-ID nur fehlende Ergebnisse erhält. Der Stream endet mit dem
+    Status, sobald der Job abgeschlossen ist.
+    """
+    yield f"retry: {SSE_RETRY_MS}\n\n"
+    
+    last_progress = None
+    last_sent = time.monotonic()
+    while not await request.is_disconnected():
+        job = await asyncio.to_thread(
+            job_queue.collection.find_one,
+            {'_id': ObjectId(job_id)},
+            {'status': 1, 'progress': 1, 'error': 1, 'results': {'$slice': [offset, SSE_RESULT_PAGE_SIZE]}}
+        )
+        if not job:
+            return
+        
+        if job.get('progress') and job['progress'] != last_progress:
+            last_progress = job['progress']
+            yield format_sse('progress', last_progress)
+            last_sent = time.monotonic()
+        
+        results = job.get('results') or []
+        for result in results:
+            offset += 1
+            yield format_sse('result', result, event_id(offset))
+        if results:
+            last_sent = time.monotonic()
+        if len(results) == SSE_RESULT_PAGE_SIZE:
+            continue
+        
+        if job.get('status') in TERMINAL_STATUSES:
+            status = {'status': job['status']}
+            if job.get('error'):
+                status['error'] = job['error']
+            yield format_sse('status', status)
+            return
+        
+        if time.monotonic() - last_sent >= SSE_HEARTBEAT_SECONDS:
+            yield ": keep-alive\n\n"
+            last_sent = time.monotonic()
+        await asyncio.sleep(SSE_POLL_SECONDS)
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(
+    job_id: str,
+    request: Request,
+    last_event_id: Optional[str] = Header(None),
+    lastEventId: Optional[str] = None
+):
+    """
+    Server-Sent Events eines Jobs: status, progress und jedes Ergebnis
+    
+    Nach einem Verbindungsabbruch setzt der Stream nach der zuletzt
+    empfangenen Ereignis-ID fort (Header Last-Event-ID oder ?lastEventId=),
+    auch wenn der Client dabei zu einem anderen Worker wechselt. Läuft der
+    Job nicht in diesem Prozess oder stammt die ID nicht aus dessen
+    Ereignis-Log, werden Status und Ergebnisse ab dem Offset der ID aus
+    MongoDB gestreamt, bis der Job abgeschlossen ist. Ist ein Job beendet
+    und hat der Client bereits alles erhalten, antwortet der Endpunkt mit
+    204, damit EventSource nicht erneut verbindet.
+    """
+    if runtime is None or not ObjectId.is_valid(job_id):
+        raise HTTPException(status_code=404, detail="Job nicht gefunden")
+    
+    resume_id = last_event_id or lastEventId
+    result_offset, after_id = parse_event_id(resume_id)
+    
+    if runtime.events.has_job(job_id) and (result_offset is None or after_id is not None):
+        after_id = after_id or 0
+        events, finished = runtime.events.read(job_id, after_id, timeout=0)
+        if finished and not events and after_id:
+            return Response(status_code=204)
+        stream = stream_job_events(job_id, after_id, request)
+    else:
+        job = await asyncio.to_thread(
+            job_queue.collection.find_one,
+            {'_id': ObjectId(job_id)},
+            {'status': 1, 'resultCount': 1}
+        )
+        if not job:
+            raise HTTPException(status_code=404, detail="Job nicht gefunden")
+        offset = result_offset or 0
+        if resume_id and job.get('status') in TERMINAL_STATUSES and offset >= (job.get('resultCount') or 0):
+            return Response(status_code=204)
+        stream = poll_job_events(job_id, offset, request)
+    
+    return StreamingResponse(
+        stream,
+        media_type="text/event-stream",
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus-Metriken (Latenzen je Phase, HTTP-Status, Cache, Queue)"""
+    if queue_runner is not None:
+        ACTIVE_JOBS.set(len(queue_runner.active_jobs))
+    if job_queue is not None:
+        try:
+            QUEUE_DEPTH.set(job_queue.depth())
+        except Exception:
+            # MongoDB nicht erreichbar: letzten Wert beibehalten
+            pass
+    
+    return Response(generate_latest(), headers={'Content-Type': CONTENT_TYPE_LATEST})
+
 @app.post("/process-job")
-async def process_job(request: ProcessJobRequest, background_tasks: BackgroundTasks):
+def process_job(request: ProcessJobRequest):
     """
-    Startet die Verarbeitung eines Import-Jobs
+    Stellt einen Import-Job in die Queue
     
-    Der Job wird asynchron im Hintergrund verarbeitet.
-    Die API gibt sofort eine Bestätigung zurück.
+    Der Job wird von einem freien Slot (dieses oder eines anderen Worker-
+    Containers) verarbeitet. Die API gibt sofort eine Bestätigung zurück.
     """
     job_id = request.jobId
     
     # Validierung
-    if not job_id:
-        raise HTTPException(status_code=400, detail="jobId ist erforderlich")
+    if not job_id or not ObjectId.is_valid(job_id):
+        raise HTTPException(status_code=400, detail="Gültige jobId ist erforderlich")
+    
+    get_runtime(request.mongoUri, request.googleMapsApiKey)
     
-    # Prüfe ob Job bereits läuft
-    if job_id in active_jobs and active_jobs[job_id].get('status') == 'running':
+    # Job (erneut) einreihen; laufende Jobs bleiben unangetastet
+    if not job_queue.enqueue(job_id):
+        if job_queue.collection.count_documents({'_id': ObjectId(job_id)}, limit=1) == 0:
+            raise HTTPException(status_code=404, detail="Job nicht gefunden")
         raise HTTPException(
             status_code=409, 
             detail=f"Job {job_id} wird bereits verarbeitet"
         )
     
-    # Job als aktiv markieren
-    active_jobs[job_id] = {
-        'status': 'running',
-        'started_at': datetime.utcnow().isoformat()
+    queue_runner.wake()
+    
+    return {
+        "success": True,
+        "jobId": job_id,
+        "status": "queued",
+        "message": "Job wurde eingereiht und wird im Hintergrund verarbeitet"
     }
+
+@app.post("/process-batch")
+def process_batch(request: ProcessBatchRequest):
+    """
+    Legt einen Batch-Job für mehrere Branche/Standort-Kombinationen an
     
-    # Starte Verarbeitung im Hintergrund
-    background_tasks.add_task(
-        run_job_processing,
-        job_id,
-        request.mongoUri,
-        request.googleMapsApiKey
-    )
+    Alle Suchanfragen laufen in einem Job: gemeinsamer Thread-Pool,
+    Rate-Limiter und Caches. Places, die mehrere Suchanfragen finden, werden
+    nur einmal angereichert; der Fortschritt wird über alle Anfragen summiert.
+    """
+    params = request.model_dump(exclude={'mongoUri', 'googleMapsApiKey'}, exclude_none=True)
+    
+    try:
+        queries = expand_queries(params)
+    except (KeyError, TypeError):
+        queries = []
+    if not queries:
+        raise HTTPException(status_code=400, detail="queries oder branchen und standorte sind erforderlich")
+    if len(queries) > BATCH_MAX_QUERIES:
+        raise HTTPException(status_code=400, detail=f"Maximal {BATCH_MAX_QUERIES} Suchanfragen pro Batch")
+    if not 0 < request.anzahlErgebnisse <= BATCH_MAX_RESULTS_PER_QUERY:
+        raise HTTPException(status_code=400, detail=f"anzahlErgebnisse muss zwischen 1 und {BATCH_MAX_RESULTS_PER_QUERY} liegen")
+    if request.anzahlErgebnisse * len(queries) > BATCH_MAX_TOTAL_RESULTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Maximal {BATCH_MAX_TOTAL_RESULTS} Ergebnisse pro Batch (anzahlErgebnisse x Suchanfragen)"
+        )
+    if request.suchFelder is not None and request.suchFelder not in SEARCH_FIELD_TIERS:
+        raise HTTPException(status_code=400, detail=f"suchFelder muss einer von {', '.join(SEARCH_FIELD_TIERS)} sein")
+    
+    get_runtime(request.mongoUri, request.googleMapsApiKey)
+    
+    params['queries'] = [{'branche': b, 'standort': s} for b, s in queries]
+    params.pop('branchen', None)
+    params.pop('standorte', None)
+    
+    now = datetime.utcnow()
+    job_id = job_queue.collection.insert_one({
+        'type': 'batch',
+        'status': 'queued',
+        'params': params,
+        'progress': {
+            'current': 0,
+            'total': request.anzahlErgebnisse * len(queries),
+            'phase': 'searching'
+        },
+        'results': [],
+        'createdAt': now,
+        'updatedAt': now
+    }).inserted_id
+    
+    queue_runner.wake()
     
     return {
         "success": True,
-        "jobId": job_id,
-        "status": "processing",
-        "message": "Job wurde gestartet und wird im Hintergrund verarbeitet"
+        "jobId": str(job_id),
+        "status": "queued",
+        "queries": len(queries),
+        "message": "Batch-Job wurde eingereiht und wird im Hintergrund verarbeitet"
     }
 
 @app.get("/job-status/{job_id}")
-async def get_job_status(job_id: str):
+def get_job_status(job_id: str):
     """
     Gibt den Status eines Jobs zurück
     (Optional - für Debugging)
     """
-    if job_id not in active_jobs:
+    if runtime is None or not ObjectId.is_valid(job_id):
         raise HTTPException(status_code=404, detail="Job nicht gefunden")
     
-    return active_jobs[job_id]
-
-async def run_job_processing(job_id: str, mongo_uri: str, google_maps_key: str):
-    """
-    Führt die Job-Verarbeitung asynchron aus
-    """
-    try:
-        print(f"🚀 Starte Verarbeitung für Job {job_id}")
-        
-        # Setze Environment Variables für den Worker
-        os.environ['MONGODB_URI'] = mongo_uri
-        os.environ['GOOGLE_MAPS_API_KEY'] = google_maps_key
-        
-        # Rufe synchronen Worker auf
-        process_job_sync(job_id)
-        
-        # Job als abgeschlossen markieren
-        active_jobs[job_id] = {
-            'status': 'completed',
-            'started_at': active_jobs[job_id]['started_at'],
-            'completed_at': datetime.utcnow().isoformat()
-        }
-        
-        print(f"✅ Job {job_id} erfolgreich abgeschlossen")
-        
-    except Exception as e:
-        print(f"❌ Fehler bei Job {job_id}: {str(e)}")
-        
-        # Job als fehlgeschlagen markieren
-        active_jobs[job_id] = {
-            'status': 'failed',
-            'started_at': active_jobs[job_id].get('started_at'),
-            'failed_at': datetime.utcnow().isoformat(),
-            'error': str(e)
-        }
+    job = job_queue.collection.find_one(
+        {'_id': ObjectId(job_id)},
+        {'type': 1, 'status': 1, 'progress': 1, 'resultCount': 1, 'queryStats': 1, 'workerId': 1, 'attempts': 1, 'error': 1}
+    )
+    if not job:
+        raise HTTPException(status_code=404, detail="Job nicht gefunden")
+    
+    job['_id'] = str(job['_id'])
+    job['local'] = job_id in queue_runner.active_jobs
+    return job
 
 if __name__ == "__main__":
     # Port aus ENV oder Default 8000
@@ -182,6 +493,7 @@ if __name__ == "__main__":
     Environment: {os.getenv('ENVIRONMENT', 'development')}
     MongoDB: {'✓' if os.getenv('MONGODB_URI') else '✗'}
     Google Maps: {'✓' if os.getenv('GOOGLE_MAPS_API_KEY') else '✗'}
+    Job-Slots: {JOB_SLOTS}
     ========================================
     """)
     
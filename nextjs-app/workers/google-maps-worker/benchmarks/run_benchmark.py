@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Benchmark für den Google Maps Worker
+Misst Website-Analyse und komplette Jobs gegen den lokalen Stub
+(keine echten Google-API-Aufrufe, keine Kosten)
+
+    python benchmarks/run_benchmark.py --sites 200 --concurrency 16
+    MONGODB_URI=mongodb://localhost:27017 python benchmarks/run_benchmark.py --jobs 5
+
+Ausgabe: Durchsatz (Websites/s, Jobs/s), Latenz-Perzentile je Phase und
+maximaler Speicherbedarf (RSS).
+"""
+
+import argparse
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from typing import Callable, Dict, List, Optional
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+sys.path.insert(0, BENCHMARK_DIR)
+
+from stub_server import StubConfig, start_stub_server, website_host  # noqa: E402
+
+BENCHMARK_DB = 'geruestbau_erp_benchmark'
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Perzentil nach Nearest-Rank (values muss sortiert sein)"""
+    if not values:
+        return 0.0
+    index = max(0, min(len(values) - 1, int(round(p / 100 * len(values) + 0.5)) - 1))
+    return values[index]
+
+
+class PhaseTimer:
+    """Sammelt Laufzeiten pro Phase (thread-safe)"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, phase: str, seconds: float):
+        with self._lock:
+            self.samples.setdefault(phase, []).append(seconds)
+
+    def wrap(self, owner, name: str, phase: Callable[..., Optional[str]]):
+        """
+        Ersetzt owner.<name> durch eine Variante, die ihre Laufzeit misst
+
+        `phase` bekommt die Aufruf-Argumente und liefert den Phasennamen
+        (None = nicht messen).
+        """
+        original = getattr(owner, name)
+
+        @wraps(original)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                label = phase(*args, **kwargs)
+                if label:
+                    self.record(label, time.perf_counter() - start)
+
+        setattr(owner, name, timed)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        result = {}
+        with self._lock:
+            for phase, values in sorted(self.samples.items()):
+                ordered = sorted(values)
+                result[phase] = {
+                    'count': len(ordered),
+                    'p50Ms': round(percentile(ordered, 50) * 1000, 2),
+                    'p90Ms': round(percentile(ordered, 90) * 1000, 2),
+                    'p99Ms': round(percentile(ordered, 99) * 1000, 2),
+                    'maxMs': round(ordered[-1] * 1000, 2)
+                }
+        return result
+
+
+def peak_rss_mb() -> Dict[str, float]:
+    """Maximaler RSS dieses Prozesses und der Parse-Prozesse (Linux: KiB)"""
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return {
+        'self': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1),
+        'children': round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale, 1)
+    }
+
+
+def instrument_analyzer(timer: PhaseTimer, analyzer):
+    timer.wrap(analyzer, 'analyze_website', lambda *a, **k: 'website.analyze')
+    timer.wrap(analyzer.fetcher, 'fetch', lambda *a, **k: 'website.fetch')
+    timer.wrap(analyzer.parser, 'parse', lambda *a, **k: 'website.parse')
+
+
+def bench_websites(args, stub: StubConfig) -> Dict:
+    """Website-Analyse ohne Cache mit `concurrency` parallelen Analysen"""
+    from website_analyzer import WebsiteAnalyzer
+    from page_parser import PageParser
+    import worker
+
+    timer = PhaseTimer()
+    analyzer = WebsiteAnalyzer(
+        site_budget=worker.WEBSITE_SITE_BUDGET,
+        max_workers=args.concurrency * 2,
+        parser=PageParser(args.parse_workers, args.parse_workers * 4),
+        max_page_bytes=worker.WEBSITE_MAX_PAGE_BYTES,
+        discover_subpages=worker.WEBSITE_DISCOVER_SUBPAGES,
+        host_concurrency=worker.WEBSITE_HOST_CONCURRENCY,
+        ip_concurrency=worker.WEBSITE_IP_CONCURRENCY,
+        host_min_gap=worker.WEBSITE_HOST_MIN_GAP,
+        respect_crawl_delay=worker.WEBSITE_RESPECT_CRAWL_DELAY,
+        max_crawl_delay=worker.WEBSITE_MAX_CRAWL_DELAY
+    )
+    instrument_analyzer(timer, analyzer)
+
+    urls = [f"http://{website_host(i)}:{stub.port}/" for i in range(args.sites)]
+    try:
+        # Aufwärmen (Prozess-Pool starten, Verbindungen aufbauen)
+        analyzer.analyze_website(urls[0])
+        timer.samples.clear()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            results = list(executor.map(analyzer.analyze_website, urls))
+        elapsed = time.perf_counter() - start
+    finally:
+        analyzer.close()
+
+    with_email = sum(1 for r in results if r.get('extractedEmails'))
+    return {
+        'sites': len(urls),
+        'concurrency': args.concurrency,
+        'parseWorkers': args.parse_workers,
+        'seconds': round(elapsed, 3),
+        'sitesPerSecond': round(len(urls) / elapsed, 2),
+        'sitesWithEmail': with_email,
+        'phases': timer.summary()
+    }
+
+
+def bench_jobs(args, stub: StubConfig) -> Dict:
+    """Komplette Jobs (Suche, Details, Website-Analyse, MongoDB) nacheinander"""
+    import worker
+    from bson import ObjectId
+
+    timer = PhaseTimer()
+    timer.wrap(
+        worker.PlacesClient, 'request',
+        lambda self, method, url, **k: 'google.search' if method == 'POST' else 'google.details'
+    )
+    timer.wrap(worker.GoogleMapsWorker, 'get_place_details', lambda *a, **k: 'place.details')
+    timer.wrap(worker.ResultWriter, 'flush', lambda *a, **k: 'mongo.flush')
+
+    runtime = worker.WorkerRuntime()
+    instrument_analyzer(timer, runtime.website_analyzer)
+    jobs = runtime.db['customer_import_jobs']
+
+    durations = []
+    result_counts = []
+    try:
+        for i in range(args.jobs):
+            if not args.warm:
+                # Kalter Lauf: Caches leeren und je Job eine neue Suchanfrage
+                worker.place_details_lru._entries.clear()
+                runtime.db['place_details_cache'].delete_many({})
+                runtime.db['website_analysis_cache'].delete_many({})
+
+            job_id = ObjectId()
+            jobs.insert_one({
+                '_id': job_id,
+                'status': 'queued',
+                'params': {
+                    'branche': 'Gerüstbau' if args.warm else f"Gerüstbau {i}",
+                    'standort': 'Berlin',
+                    'anzahlErgebnisse': args.places,
+                    'websiteAnalysieren': True,
+                    'kontaktdatenHinzufuegen': True,
+                    'suchFelder': args.search_fields
+                },
+                'createdAt': time.time()
+            })
+
+            start = time.perf_counter()
+            runtime.process_job(str(job_id))
+            durations.append(time.perf_counter() - start)
+
+            job = jobs.find_one({'_id': job_id}, {'status': 1, 'resultCount': 1})
+            if job.get('status') != 'completed':
+                raise RuntimeError(f"Job {job_id} endete mit Status {job.get('status')}")
+            result_counts.append(job.get('resultCount', 0))
+    finally:
+        places_stats = runtime.places.stats()
+        try:
+            # Vor runtime.close(), das auch den Mongo-Client schließt
+            if not args.keep_db:
+                runtime.mongo_client.drop_database(worker.MONGODB_DB)
+        finally:
+            runtime.close()
+
+    ordered = sorted(durations)
+    total = sum(durations)
+    return {
+        'jobs': len(durations),
+        'placesPerJob': args.places,
+        'warmCache': args.warm,
+        'searchFields': args.search_fields,
+        'seconds': round(total, 3),
+        'jobsPerSecond': round(len(durations) / total, 3) if total else 0,
+        'placesPerSecond': round(sum(result_counts) / total, 2) if total else 0,
+        'jobP50Ms': round(percentile(ordered, 50) * 1000, 1),
+        'jobP99Ms': round(percentile(ordered, 99) * 1000, 1),
+        'apiRequests': stub.api_requests,
+        'throttledRequests': stub.throttled,
+        'placesConnections': places_stats['connections'],
+        'connectionReuse': places_stats['reuseRate'],
+        'phases': timer.summary()
+    }
+
+
+def print_report(report: Dict):
+    for section in ('websites', 'jobs'):
+        data = report.get(section)
+        if data is None:
+            continue
+        print(f"\n=== {section} ===")
+        for key, value in data.items():
+            if key != 'phases':
+                print(f"{key:>20}: {value}")
+        print(f"{'phase':<18}{'count':>7}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+        for phase, stats in data['phases'].items():
+            print(
+                f"{phase:<18}{stats['count']:>7}{stats['p50Ms']:>10}"
+                f"{stats['p90Ms']:>10}{stats['p99Ms']:>10}{stats['maxMs']:>10}"
+            )
+    if 'skipped' in report:
+        print(f"\nℹ️ {report['skipped']}")
+    print(f"\nPeak RSS (MB): {report['peakRssMb']}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Benchmark für den Google Maps Worker')
+    parser.add_argument('--sites', type=int, default=200, help='Anzahl Websites für die Website-Analyse')
+    parser.add_argument('--concurrency', type=int, default=16, help='Parallele Website-Analysen')
+    parser.add_argument('--parse-workers', type=int, default=os.cpu_count() or 1, help='Prozesse im Parse-Pool (0 = inline)')
+    parser.add_argument('--jobs', type=int, default=3, help='Anzahl Jobs (nur mit MONGODB_URI)')
+    parser.add_argument('--places', type=int, default=60, help='Places pro Job')
+    parser.add_argument('--warm', action='store_true', help='Caches zwischen den Jobs behalten')
+    parser.add_argument(
+        '--search-fields', default='basis', choices=('ids', 'basis', 'kontakt'),
+        help='Feldumfang der Text Search (kontakt = ohne Details-Abrufe)'
+    )
+    parser.add_argument('--keep-db', action='store_true', help='Benchmark-Datenbank nicht löschen')
+    parser.add_argument('--api-latency-ms', type=float, default=20)
+    parser.add_argument('--site-latency-ms', type=float, default=50)
+    parser.add_argument('--throttle-every', type=int, default=0, help='Jede n-te API-Anfrage mit 429 beantworten')
+    parser.add_argument('--skip-websites', action='store_true')
+    parser.add_argument('--json', dest='json_path', help='Ergebnis zusätzlich als JSON speichern')
+    args = parser.parse_args(argv)
+
+    stub = StubConfig(
+        results_per_query=args.places,
+        api_latency=args.api_latency_ms / 1000,
+        site_latency=args.site_latency_ms / 1000,
+        throttle_every=args.throttle_every
+    )
+    server = start_stub_server(stub)
+
+    # Vor dem Import von worker setzen (Konfiguration wird beim Import gelesen)
+    os.environ['PLACES_API_BASE_URL'] = f"http://127.0.0.1:{stub.port}/v1"
+    os.environ.setdefault('GOOGLE_MAPS_API_KEY', 'benchmark')
+    os.environ['MONGODB_DB'] = os.getenv('BENCHMARK_MONGODB_DB', BENCHMARK_DB)
+    os.environ['WEBSITE_PARSE_WORKERS'] = str(args.parse_workers)
+
+    import logging
+    import worker  # noqa: F401  (konfiguriert Logging)
+    logging.getLogger().setLevel(logging.WARNING)
+
+    report = {}
+    try:
+        if not args.skip_websites:
+            report['websites'] = bench_websites(args, stub)
+
+        if os.getenv('MONGODB_URI'):
+            report['jobs'] = bench_jobs(args, stub)
+        else:
+            report['skipped'] = 'Job-Benchmark übersprungen (MONGODB_URI nicht gesetzt)'
+    finally:
+        server.shutdown()
+
+    report['peakRssMb'] = peak_rss_mb()
+    print_report(report)
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Lokaler Stub für Google Places API (New) und Firmen-Websites
+Liefert reproduzierbare Antworten für den Benchmark, inkl. Pagination und
+gelegentlicher HTTP 429
+
+Places:
+    POST /v1/places:searchText   (pageSize, pageToken -> nextPageToken,
+                                  locationRestriction.rectangle, viewport)
+    GET  /v1/places/{id}
+
+Websites (Host bestimmt die Fixture-Variante, z.B. http://127.0.0.7:PORT/):
+    GET /                        -> fixtures/home_<variante>.html
+    GET /...impressum...         -> fixtures/impressum_<variante>.html
+    GET /...kontakt...           -> fixtures/kontakt_<variante>.html
+    GET /sitemap.xml             -> Sitemap mit Start-, Impressum- und Kontaktseite
+    HEAD (gleiche Pfade)         -> nur Header
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Places einer Suche liegen auf einem Raster innerhalb dieses Gebiets (Berlin)
+STUB_VIEWPORT = {
+    'low': {'latitude': 52.34, 'longitude': 13.09},
+    'high': {'latitude': 52.68, 'longitude': 13.76}
+}
+
+# Text Search liefert höchstens 60 Places pro Anfrage
+MAX_RESULTS_PER_SEARCH = 60
+
+# Anzahl unterschiedlicher Loopback-Hosts für Websites (127.0.0.2 - 127.0.0.251)
+WEBSITE_HOSTS = 250
+
+
+def load_fixtures(directory: str = FIXTURES_DIR) -> Dict[str, Dict[str, bytes]]:
+    """Lädt Fixtures als {variante: {'home'|'impressum'|'kontakt': html}}"""
+    variants: Dict[str, Dict[str, bytes]] = {}
+    for filename in sorted(os.listdir(directory)):
+        name, ext = os.path.splitext(filename)
+        if ext != '.html' or '_' not in name:
+            continue
+        page, variant = name.split('_', 1)
+        with open(os.path.join(directory, filename), 'rb') as f:
+            variants.setdefault(variant, {})[page] = f.read()
+    return variants
+
+
+def website_host(index: int) -> str:
+    """Loopback-Adresse der index-ten Website"""
+    return f"127.0.0.{2 + index % WEBSITE_HOSTS}"
+
+
+class StubConfig:
+    """Verhalten des Stubs (Latenzen, Drosselung, Ergebnisanzahl)"""
+
+    def __init__(
+        self,
+        results_per_query: int = 60,
+        api_latency: float = 0.02,
+        site_latency: float = 0.05,
+        throttle_every: int = 0,
+        retry_after: float = 0.1
+    ):
+        self.results_per_query = results_per_query
+        self.api_latency = api_latency
+        self.site_latency = site_latency
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self.fixtures = load_fixtures()
+        self.variant_names = sorted(self.fixtures)
+        self.port = 0
+        self.api_requests = 0
+        self.throttled = 0
+        self._lock = threading.Lock()
+
+    def count_api_request(self) -> bool:
+        """Zählt eine API-Anfrage; True, wenn sie gedrosselt werden soll"""
+        with self._lock:
+            self.api_requests += 1
+            throttle = self.throttle_every > 0 and self.api_requests % self.throttle_every == 0
+            if throttle:
+                self.throttled += 1
+            return throttle
+
+    def variant_for_host(self, host: str) -> str:
+        try:
+            octet = int(host.rsplit('.', 1)[1])
+        except (IndexError, ValueError):
+            octet = 0
+        return self.variant_names[octet % len(self.variant_names)]
+
+
+def place_id_for(query: str, index: int) -> str:
+    digest = hashlib.md5(query.encode('utf-8')).hexdigest()[:8]
+    return f"bench-{digest}-{index}"
+
+
+def place_location(index: int, total: int) -> Dict:
+    """Position des index-ten Place (gleichmäßiges Raster im STUB_VIEWPORT)"""
+    side = max(1, math.ceil(math.sqrt(total)))
+    low, high = STUB_VIEWPORT['low'], STUB_VIEWPORT['high']
+    row, col = divmod(index, side)
+    return {
+        'latitude': low['latitude'] + (row + 0.5) * (high['latitude'] - low['latitude']) / side,
+        'longitude': low['longitude'] + (col + 0.5) * (high['longitude'] - low['longitude']) / side
+    }
+
+
+def in_rectangle(location: Dict, rectangle: Dict) -> bool:
+    return (
+        rectangle['low']['latitude'] <= location['latitude'] < rectangle['high']['latitude']
+        and rectangle['low']['longitude'] <= location['longitude'] < rectangle['high']['longitude']
+    )
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    config: StubConfig = None
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: Optional[Dict] = None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _send_json(self, status: int, payload: Dict, headers: Optional[Dict] = None):
+        self._send(status, json.dumps(payload).encode('utf-8'), 'application/json', headers)
+
+    def _throttled(self) -> bool:
+        if self.config.count_api_request():
+            self._send_json(
+                429,
+                {'error': {'code': 429, 'status': 'RESOURCE_EXHAUSTED'}},
+                {'Retry-After': str(self.config.retry_after)}
+            )
+            return True
+        return False
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length) or b'{}')
+
+        if path != '/v1/places:searchText':
+            self._send_json(404, {'error': 'not found'})
+            return
+
+        time.sleep(self.config.api_latency)
+        if self._throttled():
+            return
+
+        query = body.get('textQuery', '')
+
+        # Geokodierung des Standorts (gekachelte Suche)
+        if 'viewport' in (self.headers.get('X-Goog-FieldMask') or ''):
+            self._send_json(200, {'places': [{'id': 'bench-region', 'viewport': STUB_VIEWPORT}]})
+            return
+
+        total = self.config.results_per_query
+        indices = range(total)
+        rectangle = (body.get('locationRestriction') or {}).get('rectangle')
+        if rectangle:
+            indices = [i for i in indices if in_rectangle(place_location(i, total), rectangle)]
+        indices = list(indices)[:MAX_RESULTS_PER_SEARCH]
+
+        page_size = min(int(body.get('pageSize') or 20), 20)
+        offset = int(body.get('pageToken') or 0)
+        end = min(offset + page_size, len(indices))
+
+        # Nur die per FieldMask angefragten Felder liefern (wie die Places API)
+        fields = {
+            field[len('places.'):]
+            for field in (self.headers.get('X-Goog-FieldMask') or '').split(',')
+            if field.startswith('places.')
+        }
+        places = []
+        for i in indices[offset:end]:
+            place = dict(self._place_record(place_id_for(query, i), i), location=place_location(i, total))
+            places.append({key: value for key, value in place.items() if key in fields})
+
+        payload = {'places': places}
+        if end < len(indices):
+            payload['nextPageToken'] = str(end)
+        self._send_json(200, payload)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+
+        if path.startswith('/v1/places/'):
+            self._place_details(path[len('/v1/places/'):])
+            return
+
+        self._website(path)
+
+    def do_HEAD(self):
+        self._website(urlparse(self.path).path)
+
+    def _place_details(self, place_id: str):
+        time.sleep(self.config.api_latency)
+        if self._throttled():
+            return
+
+        try:
+            index = int(place_id.rsplit('-', 1)[1])
+        except (IndexError, ValueError):
+            self._send_json(404, {'error': {'code': 404, 'status': 'NOT_FOUND'}})
+            return
+
+        self._send_json(200, self._place_record(place_id, index))
+
+    def _place_record(self, place_id: str, index: int) -> Dict:
+        return {
+            'id': place_id,
+            'displayName': {'text': f"Benchmark Betrieb {index}", 'languageCode': 'de'},
+            'formattedAddress': f"Musterstraße {index + 1}, 10115 Berlin, Deutschland",
+            'nationalPhoneNumber': f"030 {1000000 + index}",
+            'websiteUri': f"http://{website_host(index)}:{self.config.port}/",
+            'types': ['general_contractor', 'point_of_interest', 'establishment'],
+            'addressComponents': [
+                {'longText': str(index + 1), 'types': ['street_number']},
+                {'longText': 'Musterstraße', 'types': ['route']},
+                {'longText': '10115', 'types': ['postal_code']},
+                {'longText': 'Berlin', 'types': ['locality', 'political']},
+                {'longText': 'Deutschland', 'types': ['country', 'political']}
+            ]
+        }
+
+    def _website(self, path: str):
+        time.sleep(self.config.site_latency)
+
+        host = (self.headers.get('Host') or '').split(':')[0]
+        pages = self.config.fixtures[self.config.variant_for_host(host)]
+
+        lowered = path.lower()
+        if lowered == '/sitemap.xml':
+            self._send(200, self._sitemap(host, pages), 'application/xml')
+            return
+        if lowered in ('', '/'):
+            page = 'home'
+        elif 'impressum' in lowered:
+            page = 'impressum'
+        elif 'kontakt' in lowered:
+            page = 'kontakt'
+        else:
+            page = None
+
+        if page is None or page not in pages:
+            self._send(404, b'<html><body>Nicht gefunden</body></html>', 'text/html; charset=utf-8')
+            return
+
+        self._send(200, pages[page], 'text/html; charset=utf-8')
+
+    def _sitemap(self, host: str, pages: Dict[str, bytes]) -> bytes:
+        base = f"http://{host}:{self.config.port}"
+        paths = ['/'] + [f"/{page}" for page in ('impressum', 'kontakt') if page in pages]
+        entries = ''.join(f"<url><loc>{base}{path}</loc></url>" for path in paths)
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</urlset>'
+        ).encode('utf-8')
+
+
+def start_stub_server(config: StubConfig, port: int = 0) -> ThreadingHTTPServer:
+    """Startet den Stub in einem Hintergrund-Thread (Port 0 = beliebig)"""
+    handler = type('ConfiguredStubHandler', (StubHandler,), {'config': config})
+    server = ThreadingHTTPServer(('0.0.0.0', port), handler)
+    server.daemon_threads = True
+    config.port = server.server_address[1]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Stub für Places API und Websites')
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--results-per-query', type=int, default=60)
+    parser.add_argument('--api-latency-ms', type=float, default=20)
+    parser.add_argument('--site-latency-ms', type=float, default=50)
+    parser.add_argument('--throttle-every', type=int, default=0, help='Jede n-te API-Anfrage mit 429 beantworten')
+    args = parser.parse_args(argv)
+
+    config = StubConfig(
+        results_per_query=args.results_per_query,
+        api_latency=args.api_latency_ms / 1000,
+        site_latency=args.site_latency_ms / 1000,
+        throttle_every=args.throttle_every
+    )
+    server = start_stub_server(config, args.port)
+    print(f"🧪 Stub läuft auf Port {config.port} (PLACES_API_BASE_URL=http://127.0.0.1:{config.port}/v1)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""
+Kontaktdaten-Extraktion für die Website-Analyse
+Linearisiert eine Seite einmalig in Textblöcke und arbeitet danach nur noch
+mit vorkompilierten Regexes auf Strings
+"""
+
+import re
+from typing import Dict, List, NamedTuple
+from bs4 import BeautifulSoup, CData, NavigableString
+
+# Container, deren Text als zusammenhängender Block betrachtet wird
+BLOCK_TAGS = frozenset(['div', 'section', 'article', 'p'])
+
+EMAIL_PATTERN = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+
+# Gängige Spam/Placeholder-E-Mails
+EMAIL_BLACKLIST = ('example.com', 'domain.com', 'email.com', 'test.com', 'placeholder')
+
+# Verschiedene Telefon-Formate
+PHONE_PATTERNS = (
+    re.compile(r'\+49[\s-]?\d{2,4}[\s-]?\d{3,9}'),  # +49 ...
+    re.compile(r'0\d{2,5}[\s-]?\d{3,9}'),            # 0123 ...
+    re.compile(r'\(\d{2,5}\)[\s-]?\d{3,9}'),         # (0123) ...
+)
+PHONE_SEPARATORS = re.compile(r'[\s-]')
+PHONE_HINT = re.compile(r'[\d\+\(\)]')
+
+# Namens-Muster (Vorname Nachname)
+NAME_PATTERN = re.compile(r'([A-ZÄÖÜ][a-zäöüß]+)\s+([A-ZÄÖÜ][a-zäöüß]+)')
+
+# Typische Positionen
+POSITION_KEYWORDS = ('geschäftsführer', 'leiter', 'inhaber', 'manager', 'direktor', 'chef')
+
+# Anzahl Zeilen nach einem Namen, in denen nach E-Mail/Telefon gesucht wird
+CONTACT_WINDOW = 5
+MAX_CONTACTS = 5
+
+
+class PageText(NamedTuple):
+    """Linearisierter Text einer Seite"""
+    text: str                 # Gesamter Text, eine Zeile pro Textknoten
+    blocks: List[List[str]]   # Zeilen, gruppiert nach äußerstem Block-Container
+
+
+def linearize(soup: BeautifulSoup) -> PageText:
+    """
+    Zerlegt eine Seite in einem Durchlauf in Zeilen und Textblöcke
+
+    Jeder Textknoten wird genau einmal besucht und dem äußersten
+    div/section/article/p-Container zugeordnet, in dem er steht.
+    """
+    lines: List[str] = []
+    blocks: List[List[str]] = []
+    current_root = None
+
+    for node in soup.find_all(string=True):
+        # Nur sichtbarer Text (keine Kommentare, Skripte, Styles)
+        if type(node) not in (NavigableString, CData):
+            continue
+
+        stripped = node.strip()
+        if not stripped:
+            continue
+
+        node_lines = [line.strip() for line in stripped.split('\n') if line.strip()]
+        lines.extend(node_lines)
+
+        root = None
+        for parent in node.parents:
+            if parent.name in BLOCK_TAGS:
+                root = parent
+
+        if root is None:
+            current_root = None
+            continue
+
+        if root is not current_root:
+            current_root = root
+            blocks.append([])
+        blocks[-1].extend(node_lines)
+
+    return PageText('\n'.join(lines), blocks)
+
+
+def extract_emails(text: str) -> List[str]:
+    """Extrahiert E-Mail-Adressen aus einem Text"""
+    emails = []
+    for email in EMAIL_PATTERN.findall(text):
+        email = email.lower()
+        if not any(bl in email for bl in EMAIL_BLACKLIST):
+            emails.append(email)
+    return emails
+
+
+def extract_phones(text: str) -> List[str]:
+    """Extrahiert und normalisiert Telefonnummern aus einem Text"""
+    normalized = []
+    for pattern in PHONE_PATTERNS:
+        for phone in pattern.findall(text):
+            # Entferne Whitespace und Bindestriche
+            clean = PHONE_SEPARATORS.sub('', phone)
+            if 6 <= len(clean) <= 20:  # Plausible Länge
+                normalized.append(clean)
+    return normalized
+
+
+def extract_contacts(blocks: List[List[str]]) -> List[Dict]:
+    """
+    Extrahiert Ansprechpartner (Name, Position, E-Mail, Telefon)
+
+    Typisches Muster: Name, in der nächsten Zeile die Position und in den
+    folgenden Zeilen die Kontaktdaten.
+    """
+    contacts = []
+    seen_names = set()
+
+    for lines in blocks:
+        for i, line in enumerate(lines):
+            if len(line) >= 50:  # Nicht zu lang
+                continue
+
+            match = NAME_PATTERN.search(line)
+            if not match:
+                continue
+
+            name = match.group(0)
+            if name in seen_names:
+                continue
+
+            # Suche Position in nächster Zeile
+            position = None
+            if i + 1 < len(lines):
+                next_line = lines[i + 1]
+                if any(kw in next_line.lower() for kw in POSITION_KEYWORDS):
+                    position = next_line
+
+            # Suche E-Mail und Telefon in den nächsten Zeilen
+            email = None
+            telefon = None
+            for candidate in lines[i:i + CONTACT_WINDOW]:
+                if '@' in candidate:
+                    emails = extract_emails(candidate)
+                    if emails:
+                        email = emails[0]
+                if PHONE_HINT.search(candidate):
+                    phones = extract_phones(candidate)
+                    if phones:
+                        telefon = phones[0]
+
+            seen_names.add(name)
+            contacts.append({
+                'name': name,
+                'position': position,
+                'email': email,
+                'telefon': telefon
+            })
+
+            if len(contacts) >= MAX_CONTACTS:
+                return contacts
+
+    return contacts
@@ -0,0 +1,381 @@
+"""
+Höflichkeits-Scheduler für Website-Abrufe
+Begrenzt gleichzeitige Anfragen pro Host (optional pro IP), hält einen
+Mindestabstand pro Host ein und beachtet Crawl-delay aus robots.txt
+"""
+
+import socket
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+from urllib.parse import urlparse
+import requests
+import logging
+from metrics import PHASE_CRAWL_WAIT, PHASE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# robots.txt wird höchstens so groß gelesen (Rest ignoriert)
+ROBOTS_MAX_BYTES = 64 * 1024
+
+
+def parse_crawl_delay(robots_txt: str) -> Optional[float]:
+    """
+    Crawl-delay für 'User-agent: *' aus robots.txt
+
+    Eigene Auswertung statt urllib.robotparser, weil dieser nur ganzzahlige
+    Werte akzeptiert ("Crawl-delay: 0.5" ist verbreitet).
+    """
+    applies = False
+    in_agents = False
+    for line in robots_txt.splitlines():
+        line = line.split('#', 1)[0].strip()
+        if ':' not in line:
+            continue
+        key, value = (part.strip() for part in line.split(':', 1))
+        key = key.lower()
+        if key == 'user-agent':
+            # Mehrere User-agent-Zeilen hintereinander bilden eine Gruppe
+            if not in_agents:
+                applies = False
+            in_agents = True
+            applies = applies or value == '*'
+            continue
+        in_agents = False
+        if key == 'crawl-delay' and applies:
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                return None
+    return None
+
+
+class HostState:
+    """Zustand eines Hosts (Verbindungen, letzter Start, Crawl-delay)"""
+
+    def __init__(self, ip: str):
+        self.ip = ip
+        self.active = 0
+        self.next_start = 0.0            # Frühester Start der nächsten Anfrage
+        self.crawl_delay: Optional[float] = None
+        self.robots_requested = False
+
+
+class CrawlSlot(NamedTuple):
+    host: str
+    ip: str
+
+
+class PendingFetch(NamedTuple):
+    """Abruf, der auf einen Slot wartet, ohne einen Pool-Thread zu belegen"""
+    state: HostState
+    host: str
+    deadline: Optional[float]
+    start: float
+    future: Future
+    dispatch: Callable[[Optional[CrawlSlot]], None]
+
+
+class CrawlScheduler:
+    """
+    Vergibt Slots für Website-Anfragen, prozessweit für alle Analysen
+
+    Eine Anfrage startet erst, wenn
+        - auf dem Host weniger als `max_per_host` Anfragen laufen,
+        - auf der IP weniger als `max_per_ip` laufen (0 = ohne Grenze; hinter
+          CDN-/Hoster-IPs liegen viele fremde Websites),
+        - seit dem letzten Start auf dem Host `min_gap` Sekunden bzw. das
+          Crawl-delay aus robots.txt vergangen sind.
+
+    acquire() wartet im aufrufenden Thread und ist für Abrufe gedacht, die
+    die Analyse genau dieses Hosts ohnehin abwarten muss (Startseite).
+    submit() reiht Abrufe ein, ohne einen Pool-Thread zu belegen: ein
+    Dispatcher-Thread übergibt sie erst an den Pool, wenn ihr Host bereit
+    ist, sodass Pool-Threads derweil andere Hosts bedienen.
+
+    robots.txt wird beim ersten Kontakt mit einem Host im Hintergrund
+    geladen, damit die erste Anfrage nicht darauf warten muss. Antwortet ein
+    Host mit 429/503, pausiert er gemäß Retry-After (penalize).
+    """
+
+    def __init__(
+        self,
+        session: requests.Session,
+        max_per_host: int = 2,
+        max_per_ip: int = 0,
+        min_gap: float = 0.2,
+        respect_robots: bool = True,
+        max_crawl_delay: float = 10.0,
+        robots_timeout: float = 5.0,
+        max_hosts: int = 10000
+    ):
+        self.session = session
+        self.max_per_host = max(1, max_per_host)
+        self.max_per_ip = max(0, max_per_ip)
+        self.min_gap = max(0.0, min_gap)
+        self.respect_robots = respect_robots
+        self.max_crawl_delay = max_crawl_delay
+        self.robots_timeout = robots_timeout
+        self.max_hosts = max_hosts
+        self._hosts: 'OrderedDict[str, HostState]' = OrderedDict()
+        self._ip_active: Dict[str, int] = {}
+        self._changed = threading.Condition()
+        self._robots_executor = ThreadPoolExecutor(max_workers=4) if respect_robots else None
+        self._pending: List[PendingFetch] = []
+        self._dispatcher: Optional[threading.Thread] = None
+        self._closed = False
+
+    def acquire(self, url: str, deadline: Optional[float] = None) -> Optional[CrawlSlot]:
+        """
+        Wartet auf einen Slot für die URL
+
+        Returns:
+            CrawlSlot (mit release() freigeben) oder None, wenn das Zeitbudget
+            vorher abläuft
+        """
+        host = (urlparse(url).hostname or '').lower()
+        if not host:
+            return None
+
+        state = self._host_state(host, url)
+        start = time.monotonic()
+        with self._changed:
+            while True:
+                now = time.monotonic()
+                ready_in = self._try_grant(state, now)
+                if ready_in is None:
+                    break
+
+                if deadline is not None:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        return None
+                    ready_in = min(ready_in, remaining)
+                self._changed.wait(None if ready_in == float('inf') else ready_in)
+
+        self._observe_wait(start)
+        return CrawlSlot(host, state.ip)
+
+    def submit(
+        self,
+        executor: Executor,
+        url: str,
+        deadline: Optional[float],
+        fn: Callable[..., Any],
+        *args
+    ) -> Future:
+        """
+        Führt fn(slot, *args) im Pool aus, sobald der Host einen Slot frei hat
+
+        Bis dahin belegt der Abruf keinen Pool-Thread. Läuft das Zeitbudget
+        vorher ab (oder fehlt der Host), liefert das Future None. Der Slot
+        muss von fn bzw. dem Abruf freigegeben werden.
+        """
+        future: Future = Future()
+        host = (urlparse(url).hostname or '').lower()
+        if not host:
+            future.set_result(None)
+            return future
+
+        def run(slot: CrawlSlot):
+            if not future.set_running_or_notify_cancel():
+                self.release(slot)
+                return
+            try:
+                future.set_result(fn(slot, *args))
+            except BaseException as e:
+                future.set_exception(e)
+
+        def dispatch(slot: Optional[CrawlSlot]):
+            if slot is None:
+                if future.set_running_or_notify_cancel():
+                    future.set_result(None)
+                return
+            try:
+                executor.submit(run, slot)
+            except RuntimeError:
+                # Pool bereits beendet
+                self.release(slot)
+                future.cancel()
+
+        state = self._host_state(host, url)
+        slot = None
+        with self._changed:
+            if not self._closed:
+                now = time.monotonic()
+                if self._try_grant(state, now) is not None:
+                    self._pending.append(PendingFetch(state, host, deadline, now, future, dispatch))
+                    self._ensure_dispatcher()
+                    self._changed.notify_all()
+                    return future
+                slot = CrawlSlot(host, state.ip)
+        dispatch(slot)
+        return future
+
+    def release(self, slot: CrawlSlot):
+        with self._changed:
+            state = self._hosts.get(slot.host)
+            if state is not None:
+                state.active = max(0, state.active - 1)
+            active = self._ip_active.get(slot.ip, 0) - 1
+            if active > 0:
+                self._ip_active[slot.ip] = active
+            else:
+                self._ip_active.pop(slot.ip, None)
+            self._changed.notify_all()
+
+    def penalize(self, url: str, retry_after: Optional[float]):
+        """Pausiert einen Host nach HTTP 429/503 (Retry-After, sonst das Doppelte des Abstands)"""
+        host = (urlparse(url).hostname or '').lower()
+        with self._changed:
+            state = self._hosts.get(host)
+            if state is None:
+                return
+            pause = retry_after if retry_after is not None else max(2 * self._gap(state), 1.0)
+            pause = min(pause, self.max_crawl_delay)
+            state.next_start = max(state.next_start, time.monotonic() + pause)
+            logger.info(f"🐢 Host {host} drosselt, pausiere {pause:.1f}s")
+
+    def close(self):
+        with self._changed:
+            self._closed = True
+            pending, self._pending = self._pending, []
+            self._changed.notify_all()
+        for entry in pending:
+            entry.dispatch(None)
+        if self._robots_executor is not None:
+            self._robots_executor.shutdown(wait=False, cancel_futures=True)
+
+    def _gap(self, state: HostState) -> float:
+        return max(self.min_gap, state.crawl_delay or 0.0)
+
+    def _try_grant(self, state: HostState, now: float) -> Optional[float]:
+        """
+        Vergibt einen Slot, falls möglich (Lock gehalten)
+
+        Returns:
+            None bei Erfolg, sonst die Wartezeit bis zur nächsten Prüfung
+            (unendlich, wenn erst ein laufender Abruf enden muss)
+        """
+        ip_active = self._ip_active.get(state.ip, 0)
+        has_capacity = state.active < self.max_per_host and (
+            not self.max_per_ip or ip_active < self.max_per_ip
+        )
+        if not has_capacity:
+            return float('inf')
+        if now < state.next_start:
+            return state.next_start - now
+
+        state.active += 1
+        self._ip_active[state.ip] = ip_active + 1
+        state.next_start = now + self._gap(state)
+        return None
+
+    @staticmethod
+    def _observe_wait(start: float):
+        waited = time.monotonic() - start
+        if waited > 0.001:
+            PHASE_SECONDS.labels(PHASE_CRAWL_WAIT).observe(waited)
+
+    def _ensure_dispatcher(self):
+        if self._dispatcher is None:
+            self._dispatcher = threading.Thread(target=self._dispatch_loop, name='crawl-dispatcher', daemon=True)
+            self._dispatcher.start()
+
+    def _dispatch_loop(self):
+        """Übergibt wartende Abrufe in Reihenfolge an den Pool, sobald ihr Host bereit ist"""
+        while True:
+            ready = []
+            with self._changed:
+                while not self._closed:
+                    now = time.monotonic()
+                    timeout = float('inf')
+                    waiting = []
+                    for entry in self._pending:
+                        if entry.future.cancelled():
+                            continue
+                        if entry.deadline is not None and now >= entry.deadline:
+                            ready.append((entry, None))
+                            continue
+                        ready_in = self._try_grant(entry.state, now)
+                        if ready_in is None:
+                            ready.append((entry, CrawlSlot(entry.host, entry.state.ip)))
+                            continue
+                        waiting.append(entry)
+                        if entry.deadline is not None:
+                            ready_in = min(ready_in, entry.deadline - now)
+                        timeout = min(timeout, ready_in)
+                    self._pending = waiting
+                    if ready:
+                        break
+                    self._changed.wait(None if timeout == float('inf') else timeout)
+                if self._closed and not ready:
+                    return
+
+            # Außerhalb des Locks: dispatch kann release() aufrufen
+            for entry, slot in ready:
+                if slot is not None:
+                    self._observe_wait(entry.start)
+                entry.dispatch(slot)
+
+    def _host_state(self, host: str, url: str) -> HostState:
+        with self._changed:
+            state = self._hosts.get(host)
+            if state is not None:
+                self._hosts.move_to_end(host)
+                return state
+
+        # DNS nur für die IP-Grenze und außerhalb des Locks auflösen (kann dauern)
+        ip = self._resolve(host) if self.max_per_ip else host
+        with self._changed:
+            state = self._hosts.get(host)
+            if state is None:
+                state = HostState(ip)
+                self._hosts[host] = state
+                self._prune()
+            if self.respect_robots and not state.robots_requested:
+                state.robots_requested = True
+                scheme = urlparse(url).scheme or 'http'
+                self._robots_executor.submit(self._load_robots, host, f"{scheme}://{host}/robots.txt")
+            return state
+
+    @staticmethod
+    def _resolve(host: str) -> str:
+        try:
+            return socket.getaddrinfo(host, None, proto=socket.IPPROTO_TCP)[0][4][0]
+        except (OSError, IndexError):
+            return host
+
+    def _load_robots(self, host: str, robots_url: str):
+        delay = None
+        try:
+            with self.session.get(robots_url, timeout=self.robots_timeout, stream=True) as response:
+                if response.status_code == 200:
+                    text = response.raw.read(ROBOTS_MAX_BYTES, decode_content=True).decode('utf-8', 'replace')
+                    delay = parse_crawl_delay(text)
+        except Exception as e:
+            logger.debug(f"robots.txt nicht lesbar: {robots_url} - {e}")
+
+        if delay is None:
+            return
+        delay = min(float(delay), self.max_crawl_delay)
+        with self._changed:
+            state = self._hosts.get(host)
+            if state is not None:
+                state.crawl_delay = delay
+                self._changed.notify_all()
+        logger.info(f"🤖 Crawl-delay {delay:.1f}s für {host}")
+
+    def _prune(self):
+        """Entfernt die am längsten unbenutzten, inaktiven Hosts"""
+        excess = len(self._hosts) - self.max_hosts
+        if excess <= 0:
+            return
+        for host in list(self._hosts):
+            if excess <= 0:
+                break
+            if self._hosts[host].active == 0:
+                del self._hosts[host]
+                excess -= 1
@@ -0,0 +1,42 @@
+"""
+Kachelung von Suchgebieten für die gekachelte Places-Suche
+Rechtecke im Format der Places API: {'low': {latitude, longitude}, 'high': {...}}
+"""
+
+from typing import Dict, List
+
+
+def make_rectangle(south: float, west: float, north: float, east: float) -> Dict:
+    return {
+        'low': {'latitude': south, 'longitude': west},
+        'high': {'latitude': north, 'longitude': east}
+    }
+
+
+def split_rectangle(rectangle: Dict, rows: int, cols: int) -> List[Dict]:
+    """
+    Teilt ein Rechteck in rows x cols gleich große Kacheln
+
+    Die Reihenfolge beginnt im Südwesten, zeilenweise nach Osten.
+    (Gebiete über die Datumsgrenze werden nicht unterstützt.)
+    """
+    south = rectangle['low']['latitude']
+    west = rectangle['low']['longitude']
+    north = rectangle['high']['latitude']
+    east = rectangle['high']['longitude']
+
+    rows = max(1, rows)
+    cols = max(1, cols)
+    lat_step = (north - south) / rows
+    lng_step = (east - west) / cols
+
+    return [
+        make_rectangle(
+            south + row * lat_step,
+            west + col * lng_step,
+            south + (row + 1) * lat_step,
+            west + (col + 1) * lng_step
+        )
+        for row in range(rows)
+        for col in range(cols)
+    ]
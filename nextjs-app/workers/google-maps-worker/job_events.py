@@ -0,0 +1,179 @@
+"""
+Ereignis-Log laufender Jobs für das Live-Streaming (Server-Sent Events)
+Hält pro Job eine nummerierte, begrenzte Folge von Ereignissen im Speicher;
+Clients können ab einer Ereignis-ID (Last-Event-ID) fortsetzen
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, NamedTuple, Optional, Set, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Ereignistypen
+EVENT_STATUS = 'status'        # running, completed, failed, cancelled
+EVENT_PROGRESS = 'progress'    # current, total, phase
+EVENT_RESULT = 'result'        # ein angereichertes Ergebnis
+EVENT_TRUNCATED = 'truncated'  # angefragte Ereignisse nicht mehr im Puffer
+
+
+class JobEvent(NamedTuple):
+    id: int
+    type: str
+    data: Dict
+    # Anzahl Ergebnisse des Jobs bis einschließlich dieses Ereignisses
+    # (entspricht der Position in `results` des Job-Dokuments)
+    offset: int = 0
+
+
+class JobEventLog:
+    """Ereignisse eines Jobs (älteste werden ab `max_events` verworfen)"""
+
+    def __init__(self, max_events: int, results: int = 0):
+        self.events: Deque[JobEvent] = deque(maxlen=max_events)
+        self.last_id = 0
+        self.results = results
+        self.finished_at: Optional[float] = None
+
+
+class JobEventChannel:
+    """Schreibzugriff auf das Ereignis-Log eines Jobs"""
+
+    def __init__(self, bus: 'JobEventBus', job_id: str):
+        self.bus = bus
+        self.job_id = job_id
+
+    def publish(self, event_type: str, data: Dict):
+        self.bus.publish(self.job_id, event_type, data)
+
+
+class JobEventBus:
+    """
+    Prozessweiter Verteiler für Job-Ereignisse
+
+    Der Worker veröffentlicht Status, Fortschritt und jedes Ergebnis, sobald
+    es vorliegt. Leser warten entweder blockierend (read mit timeout) oder
+    lassen sich per subscribe() bei jeder Änderung benachrichtigen (z.B.
+    asyncio-Clients, ohne einen Thread zu belegen). Logs abgeschlossener
+    Jobs bleiben `retention_seconds` erhalten, damit Clients nach einem
+    Verbindungsabbruch fortsetzen können.
+    """
+
+    def __init__(self, max_events: int = 5000, retention_seconds: float = 300):
+        self.max_events = max_events
+        self.retention_seconds = retention_seconds
+        self._logs: Dict[str, JobEventLog] = {}
+        self._subscribers: Dict[str, Set[Callable[[], None]]] = {}
+        self._changed = threading.Condition()
+
+    def open(self, job_id: str, results: int = 0) -> JobEventChannel:
+        """
+        Beginnt ein neues Log für einen (erneut) gestarteten Job
+
+        Args:
+            results: Bereits gespeicherte Ergebnisse (fortgesetzter Job)
+        """
+        with self._changed:
+            self._prune()
+            previous = self._logs.get(job_id)
+            log = JobEventLog(self.max_events, results)
+            # IDs fortsetzen, damit Clients eines früheren Laufs nichts verpassen
+            if previous is not None:
+                log.last_id = previous.last_id
+            self._logs[job_id] = log
+            self._notify(job_id)
+        return JobEventChannel(self, job_id)
+
+    def publish(self, job_id: str, event_type: str, data: Dict):
+        with self._changed:
+            log = self._logs.get(job_id)
+            if log is None:
+                return
+            log.last_id += 1
+            if event_type == EVENT_RESULT:
+                log.results += 1
+            log.events.append(JobEvent(log.last_id, event_type, data, log.results))
+            self._notify(job_id)
+
+    def finish(self, job_id: str):
+        """Markiert das Log als abgeschlossen (keine weiteren Ereignisse)"""
+        with self._changed:
+            log = self._logs.get(job_id)
+            if log is not None:
+                log.finished_at = time.time()
+            self._notify(job_id)
+
+    def subscribe(self, job_id: str, callback: Callable[[], None]):
+        """
+        Ruft `callback` nach jeder Änderung am Log des Jobs auf
+
+        Der Callback läuft im Thread des Workers und muss sofort
+        zurückkehren (z.B. loop.call_soon_threadsafe(event.set)).
+        """
+        with self._changed:
+            self._subscribers.setdefault(job_id, set()).add(callback)
+
+    def unsubscribe(self, job_id: str, callback: Callable[[], None]):
+        with self._changed:
+            callbacks = self._subscribers.get(job_id)
+            if callbacks is not None:
+                callbacks.discard(callback)
+                if not callbacks:
+                    del self._subscribers[job_id]
+
+    def _notify(self, job_id: str):
+        """Weckt blockierende Leser und benachrichtigt Abonnenten (Lock gehalten)"""
+        self._changed.notify_all()
+        for callback in self._subscribers.get(job_id, ()):
+            try:
+                callback()
+            except Exception as e:
+                logger.debug(f"Ereignis-Abonnent nicht erreichbar: {e}")
+
+    def has_job(self, job_id: str) -> bool:
+        with self._changed:
+            return job_id in self._logs
+
+    def read(self, job_id: str, after_id: int = 0, timeout: float = 15) -> Tuple[List[JobEvent], bool]:
+        """
+        Liefert Ereignisse mit ID > after_id, wartet bis zu `timeout` Sekunden
+        (0 = nicht warten)
+
+        Returns:
+            (Ereignisse, abgeschlossen); abgeschlossen ist True, wenn der Job
+            beendet ist (mit den gelieferten Ereignissen ist das Log vollständig)
+        """
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            while True:
+                log = self._logs.get(job_id)
+                if log is None:
+                    return [], True
+
+                events = [event for event in log.events if event.id > after_id]
+                if events and events[0].id > after_id + 1:
+                    # Ältere Ereignisse wurden bereits verworfen
+                    first = events[0]
+                    gap = JobEvent(
+                        first.id - 1, EVENT_TRUNCATED, {'missedFrom': after_id + 1},
+                        first.offset - (1 if first.type == EVENT_RESULT else 0)
+                    )
+                    events.insert(0, gap)
+
+                finished = log.finished_at is not None
+                remaining = deadline - time.monotonic()
+                if events or finished or remaining <= 0:
+                    return events, finished
+
+                self._changed.wait(remaining)
+
+    def _prune(self):
+        now = time.time()
+        expired = [
+            job_id for job_id, log in self._logs.items()
+            if log.finished_at is not None and now - log.finished_at > self.retention_seconds
+        ]
+        for job_id in expired:
+            del self._logs[job_id]
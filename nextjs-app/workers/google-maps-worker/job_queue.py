@@ -0,0 +1,264 @@
+"""
+Persistente Job-Queue auf Basis von `customer_import_jobs`
+Worker holen sich Jobs atomar per find_one_and_update, halten sie über eine
+Lease mit Heartbeat und übernehmen Jobs abgestürzter Worker
+"""
+
+import os
+import socket
+import threading
+import time
+from typing import Callable, Dict, Optional
+from bson import ObjectId
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.collection import Collection
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def default_worker_id() -> str:
+    """Eindeutige Kennung dieses Worker-Prozesses"""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class JobLease:
+    """
+    Lease eines geclaimten Jobs
+
+    Jeder Claim erhält eine eigene `leaseId`. Schreibzugriffe des Jobs
+    filtern mit `owner` auf Worker und Lease, sodass ein Worker nach
+    Verlust der Lease (Job von einem anderen Worker oder Slot übernommen)
+    nichts mehr schreiben kann. `revoked` wird beim Verlust gesetzt und
+    bricht die Verarbeitung ab.
+    """
+
+    def __init__(self, job_id: ObjectId, worker_id: str, lease_id: ObjectId):
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.lease_id = lease_id
+        self.revoked = threading.Event()
+
+    @property
+    def owner(self) -> Dict:
+        """Filter-Felder für Schreibzugriffe des Lease-Inhabers"""
+        return {'workerId': self.worker_id, 'leaseId': self.lease_id}
+
+
+class JobQueue:
+    """
+    Claim/Lease-Logik für Import-Jobs
+
+    Ein Job gilt als frei, wenn er `queued` ist oder `running` mit
+    abgelaufener Lease (Worker abgestürzt oder hängengeblieben).
+    """
+
+    def __init__(self, collection: Collection, worker_id: str, lease_seconds: float = 60, max_attempts: int = 3):
+        self.collection = collection
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._ensure_indexes()
+
+    def _ensure_indexes(self):
+        self.collection.create_index([('status', ASCENDING), ('createdAt', ASCENDING)])
+        self.collection.create_index([('status', ASCENDING), ('leaseExpiresAt', ASCENDING)])
+
+    def enqueue(self, job_id: str) -> bool:
+        """
+        Stellt einen Job (erneut) in die Queue
+
+        Returns:
+            False, wenn der Job nicht existiert oder gerade läuft
+        """
+        result = self.collection.update_one(
+            {'_id': ObjectId(job_id), 'status': {'$ne': 'running'}},
+            {
+                '$set': {'status': 'queued', 'updatedAt': time.time()},
+                # Erneut eingereihte Jobs starten von vorn (kein Fortsetzen)
+                '$unset': {'error': '', 'workerId': '', 'leaseId': '', 'leaseExpiresAt': '', 'checkpoint': ''}
+            }
+        )
+        return result.matched_count == 1
+
+    def claim(self) -> Optional[Dict]:
+        """Holt atomar den ältesten freien Job und setzt die Lease"""
+        now = time.time()
+        return self.collection.find_one_and_update(
+            {
+                '$or': [
+                    {'status': 'queued'},
+                    {'status': 'running', 'leaseExpiresAt': {'$lt': now}, 'attempts': {'$lt': self.max_attempts}}
+                ]
+            },
+            {
+                '$set': {
+                    'status': 'running',
+                    'workerId': self.worker_id,
+                    'leaseId': ObjectId(),
+                    'claimedAt': now,
+                    'leaseExpiresAt': now + self.lease_seconds,
+                    'updatedAt': now
+                },
+                '$inc': {'attempts': 1}
+            },
+            sort=[('createdAt', ASCENDING)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    @staticmethod
+    def lease_of(job: Dict) -> JobLease:
+        """Lease eines von claim() gelieferten Jobs"""
+        return JobLease(job['_id'], job['workerId'], job['leaseId'])
+
+    def renew(self, lease: JobLease) -> bool:
+        """
+        Verlängert die Lease; False, wenn der Job nicht mehr uns gehört
+
+        Geprüft wird nur der Inhaber, nicht der Status: ein vom Nutzer
+        abgebrochener Job gehört weiter diesem Worker, bis er den Abbruch
+        gemeldet hat.
+        """
+        result = self.collection.update_one(
+            {'_id': lease.job_id, **lease.owner},
+            {'$set': {'leaseExpiresAt': time.time() + self.lease_seconds}}
+        )
+        return result.matched_count == 1
+
+    def release(self, lease: JobLease):
+        """Gibt die Lease nach Abschluss frei"""
+        self.collection.update_one(
+            {'_id': lease.job_id, **lease.owner},
+            {'$unset': {'leaseExpiresAt': ''}}
+        )
+
+    def fail_exhausted(self) -> int:
+        """Markiert hängengebliebene Jobs ohne verbleibende Versuche als fehlgeschlagen"""
+        now = time.time()
+        result = self.collection.update_many(
+            {'status': 'running', 'leaseExpiresAt': {'$lt': now}, 'attempts': {'$gte': self.max_attempts}},
+            {
+                '$set': {
+                    'status': 'failed',
+                    'error': 'Worker-Lease abgelaufen, maximale Anzahl Versuche erreicht',
+                    'updatedAt': now
+                },
+                '$unset': {'leaseExpiresAt': ''}
+            }
+        )
+        return result.modified_count
+
+    def depth(self) -> int:
+        """Anzahl wartender Jobs"""
+        return self.collection.count_documents({'status': 'queued'})
+
+
+class JobQueueRunner:
+    """
+    Verarbeitet Jobs aus der Queue mit einer festen Anzahl paralleler Slots
+
+    Jeder Slot ist ein Thread, der Jobs claimt und während der Verarbeitung
+    per Heartbeat die Lease verlängert. Mehrere Prozesse/Container können
+    dieselbe Queue gleichzeitig abarbeiten. Ein eigener Thread markiert alle
+    `reap_interval` Sekunden hängengebliebene Jobs ohne verbleibende
+    Versuche als fehlgeschlagen (Default: Lease-Dauer).
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        process_job: Callable[[str, Optional[JobLease]], None],
+        slots: int = 2,
+        poll_interval: float = 5,
+        reap_interval: Optional[float] = None
+    ):
+        self.queue = queue
+        self.process_job = process_job
+        self.slots = max(1, slots)
+        self.poll_interval = poll_interval
+        self.reap_interval = reap_interval or queue.lease_seconds
+        self.active_jobs: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads = [
+            threading.Thread(target=self._run_slot, name=f"job-slot-{i}", daemon=True)
+            for i in range(self.slots)
+        ]
+        self._threads.append(threading.Thread(target=self._reap, name='job-reaper', daemon=True))
+
+    def start(self):
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"📥 Job-Queue gestartet: {self.slots} Slots, Worker {self.queue.worker_id}")
+
+    def stop(self, timeout: float = 5):
+        """Beendet die Slots (laufende Jobs werden über die Lease übernommen)"""
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def wake(self):
+        """Weckt wartende Slots, z.B. nachdem ein Job eingereiht wurde"""
+        self._wake.set()
+
+    def _reap(self):
+        while True:
+            try:
+                failed = self.queue.fail_exhausted()
+                if failed:
+                    logger.warning(f"⚠️ {failed} hängengebliebene Job(s) als fehlgeschlagen markiert")
+            except Exception as e:
+                logger.error(f"❌ Fehler beim Aufräumen hängengebliebener Jobs: {e}")
+            if self._stop.wait(self.reap_interval):
+                return
+
+    def _run_slot(self):
+        while not self._stop.is_set():
+            try:
+                job = self.queue.claim()
+            except Exception as e:
+                logger.error(f"❌ Fehler beim Abholen eines Jobs: {e}")
+                job = None
+
+            if job is None:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                continue
+
+            self._run_job(self.queue.lease_of(job))
+
+    def _run_job(self, lease: JobLease):
+        job_key = str(lease.job_id)
+        with self._lock:
+            self.active_jobs[job_key] = time.time()
+
+        heartbeat_stop = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(lease, heartbeat_stop), daemon=True)
+        heartbeat.start()
+
+        try:
+            self.process_job(job_key, lease)
+        except Exception as e:
+            logger.error(f"❌ Job {job_key} fehlgeschlagen: {e}")
+        finally:
+            heartbeat_stop.set()
+            heartbeat.join()
+            try:
+                self.queue.release(lease)
+            except Exception as e:
+                logger.warning(f"⚠️ Lease für Job {job_key} konnte nicht freigegeben werden: {e}")
+            with self._lock:
+                self.active_jobs.pop(job_key, None)
+
+    def _heartbeat(self, lease: JobLease, stop: threading.Event):
+        while not stop.wait(self.queue.lease_seconds / 3):
+            try:
+                if not self.queue.renew(lease):
+                    # Job gehört inzwischen einem anderen Worker -> lokal abbrechen
+                    logger.warning(f"⚠️ Lease für Job {lease.job_id} verloren, breche Verarbeitung ab")
+                    lease.revoked.set()
+                    return
+            except Exception as e:
+                logger.warning(f"⚠️ Heartbeat für Job {lease.job_id} fehlgeschlagen: {e}")
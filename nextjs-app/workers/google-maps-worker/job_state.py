@@ -0,0 +1,367 @@
+"""
+Persistenz des Job-Zustands während der Verarbeitung
+Schreibt Ergebnisse, Fortschritt und Checkpoints gebündelt in das
+Job-Dokument und beobachtet Abbrüche im Hintergrund
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from bson import ObjectId
+from pymongo.collection import Collection
+import logging
+from metrics import PHASE_MONGO_WRITE, PHASE_SECONDS
+from job_events import EVENT_PROGRESS, EVENT_RESULT, JobEventChannel
+
+logger = logging.getLogger(__name__)
+
+
+class ResultWriter:
+    """
+    Hängt Ergebnisse gebündelt per $push an `results` des Job-Dokuments an
+
+    Geschrieben wird, sobald `batch_size` Ergebnisse gepuffert sind oder
+    `flush_interval` Sekunden seit dem letzten Schreiben vergangen sind.
+    Teilergebnisse sind damit sofort sichtbar und der Speicherbedarf bleibt
+    unabhängig von der Job-Größe. Live-Clients (`events`) erhalten jedes
+    Ergebnis sofort. Mit `owner` (siehe JobLease) wird nur geschrieben,
+    solange der Worker die Lease des Jobs hält.
+    """
+
+    def __init__(
+        self,
+        collection: Collection,
+        job_id: str,
+        batch_size: int = 10,
+        flush_interval: float = 2.0,
+        events: Optional[JobEventChannel] = None,
+        count: int = 0,
+        owner: Optional[Dict] = None
+    ):
+        self.collection = collection
+        self.events = events
+        self.job_id = ObjectId(job_id)
+        self._filter = {'_id': self.job_id, **(owner or {})}
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        # Bereits gespeicherte Ergebnisse (beim Fortsetzen eines Jobs)
+        self.count = count
+        self._buffer: List[Dict] = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._flush_periodically, daemon=True)
+
+    def __enter__(self) -> 'ResultWriter':
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def add(self, result: Dict):
+        """Puffert ein Ergebnis und schreibt bei voller Batch"""
+        with self._lock:
+            self._buffer.append(result)
+            self.count += 1
+            full = len(self._buffer) >= self.batch_size
+            # Im Lock: Live-Clients erhalten die Ergebnisse in der Reihenfolge
+            # von `results` (Ereignis-IDs tragen die Position)
+            if self.events:
+                self.events.publish(EVENT_RESULT, result)
+
+        if full:
+            # Fehler nicht in die Place-Verarbeitung tragen: die Ergebnisse
+            # bleiben gepuffert und werden beim nächsten Schreiben mitgenommen
+            try:
+                self.flush(wait=False)
+            except Exception as e:
+                logger.error(f"❌ Fehler beim Speichern von Zwischenergebnissen: {e}")
+
+    def flush(self, wait: bool = True):
+        """
+        Schreibt alle gepufferten Ergebnisse
+
+        Der Puffer wird unter dem Lock gegen eine leere Liste getauscht und
+        außerhalb davon geschrieben, add() wartet also nicht auf MongoDB.
+        Schreibvorgänge laufen nacheinander (Reihenfolge, resultCount); mit
+        `wait=False` wird übersprungen, wenn bereits geschrieben wird. Schlägt
+        das Schreiben fehl, kommen die Ergebnisse zurück in den Puffer und
+        der Fehler wird weitergegeben.
+        """
+        if not self._write_lock.acquire(blocking=wait):
+            return
+        try:
+            while True:
+                with self._lock:
+                    if not self._buffer:
+                        return
+                    batch, self._buffer = self._buffer, []
+                    count = self.count
+
+                try:
+                    with PHASE_SECONDS.labels(PHASE_MONGO_WRITE).time():
+                        self.collection.update_one(
+                            self._filter,
+                            {
+                                '$push': {'results': {'$each': batch}},
+                                '$set': {'resultCount': count, 'updatedAt': time.time()}
+                            }
+                        )
+                except Exception:
+                    with self._lock:
+                        self._buffer[:0] = batch
+                    raise
+        finally:
+            self._write_lock.release()
+
+    def close(self):
+        """Beendet das periodische Schreiben und schreibt den Rest"""
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self.flush()
+
+    def _flush_periodically(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"❌ Fehler beim Speichern von Zwischenergebnissen: {e}")
+
+
+class JobCheckpoint:
+    """
+    Checkpoint eines Jobs unter `checkpoint` im Job-Dokument
+
+    Enthält die Suchergebnisse (place_id + Index der Suchanfrage, bei
+    Suchen mit allen Detail-Feldern auch deren Daten), den
+    Fortsetzungspunkt jeder Suchanfrage (`queries`: nextPageToken bzw.
+    offene Kacheln, Trefferzahlen), ob die Suche abgeschlossen ist, und die
+    Places, die nicht angereichert werden konnten. Erledigte Places ergeben
+    sich aus `results`. Ein neu gestarteter oder übernommener Job setzt
+    damit ohne erneute API-Aufrufe fort.
+    """
+
+    def __init__(self, collection: Collection, job_id: str, state: Optional[Dict] = None, owner: Optional[Dict] = None):
+        self.collection = collection
+        self.job_id = ObjectId(job_id)
+        self._filter = {'_id': self.job_id, **(owner or {})}
+        state = state or {}
+        self.places: List[Dict] = list(state.get('places') or [])
+        # Fortsetzungspunkte pro Suchanfrage (Schlüssel in MongoDB als String)
+        self.queries: Dict[int, Dict] = {
+            int(index): cursor for index, cursor in (state.get('queries') or {}).items()
+        }
+        self.search_complete = bool(state.get('searchComplete'))
+        self.failed = set(state.get('failed') or [])
+        self._known_ids = {entry['id'] for entry in self.places}
+
+    @staticmethod
+    def initial_state() -> Dict:
+        return {'places': [], 'queries': {}, 'failed': [], 'searchComplete': False}
+
+    def add_places(
+        self,
+        query_index: int,
+        places: List[Dict],
+        fields: Tuple[str, ...] = (),
+        cursor: Optional[Dict] = None
+    ):
+        """
+        Speichert neue Suchergebnisse einer Ergebnisseite
+
+        Places und Fortsetzungspunkt werden in einem Update geschrieben, damit
+        ein fortgesetzter Job keine Places zwischen zwei Seiten verliert.
+
+        Args:
+            fields: Felder der Places, die mitgespeichert werden (unter
+                `place`); beim Fortsetzen entfällt damit der Details-Abruf
+            cursor: Fortsetzungspunkt der Suchanfrage nach diesen Places
+        """
+        entries = []
+        for place in places:
+            if not place.get('id') or place['id'] in self._known_ids:
+                continue
+            entry = {'id': place['id'], 'q': query_index}
+            if fields:
+                entry['place'] = {field: place[field] for field in fields if field in place}
+            entries.append(entry)
+
+        update = {}
+        if entries:
+            update['$push'] = {'checkpoint.places': {'$each': entries}}
+        if cursor is not None:
+            update['$set'] = {f'checkpoint.queries.{query_index}': cursor}
+        if not update:
+            return
+
+        self.collection.update_one(self._filter, update)
+        self.places.extend(entries)
+        self._known_ids.update(entry['id'] for entry in entries)
+        if cursor is not None:
+            self.queries[query_index] = cursor
+
+    def complete_search(self, query_stats: List[Dict]):
+        """Markiert die Suche als abgeschlossen"""
+        self.collection.update_one(
+            self._filter,
+            {'$set': {'checkpoint.searchComplete': True, 'queryStats': query_stats}}
+        )
+        self.search_complete = True
+
+    def mark_failed(self, place_id: str):
+        """Merkt einen Place, der nicht angereichert werden konnte"""
+        self.collection.update_one(
+            self._filter,
+            {'$addToSet': {'checkpoint.failed': place_id}}
+        )
+        self.failed.add(place_id)
+
+
+class ProgressReporter:
+    """
+    Fasst Fortschritts-Updates zusammen
+
+    Ein Phasenwechsel wird sofort geschrieben, ansonsten höchstens alle
+    `min_interval` Sekunden. Der letzte Stand wird beim Schließen geschrieben.
+    Jeder geschriebene Stand geht auch an Live-Clients (`events`).
+    """
+
+    def __init__(
+        self,
+        collection: Collection,
+        job_id: str,
+        min_interval: float = 1.0,
+        events: Optional[JobEventChannel] = None,
+        owner: Optional[Dict] = None
+    ):
+        self.collection = collection
+        self.events = events
+        self.job_id = ObjectId(job_id)
+        self._filter = {'_id': self.job_id, **(owner or {})}
+        self.min_interval = min_interval
+        self._pending: Optional[Dict] = None
+        self._written_phase: Optional[str] = None
+        self._last_write = 0.0
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> 'ProgressReporter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+
+    def report(self, current: int, total: int, phase: str):
+        """Merkt einen Fortschritt vor und schreibt ihn, falls fällig"""
+        with self._lock:
+            self._pending = {'current': current, 'total': total, 'phase': phase}
+            due = (
+                phase != self._written_phase
+                or time.monotonic() - self._last_write >= self.min_interval
+            )
+
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Schreibt den zuletzt gemeldeten Fortschritt"""
+        with self._lock:
+            if self._pending is None:
+                return
+
+            with PHASE_SECONDS.labels(PHASE_MONGO_WRITE).time():
+                self.collection.update_one(
+                    self._filter,
+                    {'$set': {'progress': self._pending, 'updatedAt': time.time()}}
+                )
+            self._written_phase = self._pending['phase']
+            if self.events:
+                self.events.publish(EVENT_PROGRESS, self._pending)
+            self._pending = None
+            self._last_write = time.monotonic()
+
+
+class CancellationWatcher:
+    """
+    Beobachtet im Hintergrund, ob ein Job abgebrochen wurde
+
+    Nutzt einen MongoDB Change Stream; ist dieser nicht verfügbar (z.B.
+    Standalone-Server ohne Replica Set), wird alle `poll_interval` Sekunden
+    der Status abgefragt. Der Verarbeitungs-Loop liest nur das Flag.
+
+    `lease_revoked` (JobLease.revoked) wird vom Heartbeat gesetzt, wenn der
+    Job einem anderen Worker gehört; der Job gilt dann ebenfalls als
+    abgebrochen.
+    """
+
+    def __init__(
+        self,
+        collection: Collection,
+        job_id: str,
+        poll_interval: float = 2.0,
+        lease_revoked: Optional[threading.Event] = None
+    ):
+        self.collection = collection
+        self.job_id = ObjectId(job_id)
+        self.poll_interval = poll_interval
+        self._cancelled = threading.Event()
+        self._lease_revoked = lease_revoked or threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._watch, daemon=True)
+
+    def __enter__(self) -> 'CancellationWatcher':
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set() or self._lease_revoked.is_set()
+
+    @property
+    def lease_lost(self) -> bool:
+        return self._lease_revoked.is_set()
+
+    def _check_status(self):
+        job = self.collection.find_one({'_id': self.job_id}, {'status': 1})
+        if job and job.get('status') == 'cancelled':
+            self._cancelled.set()
+
+    def _watch(self):
+        try:
+            self._watch_change_stream()
+        except Exception as e:
+            logger.info(f"ℹ️ Change Stream nicht verfügbar, nutze Polling: {e}")
+            self._poll()
+
+    def _watch_change_stream(self):
+        # Nur Änderungen des Status auf 'cancelled' liefern lassen: Ergebnisse,
+        # Fortschritt und Checkpoints erzeugen so keinen Verkehr (kein updateLookup)
+        pipeline = [{'$match': {
+            'documentKey._id': self.job_id,
+            '$or': [
+                {'operationType': 'update', 'updateDescription.updatedFields.status': 'cancelled'},
+                {'operationType': 'replace', 'fullDocument.status': 'cancelled'}
+            ]
+        }}]
+        with self.collection.watch(
+            pipeline,
+            max_await_time_ms=int(self.poll_interval * 1000)
+        ) as stream:
+            # Abbruch vor Start des Streams nicht verpassen
+            self._check_status()
+
+            while not self._stop.is_set() and not self.cancelled:
+                if stream.try_next():
+                    self._cancelled.set()
+
+    def _poll(self):
+        while not self._stop.is_set() and not self.cancelled:
+            try:
+                self._check_status()
+            except Exception as e:
+                logger.warning(f"⚠️ Job-Status konnte nicht geprüft werden: {e}")
+            self._stop.wait(self.poll_interval)
@@ -0,0 +1,95 @@
+"""
+Jobübergreifendes Register bereits angereicherter Places
+Schlüssel ist die Google place_id (= externalId der Import-Ergebnisse)
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+from pymongo import ASCENDING
+from pymongo.collection import Collection
+from pymongo.errors import DuplicateKeyError, PyMongoError
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class KnownPlacesRegistry:
+    """
+    Merkt sich für jeden Place das zuletzt erzeugte Ergebnis und den Zeitpunkt
+    der Anreicherung
+
+    Nach der Suche wird pro Ergebnisseite mit einer einzigen `$in`-Abfrage
+    geprüft, welche Places innerhalb von `max_age_seconds` bereits angereichert
+    wurden; für diese entfallen Details-Abruf und Website-Analyse.
+    Fehler der Datenbank werden als "unbekannt" behandelt.
+    """
+
+    def __init__(self, collection: Collection, max_age_seconds: int):
+        self.collection = collection
+        self.max_age_seconds = max_age_seconds
+        self._ensure_indexes()
+
+    def _ensure_indexes(self):
+        try:
+            self.collection.create_index([('lastEnrichedAt', ASCENDING)])
+        except PyMongoError as e:
+            logger.warning(f"⚠️ Index für Place-Register konnte nicht angelegt werden: {e}")
+
+    def lookup(self, place_ids: List[str], require_website: bool) -> Dict[str, Dict]:
+        """
+        Sucht kürzlich angereicherte Places
+
+        Args:
+            place_ids: IDs einer Suchergebnisseite
+            require_website: Nur Einträge mit Website-Analyse berücksichtigen
+
+        Returns:
+            Dict place_id -> gespeichertes Ergebnis
+        """
+        ids = [place_id for place_id in place_ids if place_id]
+        if not ids or self.max_age_seconds <= 0:
+            return {}
+
+        query = {
+            '_id': {'$in': ids},
+            'lastEnrichedAt': {'$gte': datetime.now(timezone.utc) - timedelta(seconds=self.max_age_seconds)}
+        }
+        if require_website:
+            query['websiteAnalyzed'] = True
+
+        try:
+            return {doc['_id']: doc['result'] for doc in self.collection.find(query, {'result': 1})}
+        except PyMongoError as e:
+            logger.warning(f"⚠️ Place-Register nicht lesbar: {e}")
+            return {}
+
+    def remember(self, result: Dict, website_analyzed: bool, job_id: str):
+        """
+        Speichert das Ergebnis eines frisch angereicherten Places
+
+        Ein Ergebnis ohne Website-Analyse ersetzt keinen noch gültigen
+        Eintrag mit Website-Analyse (`websiteAnalyzed` wird nicht von True
+        auf False gesetzt), sonst würde ein späterer Job mit Website-Analyse
+        die Website erneut analysieren.
+        """
+        query = {'_id': result['externalId']}
+        if not website_analyzed:
+            cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.max_age_seconds)
+            query['$or'] = [{'websiteAnalyzed': {'$ne': True}}, {'lastEnrichedAt': {'$lt': cutoff}}]
+
+        try:
+            self.collection.update_one(
+                query,
+                {'$set': {
+                    'result': result,
+                    'websiteAnalyzed': website_analyzed,
+                    'lastEnrichedAt': datetime.now(timezone.utc),
+                    'lastJobId': job_id
+                }},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            # Eintrag mit Website-Analyse vorhanden (Filter greift nicht, Upsert kollidiert)
+            pass
+        except PyMongoError as e:
+            logger.warning(f"⚠️ Place-Register nicht beschreibbar: {e}")
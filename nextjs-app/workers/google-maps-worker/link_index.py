@@ -0,0 +1,147 @@
+"""
+Link-Index der Startseite
+Klassifiziert alle Links in einem Durchlauf gegen alle Stichwort-Gruppen
+und wählt pro Gruppe den besten Kandidaten
+"""
+
+import re
+from typing import Dict, Iterable, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+from bs4 import BeautifulSoup
+from website_cache import normalize_domain
+
+# Stichwort-Gruppen (Schlüssel = Seitentyp)
+LINK_KEYWORDS = {
+    'impressum': ('impressum', 'imprint', 'legal', 'rechtliches'),
+    'kontakt': ('kontakt', 'contact', 'ansprechpartner'),
+}
+
+# Bewertung eines Kandidaten
+SCORE_EXACT_PATH = 8       # Letztes Pfadsegment == Stichwort (/impressum, /kontakt.html)
+SCORE_PATH_PREFIX = 5      # Pfadsegment beginnt mit Stichwort (/kontakt-anfahrt)
+SCORE_HREF = 3             # Stichwort irgendwo im Link
+SCORE_EXACT_TEXT = 4       # Linktext == Stichwort
+SCORE_TEXT = 2             # Stichwort im Linktext
+SCORE_FOOTER = 3           # Link steht im Footer
+PENALTY_EXTERNAL = 6       # Link auf einen anderen Host
+
+SKIPPED_SCHEMES = ('mailto:', 'tel:', 'javascript:', '#')
+PAGE_EXTENSION = re.compile(r'\.(html?|php|aspx?|jsp)$')
+
+
+def _in_footer(link) -> bool:
+    """Steht der Link in <footer> oder einem Element mit 'footer' in id/class?"""
+    for parent in link.parents:
+        if parent.name == 'footer':
+            return True
+        if 'footer' in (parent.get('id') or '').lower():
+            return True
+        if any('footer' in cls.lower() for cls in parent.get('class') or ()):
+            return True
+    return False
+
+
+def _last_segment(path: str) -> str:
+    """Letztes Pfadsegment ohne Dateiendung (/impressum.html -> impressum)"""
+    segments = [s for s in path.lower().split('/') if s]
+    return PAGE_EXTENSION.sub('', segments[-1]) if segments else ''
+
+
+def _segment_score(keyword: str, segment: str) -> int:
+    if segment == keyword:
+        return SCORE_EXACT_PATH
+    if segment.startswith(keyword):
+        return SCORE_PATH_PREFIX
+    return 0
+
+
+def _score(keyword: str, segment: str, href: str, text: str) -> int:
+    score = _segment_score(keyword, segment)
+    if not score and keyword in href:
+        score += SCORE_HREF
+
+    if text == keyword:
+        score += SCORE_EXACT_TEXT
+    elif keyword in text:
+        score += SCORE_TEXT
+    return score
+
+
+def index_links(soup: BeautifulSoup, base_url: str) -> Dict[str, Optional[str]]:
+    """
+    Findet für jede Stichwort-Gruppe den am besten passenden Link
+
+    Arbeitet auf dem bereits geparsten Dokument: jeder Link wird genau
+    einmal betrachtet (Linktext einmal berechnet) und gegen alle Gruppen
+    bewertet. Exakte Pfadtreffer und Links im Footer
+    werden bevorzugt, Links auf fremde Hosts abgewertet; bei Gleichstand
+    gewinnt der erste Link im Dokument.
+
+    Returns:
+        Dict Seitentyp -> absolute URL oder None
+    """
+    # Startwert 0: nur Links mit positiver Bewertung (nach Abwertung) zählen
+    best: Dict[str, Tuple[int, Optional[str]]] = {kind: (0, None) for kind in LINK_KEYWORDS}
+    base_host = urlparse(base_url).hostname
+
+    for link in soup.find_all('a', href=True):
+        raw_href = link['href'].strip()
+        href = raw_href.lower()
+        if not href or href.startswith(SKIPPED_SCHEMES):
+            continue
+
+        text = ' '.join(link.get_text(' ').split()).lower()
+        url = urljoin(base_url, raw_href)
+        parsed = urlparse(url)
+        segment = _last_segment(parsed.path)
+
+        scores = {
+            kind: max(_score(keyword, segment, href, text) for keyword in keywords)
+            for kind, keywords in LINK_KEYWORDS.items()
+        }
+        if not any(scores.values()):
+            continue
+
+        # Position nur für Kandidaten bestimmen
+        bonus = SCORE_FOOTER if _in_footer(link) else 0
+        if base_host and parsed.hostname and parsed.hostname != base_host:
+            bonus -= PENALTY_EXTERNAL
+
+        for kind, score in scores.items():
+            if score and score + bonus > best[kind][0]:
+                best[kind] = (score + bonus, url)
+
+    return {kind: url for kind, (_, url) in best.items()}
+
+
+def index_urls(urls: Iterable[str], base_url: str) -> Dict[str, Optional[str]]:
+    """
+    Wählt pro Seitentyp die beste URL aus einer Liste ohne Linktexte
+    (z.B. aus der Sitemap)
+
+    Zählt nur Treffer im letzten Pfadsegment; URLs anderer Hosts werden
+    ignoriert, bei Gleichstand gewinnt der kürzere Pfad.
+
+    Returns:
+        Dict Seitentyp -> absolute URL oder None
+    """
+    best: Dict[str, Tuple[Tuple[int, int], Optional[str]]] = {kind: ((0, 0), None) for kind in LINK_KEYWORDS}
+    base_domain = normalize_domain(base_url)
+
+    for url in urls:
+        if base_domain and normalize_domain(url) != base_domain:
+            continue
+
+        parsed = urlparse(url)
+
+        segment = _last_segment(parsed.path)
+        if not segment:
+            continue
+
+        for kind, keywords in LINK_KEYWORDS.items():
+            score = max(_segment_score(keyword, segment) for keyword in keywords)
+            rank = (score, -len(parsed.path))
+            if score and (best[kind][1] is None or rank > best[kind][0]):
+                best[kind] = (rank, url)
+
+    return {kind: url for kind, (_, url) in best.items()}
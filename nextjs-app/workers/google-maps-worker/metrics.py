@@ -0,0 +1,77 @@
+"""
+Prometheus-Metriken des Workers
+Prozessweite Histogramme, Zähler und Gauges; ausgeliefert über /metrics der API
+"""
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# Einzelne Verarbeitungsschritte
+PHASE_SEARCH = 'search'                  # Eine Seite der Text Search
+PHASE_DETAILS = 'details'                # Place-Details-Abruf bei der API
+PHASE_WEBSITE_FETCH = 'website_fetch'    # Abruf einer Webseite
+PHASE_WEBSITE_PROBE = 'website_probe'    # HEAD-Prüfung eines Impressum-/Kontakt-Pfads
+PHASE_CRAWL_WAIT = 'crawl_wait'          # Wartezeit auf einen Host-Slot (Höflichkeit)
+PHASE_PARSE = 'parse'                    # Parsing/Extraktion einer Webseite
+PHASE_MONGO_WRITE = 'mongo_write'        # Schreibvorgang ins Job-Dokument
+
+# Sekundenbereich einzelner Anfragen (ms bis Website-Budget)
+STEP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 15, 30)
+# Job-Phasen dauern Sekunden bis Minuten
+JOB_PHASE_BUCKETS = (0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+PHASE_SECONDS = Histogram(
+    'gmaps_worker_phase_seconds',
+    'Dauer einzelner Verarbeitungsschritte',
+    ['phase'],
+    buckets=STEP_BUCKETS
+)
+
+JOB_PHASE_SECONDS = Histogram(
+    'gmaps_worker_job_phase_seconds',
+    'Dauer der Job-Phasen (searching, loading_details, analyzing_websites)',
+    ['phase'],
+    buckets=JOB_PHASE_BUCKETS
+)
+
+HTTP_RESPONSES = Counter(
+    'gmaps_worker_http_responses_total',
+    'HTTP-Antworten nach Ziel (google, website) und Statuscode',
+    ['target', 'status']
+)
+
+CACHE_LOOKUPS = Counter(
+    'gmaps_worker_cache_lookups_total',
+    'Cache-Abfragen nach Cache und Ergebnis',
+    ['cache', 'result']
+)
+
+PLACES_REQUESTS = Counter(
+    'gmaps_worker_places_requests_total',
+    'Anfragen an die Places API (inkl. Wiederholungen)'
+)
+
+PLACES_CONNECTIONS = Counter(
+    'gmaps_worker_places_connections_total',
+    'Neu aufgebaute Verbindungen zur Places API (TCP bzw. TCP+TLS)'
+)
+
+SUBPAGES_FOUND = Counter(
+    'gmaps_worker_subpages_found_total',
+    'Impressum-/Kontakt-Seiten nach Fundquelle (link, sitemap, probe, none)',
+    ['kind', 'source']
+)
+
+ACTIVE_JOBS = Gauge(
+    'gmaps_worker_active_jobs',
+    'Aktuell in diesem Prozess laufende Jobs'
+)
+
+QUEUE_DEPTH = Gauge(
+    'gmaps_worker_queue_depth',
+    'Wartende Jobs in der Queue'
+)
+
+
+def record_http_status(target: str, status) -> None:
+    """Zählt eine HTTP-Antwort (status 'error' bei Verbindungsfehlern)"""
+    HTTP_RESPONSES.labels(target, str(status)).inc()
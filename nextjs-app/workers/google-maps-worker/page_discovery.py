@@ -0,0 +1,142 @@
+"""
+Erkennung von Impressum-/Kontakt-Seiten unabhängig von der Startseite
+Wertet sitemap.xml aus und prüft übliche Pfade per HEAD-Anfrage
+"""
+
+import html
+import re
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urljoin, urlparse
+import logging
+from link_index import LINK_KEYWORDS, index_urls
+from page_fetcher import XML_CONTENT_TYPES, PageFetcher
+from website_cache import normalize_domain
+
+logger = logging.getLogger(__name__)
+
+# Übliche Pfade pro Seitentyp (in dieser Reihenfolge geprüft)
+PROBE_PATHS = {
+    'impressum': ('/impressum', '/impressum.html', '/impressum.php', '/imprint'),
+    'kontakt': ('/kontakt', '/kontakt.html', '/kontakt.php', '/contact'),
+}
+
+SITEMAP_PATH = '/sitemap.xml'
+SITEMAP_MAX_BYTES = 512 * 1024
+# Aus einem Sitemap-Index werden höchstens so viele Teil-Sitemaps gelesen
+# (bevorzugt solche für Seiten, z.B. page-sitemap.xml)
+SITEMAP_MAX_CHILDREN = 2
+
+SITEMAP_LOC = re.compile(r'<loc>\s*([^<\s]+)\s*</loc>', re.I)
+
+SOURCE_SITEMAP = 'sitemap'
+SOURCE_PROBE = 'probe'
+
+# Callback bei einem Fund: (Seitentyp, URL, Quelle)
+FoundCallback = Callable[[str, str, str], None]
+
+
+class SubpageDiscovery:
+    """
+    Sucht Impressum und Kontakt, ohne auf die Startseite zu warten
+
+    1. sitemap.xml (ggf. über einen Sitemap-Index): URLs werden wie Links
+       nach ihrem Pfad bewertet
+    2. Für Seitentypen ohne Sitemap-Treffer: HEAD auf übliche Pfade; der
+       erste Pfad mit HTML-Antwort gewinnt, Weiterleitungen auf die
+       Startseite zählen nicht
+
+    Jeder Fund wird sofort über `on_found` gemeldet, damit der Abruf der
+    Seite beginnen kann, während die Suche weiterläuft.
+    """
+
+    def __init__(self, fetcher: PageFetcher, use_sitemap: bool = True):
+        self.fetcher = fetcher
+        self.use_sitemap = use_sitemap
+
+    def discover(
+        self,
+        base_url: str,
+        deadline: Optional[float],
+        on_found: FoundCallback,
+        stop: Optional[threading.Event] = None
+    ) -> Dict[str, Optional[str]]:
+        """
+        Args:
+            base_url: URL der Startseite
+            deadline: Ende des Website-Budgets (time.monotonic())
+            on_found: Wird für jeden gefundenen Seitentyp einmal aufgerufen
+            stop: Gesetzt, sobald die Suche nicht mehr benötigt wird
+
+        Returns:
+            Dict Seitentyp -> URL oder None
+        """
+        found: Dict[str, Optional[str]] = {kind: None for kind in LINK_KEYWORDS}
+
+        def done() -> bool:
+            return (stop is not None and stop.is_set()) or (
+                deadline is not None and time.monotonic() >= deadline
+            )
+
+        if self.use_sitemap and not done():
+            for kind, url in index_urls(self._sitemap_urls(base_url, deadline), base_url).items():
+                if url:
+                    found[kind] = url
+                    on_found(kind, url, SOURCE_SITEMAP)
+
+        for kind, paths in PROBE_PATHS.items():
+            if found.get(kind):
+                continue
+            for path in paths:
+                if done():
+                    return found
+                url = self._probe(urljoin(base_url, path), base_url, deadline)
+                if url:
+                    found[kind] = url
+                    on_found(kind, url, SOURCE_PROBE)
+                    break
+
+        return found
+
+    def _probe(self, url: str, base_url: str, deadline: Optional[float]) -> Optional[str]:
+        final_url = self.fetcher.probe(url, deadline)
+        if not final_url:
+            return None
+
+        # Weiterleitung auf die Startseite (oder fremde Domain) = nicht vorhanden
+        if urlparse(final_url).path.strip('/') == '' or normalize_domain(final_url) != normalize_domain(base_url):
+            return None
+        return final_url
+
+    def _sitemap_urls(self, base_url: str, deadline: Optional[float]) -> List[str]:
+        """URLs aus sitemap.xml (ein Sitemap-Index wird eine Ebene aufgelöst)"""
+        urls = self._read_sitemap(urljoin(base_url, SITEMAP_PATH), deadline)
+        if urls is None:
+            return []
+
+        locs, is_index = urls
+        if not is_index:
+            return locs
+
+        # Teil-Sitemaps für Seiten zuerst (Beiträge/Produkte enthalten kein Impressum)
+        children = sorted(locs, key=lambda loc: 'page' not in loc.lower())[:SITEMAP_MAX_CHILDREN]
+        pages = []
+        for child in children:
+            child_urls = self._read_sitemap(child, deadline)
+            if child_urls and not child_urls[1]:
+                pages.extend(child_urls[0])
+        return pages
+
+    def _read_sitemap(self, url: str, deadline: Optional[float]):
+        page = self.fetcher.fetch(
+            url,
+            deadline=deadline,
+            content_types=XML_CONTENT_TYPES,
+            max_bytes=SITEMAP_MAX_BYTES
+        )
+        if page is None or not page.text:
+            return None
+
+        locs = [html.unescape(loc) for loc in SITEMAP_LOC.findall(page.text)]
+        return locs, '<sitemapindex' in page.text[:2048].lower()
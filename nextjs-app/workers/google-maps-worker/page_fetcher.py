@@ -0,0 +1,259 @@
+"""
+Streaming-Abruf von Webseiten für die Website-Analyse
+Lädt nur HTML, begrenzt die Größe und dekodiert den Inhalt schrittweise
+"""
+
+import re
+import time
+import codecs
+import hashlib
+import requests
+from contextlib import contextmanager
+from typing import Dict, Iterator, NamedTuple, Optional, Tuple
+import logging
+from crawl_scheduler import CrawlScheduler, CrawlSlot
+from rate_limiter import parse_retry_after
+from metrics import PHASE_SECONDS, PHASE_WEBSITE_FETCH, PHASE_WEBSITE_PROBE, record_http_status
+
+logger = logging.getLogger(__name__)
+
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
+XML_CONTENT_TYPES = ('application/xml', 'text/xml')
+
+# Zeichensatz-Angabe im Dokument (<meta charset> bzw. http-equiv)
+META_CHARSET_PATTERN = re.compile(rb'<meta[^>]+charset=["\']?([a-zA-Z0-9_-]+)', re.I)
+
+# Antworten, nach denen der Host eine Pause bekommt
+THROTTLE_STATUS_CODES = (429, 503)
+
+
+class FetchedPage(NamedTuple):
+    """Ergebnis eines Seitenabrufs"""
+    url: str                      # Finale URL (nach Redirects)
+    status_code: int
+    text: str                     # Dekodierter Inhalt (leer bei 304)
+    truncated: bool               # Inhalt wurde bei max_bytes/Zeitbudget abgeschnitten
+    etag: Optional[str]
+    last_modified: Optional[str]
+    content_hash: Optional[str]   # SHA-256 der geladenen Bytes
+
+
+class PageFetcher:
+    """
+    Lädt Seiten per Streaming mit Größenlimit
+
+    Nicht-HTML-Antworten (PDFs, Bilder, ...) werden anhand des Content-Type
+    verworfen, bevor der Body gelesen wird. Der Body wird höchstens bis
+    `max_bytes` bzw. bis zum Ende des Zeitbudgets gelesen und dabei
+    inkrementell dekodiert. Mit CrawlScheduler wartet jede Anfrage auf
+    einen Slot für ihren Host.
+    """
+
+    def __init__(
+        self,
+        session: requests.Session,
+        timeout: float = 10,
+        max_bytes: int = 2 * 1024 * 1024,
+        chunk_size: int = 16 * 1024,
+        scheduler: Optional[CrawlScheduler] = None
+    ):
+        self.session = session
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.scheduler = scheduler
+
+    @contextmanager
+    def _polite(self, url: str, deadline: Optional[float], slot: Optional[CrawlSlot] = None) -> Iterator[bool]:
+        """
+        Slot beim CrawlScheduler; False, wenn das Zeitbudget vorher abläuft
+
+        Ein bereits vergebener Slot (CrawlScheduler.submit) wird übernommen
+        und nach dem Abruf freigegeben.
+        """
+        if slot is None and self.scheduler:
+            slot = self.scheduler.acquire(url, deadline)
+        try:
+            yield self.scheduler is None or slot is not None
+        finally:
+            if slot is not None:
+                self.scheduler.release(slot)
+
+    def _throttled(self, url: str, response: requests.Response):
+        if self.scheduler and response.status_code in THROTTLE_STATUS_CODES:
+            self.scheduler.penalize(url, parse_retry_after(response.headers.get('Retry-After')))
+
+    def fetch(
+        self,
+        url: str,
+        headers: Optional[Dict] = None,
+        deadline: Optional[float] = None,
+        content_types: Tuple[str, ...] = HTML_CONTENT_TYPES,
+        max_bytes: Optional[int] = None,
+        slot: Optional[CrawlSlot] = None
+    ) -> Optional[FetchedPage]:
+        """
+        Lädt eine Seite
+
+        Args:
+            content_types: Erlaubte Content-Types (Default: HTML)
+            max_bytes: Abweichendes Größenlimit (z.B. für sitemap.xml)
+            slot: Bereits vergebener Slot des CrawlSchedulers
+
+        Returns:
+            FetchedPage oder None bei Fehlern, fehlendem Zeitbudget oder
+            nicht erlaubtem Content-Type (304 gilt als Erfolg)
+        """
+        with self._polite(url, deadline, slot) as granted:
+            if not granted:
+                logger.warning(f"Kein Zeitbudget mehr für: {url}")
+                return None
+            return self._fetch(url, headers, deadline, content_types, max_bytes)
+
+    def _fetch(
+        self,
+        url: str,
+        headers: Optional[Dict],
+        deadline: Optional[float],
+        content_types: Tuple[str, ...],
+        max_bytes: Optional[int]
+    ) -> Optional[FetchedPage]:
+        timeout = self.timeout
+        if deadline is not None:
+            timeout = min(timeout, deadline - time.monotonic())
+            if timeout <= 0:
+                logger.warning(f"Kein Zeitbudget mehr für: {url}")
+                return None
+
+        start = time.monotonic()
+        try:
+            with self.session.get(url, headers=headers, timeout=timeout, allow_redirects=True, stream=True) as response:
+                record_http_status('website', response.status_code)
+                self._throttled(url, response)
+                response.raise_for_status()
+
+                etag = response.headers.get('ETag')
+                last_modified = response.headers.get('Last-Modified')
+
+                if response.status_code == 304:
+                    return FetchedPage(response.url, 304, '', False, etag, last_modified, None)
+
+                content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+                if content_type and content_type not in content_types:
+                    logger.info(f"Überspringe {url}: falscher Inhalt ({content_type})")
+                    return None
+
+                text, truncated, content_hash = self._read_body(response, deadline, max_bytes or self.max_bytes)
+                if truncated:
+                    logger.info(f"✂️ Seite abgeschnitten: {url}")
+
+                return FetchedPage(response.url, response.status_code, text, truncated, etag, last_modified, content_hash)
+
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            record_http_status('website', 'error')
+            logger.warning(f"Konnte Seite nicht laden: {url} - {e}")
+            return None
+        except requests.exceptions.HTTPError as e:
+            # z.B. 404 für eine nicht vorhandene sitemap.xml
+            logger.info(f"Seite nicht verfügbar: {url} ({e.response.status_code})")
+            return None
+        except Exception as e:
+            logger.warning(f"Konnte Seite nicht laden: {url} - {e}")
+            return None
+        finally:
+            PHASE_SECONDS.labels(PHASE_WEBSITE_FETCH).observe(time.monotonic() - start)
+
+    def probe(self, url: str, deadline: Optional[float] = None) -> Optional[str]:
+        """
+        Prüft per HEAD, ob unter der URL eine HTML-Seite existiert
+
+        Returns:
+            Finale URL (nach Redirects) oder None
+        """
+        with self._polite(url, deadline) as granted:
+            return self._probe(url, deadline) if granted else None
+
+    def _probe(self, url: str, deadline: Optional[float]) -> Optional[str]:
+        timeout = self.timeout
+        if deadline is not None:
+            timeout = min(timeout, deadline - time.monotonic())
+            if timeout <= 0:
+                return None
+
+        start = time.monotonic()
+        try:
+            response = self.session.head(url, timeout=timeout, allow_redirects=True)
+        except requests.exceptions.RequestException as e:
+            record_http_status('website', 'error')
+            logger.debug(f"HEAD fehlgeschlagen: {url} - {e}")
+            return None
+        finally:
+            PHASE_SECONDS.labels(PHASE_WEBSITE_PROBE).observe(time.monotonic() - start)
+
+        record_http_status('website', response.status_code)
+        self._throttled(url, response)
+        if response.status_code != 200:
+            return None
+
+        content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type and content_type not in HTML_CONTENT_TYPES:
+            return None
+        return response.url
+
+    def _read_body(self, response: requests.Response, deadline: Optional[float], max_bytes: int):
+        """Liest den Body bis max_bytes und dekodiert ihn schrittweise"""
+        hasher = hashlib.sha256()
+        parts = []
+        decoder = None
+        received = 0
+        truncated = False
+
+        for chunk in response.iter_content(chunk_size=self.chunk_size):
+            if not chunk:
+                continue
+
+            if received + len(chunk) > max_bytes:
+                chunk = chunk[:max_bytes - received]
+                truncated = True
+
+            if decoder is None:
+                encoding = self._detect_encoding(response, chunk)
+                decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+
+            received += len(chunk)
+            hasher.update(chunk)
+            parts.append(decoder.decode(chunk))
+
+            if not truncated and deadline is not None and time.monotonic() >= deadline:
+                truncated = True
+            if truncated:
+                break
+
+        if decoder is not None:
+            # Bei Abbruch ein unvollständiges Multibyte-Zeichen verwerfen
+            parts.append(decoder.decode(b'', final=not truncated))
+
+        return ''.join(parts), truncated, hasher.hexdigest() if received else None
+
+    @staticmethod
+    def _detect_encoding(response: requests.Response, first_chunk: bytes) -> str:
+        """Zeichensatz aus Header, <meta charset> oder UTF-8 als Fallback"""
+        candidates = []
+
+        # Nur einen explizit angegebenen Header-Zeichensatz verwenden
+        # (requests setzt sonst ISO-8859-1 als Default für text/*)
+        if 'charset' in response.headers.get('Content-Type', '').lower():
+            candidates.append(response.encoding)
+
+        match = META_CHARSET_PATTERN.search(first_chunk)
+        if match:
+            candidates.append(match.group(1).decode('ascii'))
+
+        for encoding in candidates:
+            try:
+                codecs.lookup(encoding)
+                return encoding
+            except (LookupError, TypeError):
+                continue
+
+        return 'utf-8'
@@ -0,0 +1,160 @@
+"""
+Parse-/Extraktions-Stufe der Website-Analyse
+Läuft getrennt vom Netzwerk-I/O in einem Prozess-Pool, damit HTML-Parsing und
+Regex-Arbeit nicht am GIL der Download-Threads hängen
+"""
+
+import re
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Union
+from bs4 import BeautifulSoup
+import logging
+from contact_extractor import extract_contacts, extract_emails, extract_phones, linearize
+from link_index import index_links
+from metrics import PHASE_PARSE, PHASE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Seitentypen
+PAGE_HOME = 'home'
+PAGE_CONTACT = 'contact'
+
+DESCRIPTION_CLASS_PATTERN = re.compile('about|description|intro|hero', re.I)
+SERVICE_CLASS_PATTERN = re.compile('leistung|service|angebot|produkt', re.I)
+
+
+def parse_page(content: Union[bytes, str], url: str, kind: str) -> Dict:
+    """
+    Parst eine Seite und extrahiert alle Daten, die die Analyse benötigt
+
+    Wird im Prozess-Pool ausgeführt; Ein- und Ausgabe sind daher einfache,
+    picklebare Typen.
+
+    Args:
+        content: Rohdaten der Seite
+        url: URL der Seite (Basis für relative Links)
+        kind: PAGE_HOME (Startseite) oder PAGE_CONTACT (Impressum/Kontakt)
+
+    Returns:
+        Dict mit emails, phones und je nach Seitentyp beschreibung,
+        dienstleistungen, impressumUrl, kontaktUrl bzw. ansprechpartner
+    """
+    soup = BeautifulSoup(content, 'lxml')
+    page_text = linearize(soup)
+
+    data = {
+        'emails': extract_emails(page_text.text),
+        'phones': extract_phones(page_text.text)
+    }
+
+    if kind == PAGE_HOME:
+        data['beschreibung'] = extract_description(soup)
+        data['dienstleistungen'] = extract_services(soup)
+        # Alle Links einmal klassifizieren (Impressum und Kontakt zugleich)
+        links = index_links(soup, url)
+        data['impressumUrl'] = links['impressum']
+        data['kontaktUrl'] = links['kontakt']
+    else:
+        data['ansprechpartner'] = extract_contacts(page_text.blocks)
+
+    return data
+
+
+def extract_description(soup: BeautifulSoup) -> Optional[str]:
+    """Extrahiert Unternehmensbeschreibung"""
+    # Meta-Description
+    meta_desc = soup.find('meta', attrs={'name': 'description'})
+    if meta_desc and meta_desc.get('content'):
+        return meta_desc['content'].strip()[:300]
+
+    # Erster großer Textblock
+    for tag in soup.find_all(['p', 'div'], class_=DESCRIPTION_CLASS_PATTERN):
+        text = tag.get_text(strip=True)
+        if len(text) > 100:
+            return text[:300]
+
+    return None
+
+
+def extract_services(soup: BeautifulSoup) -> List[str]:
+    """Extrahiert Dienstleistungen"""
+    services = []
+
+    # Suche nach "Leistungen", "Services", "Was wir tun" Sektionen
+    for section in soup.find_all(['div', 'section'], class_=SERVICE_CLASS_PATTERN):
+        # Finde Listenelemente
+        for item in section.find_all(['li', 'h3', 'h4']):
+            text = item.get_text(strip=True)
+            if 10 < len(text) < 100:
+                services.append(text)
+
+    return services[:10]  # Maximal 10 Dienstleistungen
+
+
+class PageParser:
+    """
+    Verteilt parse_page auf einen Prozess-Pool
+
+    Die Zahl gleichzeitig eingereichter Seiten ist auf `queue_size` begrenzt;
+    Download-Threads blockieren, bis ein Platz frei wird (Backpressure).
+    Mit `workers=0` wird direkt im aufrufenden Thread geparst.
+
+    Stirbt ein Kindprozess (OOM, Absturz in lxml), ist der ganze Pool
+    unbrauchbar (BrokenProcessPool). Er wird dann ersetzt und die Seite
+    einmal erneut geparst; bricht auch das ab, wird die Seite verworfen.
+    """
+
+    def __init__(self, workers: int = 0, queue_size: Optional[int] = None):
+        self.workers = max(0, workers)
+        self.pool: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[threading.BoundedSemaphore] = None
+        self._pool_lock = threading.Lock()
+        self._closed = False
+
+        if self.workers:
+            self.pool = self._create_pool()
+            self._slots = threading.BoundedSemaphore(queue_size or self.workers * 4)
+            logger.info(f"🧩 Parse-Pool gestartet: {self.workers} Prozesse")
+
+    def _create_pool(self) -> ProcessPoolExecutor:
+        # 'spawn' statt 'fork': der Elternprozess hat bereits viele Threads
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn')
+        )
+
+    def parse(self, content: Union[bytes, str], url: str, kind: str) -> Dict:
+        """Parst eine Seite (blockiert bis zum Ergebnis)"""
+        # Gemessen inkl. Wartezeit auf einen freien Pool-Platz
+        with PHASE_SECONDS.labels(PHASE_PARSE).time():
+            if self.pool is None:
+                return parse_page(content, url, kind)
+
+            with self._slots:
+                for attempt in range(2):
+                    pool = self.pool
+                    try:
+                        return pool.submit(parse_page, content, url, kind).result()
+                    except BrokenProcessPool:
+                        self._replace_pool(pool)
+                        if attempt:
+                            raise
+                        logger.warning(f"⚠️ Parse-Pool abgestürzt, parse erneut: {url}")
+
+    def _replace_pool(self, broken: ProcessPoolExecutor):
+        """Ersetzt einen abgestürzten Pool (nur einmal, auch bei vielen wartenden Threads)"""
+        with self._pool_lock:
+            if self._closed or self.pool is not broken:
+                return
+            broken.shutdown(wait=False, cancel_futures=True)
+            self.pool = self._create_pool()
+            logger.warning(f"🧩 Parse-Pool neu gestartet: {self.workers} Prozesse")
+
+    def close(self):
+        with self._pool_lock:
+            self._closed = True
+        if self.pool:
+            self.pool.shutdown(wait=False, cancel_futures=True)
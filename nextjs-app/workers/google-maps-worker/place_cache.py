@@ -0,0 +1,161 @@
+"""
+Zweistufiger Cache für Google Place-Details
+In-Process-LRU (prozessweit) + MongoDB-Collection mit TTL-Index
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+from pymongo.collection import Collection
+from pymongo.errors import PyMongoError
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class LRUCache:
+    """Thread-sicherer LRU-Cache mit Ablaufzeit und Größenbegrenzung"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max(0, max_entries)
+        self._entries: 'OrderedDict[str, Tuple[float, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl_seconds: float):
+        if self.max_entries == 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.time() + ttl_seconds, value)
+            self._entries.move_to_end(key)
+
+            # Älteste Einträge verdrängen
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class CacheStats:
+    """Zählt Cache-Treffer eines Jobs (thread-sicher)"""
+
+    def __init__(self):
+        self.memory_hits = 0
+        self.mongo_hits = 0
+        self.search_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def record(self, source: Optional[str]):
+        with self._lock:
+            if source == 'memory':
+                self.memory_hits += 1
+            elif source == 'mongo':
+                self.mongo_hits += 1
+            elif source == 'search':
+                # Details lagen bereits in der Suche vor (kein Abruf nötig)
+                self.search_hits += 1
+            else:
+                self.misses += 1
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            'hits': self.memory_hits + self.mongo_hits,
+            'memoryHits': self.memory_hits,
+            'mongoHits': self.mongo_hits,
+            'searchHits': self.search_hits,
+            'misses': self.misses
+        }
+
+
+class PlaceDetailsCache:
+    """
+    Cache für Place-Details, Schlüssel ist place_id + FieldMask
+
+    Lesezugriffe gehen zuerst an den In-Process-LRU, dann an MongoDB.
+    MongoDB-Einträge werden über einen TTL-Index auf `expiresAt` entfernt.
+    Fehler der Datenbank werden als Cache-Miss behandelt.
+    """
+
+    def __init__(self, collection: Collection, memory: LRUCache, ttl_seconds: int):
+        self.collection = collection
+        self.memory = memory
+        self.ttl_seconds = ttl_seconds
+        self._ensure_indexes()
+
+    def _ensure_indexes(self):
+        try:
+            self.collection.create_index('expiresAt', expireAfterSeconds=0)
+        except PyMongoError as e:
+            logger.warning(f"⚠️ TTL-Index für Place-Cache konnte nicht angelegt werden: {e}")
+
+    @staticmethod
+    def make_key(place_id: str, field_mask: str) -> str:
+        return f"{place_id}|{field_mask}"
+
+    def get(self, place_id: str, field_mask: str) -> Tuple[Optional[Dict], Optional[str]]:
+        """
+        Sucht Place-Details im Cache
+
+        Returns:
+            Tuple aus (Details oder None, Quelle 'memory' | 'mongo' | None)
+        """
+        key = self.make_key(place_id, field_mask)
+
+        details = self.memory.get(key)
+        if details is not None:
+            return details, 'memory'
+
+        try:
+            doc = self.collection.find_one({
+                '_id': key,
+                'expiresAt': {'$gt': datetime.now(timezone.utc)}
+            })
+        except PyMongoError as e:
+            logger.warning(f"⚠️ Place-Cache nicht lesbar: {e}")
+            return None, None
+
+        if not doc:
+            return None, None
+
+        remaining = (doc['expiresAt'].replace(tzinfo=timezone.utc) - datetime.now(timezone.utc)).total_seconds()
+        self.memory.set(key, doc['details'], max(remaining, 0))
+        return doc['details'], 'mongo'
+
+    def set(self, place_id: str, field_mask: str, details: Dict):
+        """Speichert Place-Details in beiden Cache-Stufen"""
+        key = self.make_key(place_id, field_mask)
+        self.memory.set(key, details, self.ttl_seconds)
+
+        now = datetime.now(timezone.utc)
+        try:
+            self.collection.replace_one(
+                {'_id': key},
+                {
+                    'placeId': place_id,
+                    'fieldMask': field_mask,
+                    'details': details,
+                    'cachedAt': now,
+                    'expiresAt': now + timedelta(seconds=self.ttl_seconds)
+                },
+                upsert=True
+            )
+        except PyMongoError as e:
+            logger.warning(f"⚠️ Place-Cache nicht beschreibbar: {e}")
@@ -0,0 +1,197 @@
+"""
+Client für die Google Places API (New)
+Eine gepoolte Keep-Alive-Session für alle Jobs eines Prozesses mit
+Timeouts, Wiederholungen und Metriken zur Wiederverwendung von Verbindungen
+"""
+
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from typing import Dict
+import logging
+from rate_limiter import TokenBucketRateLimiter, parse_retry_after
+from metrics import PLACES_CONNECTIONS, PLACES_REQUESTS, record_http_status
+
+logger = logging.getLogger(__name__)
+
+# Drosselung durch die API -> Rate-Limiter bremst alle Jobs
+THROTTLE_STATUS_CODES = (429, 503)
+# Vorübergehende Serverfehler -> erneuter Versuch mit Backoff
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Backoff bei Serverfehlern und Verbindungsabbrüchen (Sekunden)
+RETRY_BACKOFF_BASE = 0.5
+RETRY_BACKOFF_MAX = 10.0
+
+# Aufgebaute Verbindungen im Prozess (zusätzlich zur Prometheus-Metrik)
+_connections_opened = 0
+_connections_lock = threading.Lock()
+
+
+def _record_connection():
+    global _connections_opened
+    with _connections_lock:
+        _connections_opened += 1
+    PLACES_CONNECTIONS.inc()
+
+
+def connections_opened() -> int:
+    with _connections_lock:
+        return _connections_opened
+
+
+class _CountingHTTPConnection(HTTPConnection):
+    def connect(self):
+        _record_connection()
+        super().connect()
+
+
+class _CountingHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        _record_connection()
+        super().connect()
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _CountingHTTPConnection
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _CountingHTTPSConnection
+
+
+class CountingHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter, der jeden Verbindungsaufbau (TCP bzw. TCP+TLS) zählt"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _CountingHTTPConnectionPool,
+            'https': _CountingHTTPSConnectionPool
+        }
+
+
+class PlacesClient:
+    """
+    Places-API-Client, der von allen Jobs eines Prozesses geteilt wird
+
+    Alle Anfragen laufen über eine Session mit Verbindungspool, sodass
+    Keep-Alive-Verbindungen zu places.googleapis.com wiederverwendet werden
+    (ein TLS-Handshake pro Verbindung statt pro Anfrage). Jede Anfrage hat
+    getrennte Connect-/Read-Timeouts und geht durch den gemeinsamen
+    Rate-Limiter.
+
+    Wiederholungen:
+        - HTTP 429/503: Wartezeit laut Retry-After, Rate wird halbiert
+        - HTTP 500/502/504, Verbindungsfehler, Timeouts: exponentieller Backoff
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str,
+        rate_limiter: TokenBucketRateLimiter,
+        pool_size: int = 32,
+        max_retries: int = 4,
+        connect_timeout: float = 5,
+        read_timeout: float = 15
+    ):
+        self.base_url = base_url.rstrip('/')
+        self.rate_limiter = rate_limiter
+        self.max_retries = max(0, max_retries)
+        self.timeout = (connect_timeout, read_timeout)
+
+        self.session = requests.Session()
+        self.session.headers['X-Goog-Api-Key'] = api_key
+        adapter = CountingHTTPAdapter(pool_connections=4, pool_maxsize=max(1, pool_size))
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self._requests = 0
+        self._connections_at_start = connections_opened()
+        self._lock = threading.Lock()
+
+    def search_text(self, body: Dict, field_mask: str) -> Dict:
+        """POST places:searchText"""
+        response = self.request(
+            'POST',
+            f"{self.base_url}/places:searchText",
+            headers={'Content-Type': 'application/json', 'X-Goog-FieldMask': field_mask},
+            json=body
+        )
+        return response.json()
+
+    def get_place(self, place_id: str, field_mask: str) -> Dict:
+        """GET places/{place_id}"""
+        response = self.request(
+            'GET',
+            f"{self.base_url}/places/{place_id}",
+            headers={'X-Goog-FieldMask': field_mask}
+        )
+        return response.json()
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Führt eine Anfrage mit Rate-Limit, Timeout und Wiederholungen aus
+
+        Raises:
+            requests.exceptions.RequestException: Bei endgültigem Fehlschlag
+        """
+        kwargs.setdefault('timeout', self.timeout)
+
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt >= self.max_retries
+            self.rate_limiter.acquire()
+            with self._lock:
+                self._requests += 1
+            PLACES_REQUESTS.inc()
+
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                record_http_status('google', 'error')
+                if last_attempt:
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(f"⚠️ Places API nicht erreichbar ({type(e).__name__}), neuer Versuch in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+            except requests.exceptions.RequestException:
+                record_http_status('google', 'error')
+                raise
+            record_http_status('google', response.status_code)
+
+            if response.status_code in RETRYABLE_STATUS_CODES and not last_attempt:
+                if response.status_code in THROTTLE_STATUS_CODES:
+                    self.rate_limiter.on_throttled(parse_retry_after(response.headers.get('Retry-After')))
+                else:
+                    time.sleep(self._backoff(attempt))
+                continue
+
+            response.raise_for_status()
+            self.rate_limiter.on_success()
+            return response
+
+    def _backoff(self, attempt: int) -> float:
+        delay = RETRY_BACKOFF_BASE * (2 ** attempt) * random.uniform(0.8, 1.2)
+        return min(delay, RETRY_BACKOFF_MAX)
+
+    def stats(self) -> Dict:
+        """Anfragen und aufgebaute Verbindungen seit dem Start des Clients"""
+        connections = connections_opened() - self._connections_at_start
+        with self._lock:
+            requests_sent = self._requests
+        reuse = 1 - connections / requests_sent if requests_sent else 0.0
+        return {'requests': requests_sent, 'connections': connections, 'reuseRate': round(max(reuse, 0.0), 3)}
+
+    def close(self):
+        stats = self.stats()
+        logger.info(
+            f"🔌 Places API: {stats['requests']} Anfragen über {stats['connections']} Verbindungen "
+            f"(Wiederverwendung {stats['reuseRate']:.0%})"
+        )
+        self.session.close()
@@ -0,0 +1,116 @@
+"""
+Rate-Limiter für Google-API-Aufrufe
+Token-Bucket mit adaptivem Backoff bei HTTP 429/503
+"""
+
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Obergrenze für eine einzelne Wartezeit nach Drosselung (Sekunden)
+MAX_BACKOFF_SECONDS = 60.0
+
+
+class TokenBucketRateLimiter:
+    """
+    Thread-sicherer Token-Bucket, der von allen Jobs eines Prozesses geteilt wird
+
+    Erlaubt Bursts bis `burst` Anfragen und im Mittel `rate` Anfragen pro
+    Sekunde. Bei Drosselung durch die API wird die Rate halbiert und der
+    Bucket bis zum Ablauf von Retry-After gesperrt; jede erfolgreiche Anfrage
+    hebt die Rate wieder schrittweise an (AIMD).
+    """
+
+    def __init__(self, rate: float, burst: int, min_rate: float = 1.0):
+        self.max_rate = max(rate, min_rate)
+        self.min_rate = min_rate
+        self.rate = self.max_rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self.consecutive_throttles = 0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated_at
+        self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+        self.updated_at = now
+
+    def acquire(self):
+        """Blockiert, bis ein Token verfügbar ist"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                elif self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                else:
+                    wait = (1 - self.tokens) / self.rate
+
+            time.sleep(wait)
+
+    def on_success(self):
+        """Erhöht die Rate nach einer erfolgreichen Anfrage schrittweise"""
+        with self._lock:
+            self.consecutive_throttles = 0
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+
+    def on_throttled(self, retry_after: Optional[float] = None) -> float:
+        """
+        Reagiert auf HTTP 429/503
+
+        Args:
+            retry_after: Wartezeit aus dem Retry-After-Header (Sekunden)
+
+        Returns:
+            Wartezeit in Sekunden, bis wieder Anfragen gesendet werden
+        """
+        with self._lock:
+            self.consecutive_throttles += 1
+            self.rate = max(self.min_rate, self.rate / 2)
+
+            if retry_after is None:
+                # Exponentieller Backoff mit Jitter
+                retry_after = 0.5 * (2 ** (self.consecutive_throttles - 1))
+                retry_after *= random.uniform(0.8, 1.2)
+            delay = min(max(retry_after, 0.0), MAX_BACKOFF_SECONDS)
+
+            now = time.monotonic()
+            self.blocked_until = max(self.blocked_until, now + delay)
+            self.tokens = 0.0
+            self.updated_at = now
+
+            logger.warning(f"⏳ API-Drosselung: pausiere {delay:.1f}s, neue Rate {self.rate:.1f}/s")
+            return delay
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parst einen Retry-After-Header (Sekunden oder HTTP-Datum)"""
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
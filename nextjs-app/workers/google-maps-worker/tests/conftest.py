@@ -0,0 +1,9 @@
+"""
+Gemeinsame Einstellungen für die Tests
+Die Worker-Module liegen flach im Worker-Verzeichnis und werden von dort importiert
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
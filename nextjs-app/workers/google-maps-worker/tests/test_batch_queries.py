@@ -0,0 +1,42 @@
+"""Tests für die Suchanfragen eines (Batch-)Jobs"""
+
+import pytest
+
+from worker import expand_queries
+
+
+class TestExpandQueries:
+    def test_single_search(self):
+        assert expand_queries({'branche': 'Gerüstbau', 'standort': 'Berlin'}) == [('Gerüstbau', 'Berlin')]
+
+    def test_cross_product_keeps_order(self):
+        params = {'branchen': ['Gerüstbau', 'Dachdecker'], 'standorte': ['Berlin', 'Potsdam']}
+
+        assert expand_queries(params) == [
+            ('Gerüstbau', 'Berlin'),
+            ('Gerüstbau', 'Potsdam'),
+            ('Dachdecker', 'Berlin'),
+            ('Dachdecker', 'Potsdam'),
+        ]
+
+    def test_explicit_queries_take_precedence(self):
+        params = {
+            'queries': [{'branche': 'Maler', 'standort': 'Köln'}],
+            'branchen': ['Gerüstbau'],
+            'standorte': ['Berlin'],
+        }
+
+        assert expand_queries(params) == [('Maler', 'Köln')]
+
+    def test_strips_and_deduplicates_and_drops_empty(self):
+        params = {'queries': [
+            {'branche': ' Maler ', 'standort': 'Köln'},
+            {'branche': 'Maler', 'standort': 'Köln '},
+            {'branche': '', 'standort': 'Bonn'},
+        ]}
+
+        assert expand_queries(params) == [('Maler', 'Köln')]
+
+    def test_missing_parameters_raise(self):
+        with pytest.raises(KeyError):
+            expand_queries({'branchen': ['Maler']})
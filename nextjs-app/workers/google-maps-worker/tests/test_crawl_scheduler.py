@@ -0,0 +1,182 @@
+"""Tests für Crawl-delay-Auswertung und Slot-Vergabe des CrawlSchedulers"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import pytest
+import requests
+
+from crawl_scheduler import CrawlScheduler, parse_crawl_delay
+
+
+@pytest.fixture(autouse=True)
+def no_dns(monkeypatch):
+    # Hosts werden auf sich selbst "aufgelöst" (kein Netzwerk in Tests)
+    monkeypatch.setattr(CrawlScheduler, '_resolve', staticmethod(lambda host: host))
+
+
+def make_scheduler(**kwargs) -> CrawlScheduler:
+    return CrawlScheduler(requests.Session(), respect_robots=False, **kwargs)
+
+
+class TestParseCrawlDelay:
+    def test_fractional_delay_for_all_agents(self):
+        assert parse_crawl_delay('User-agent: *\nCrawl-delay: 0.5\n') == 0.5
+
+    def test_only_wildcard_group_counts(self):
+        robots = (
+            'User-agent: Googlebot\n'
+            'Crawl-delay: 9\n'
+            '\n'
+            'User-agent: Bingbot\n'
+            'User-agent: *\n'
+            'Disallow: /intern\n'
+            'Crawl-delay: 2 # Sekunden\n'
+        )
+        assert parse_crawl_delay(robots) == 2.0
+
+    @pytest.mark.parametrize('robots', [
+        '',
+        'User-agent: Googlebot\nCrawl-delay: 3\n',
+        'User-agent: *\nDisallow: /\n',
+        'User-agent: *\nCrawl-delay: bald\n',
+    ])
+    def test_no_delay(self, robots):
+        assert parse_crawl_delay(robots) is None
+
+    def test_negative_delay_is_clamped(self):
+        assert parse_crawl_delay('User-agent: *\nCrawl-delay: -1\n') == 0.0
+
+
+class TestAcquire:
+    def test_min_gap_between_requests_to_one_host(self):
+        scheduler = make_scheduler(max_per_host=4, min_gap=0.1)
+        starts = []
+        for _ in range(3):
+            slot = scheduler.acquire('http://a.example/')
+            starts.append(time.monotonic())
+            scheduler.release(slot)
+
+        gaps = [later - earlier for earlier, later in zip(starts, starts[1:])]
+        assert min(gaps) >= 0.09
+
+    def test_other_hosts_are_not_delayed(self):
+        scheduler = make_scheduler(min_gap=5)
+        scheduler.acquire('http://a.example/')
+
+        start = time.monotonic()
+        assert scheduler.acquire('http://b.example/') is not None
+        assert time.monotonic() - start < 0.1
+
+    def test_returns_none_when_deadline_passes(self):
+        scheduler = make_scheduler(max_per_host=1, min_gap=0)
+        scheduler.acquire('http://a.example/')
+
+        assert scheduler.acquire('http://a.example/x', deadline=time.monotonic() + 0.05) is None
+
+    def test_ip_cap_is_optional(self, monkeypatch):
+        monkeypatch.setattr(CrawlScheduler, '_resolve', staticmethod(lambda host: '10.0.0.1'))
+        unlimited = make_scheduler(min_gap=0)
+        assert all(unlimited.acquire(f'http://site{i}.example/') for i in range(10))
+
+        capped = make_scheduler(min_gap=0, max_per_ip=2)
+        capped.acquire('http://site1.example/')
+        capped.acquire('http://site2.example/')
+        assert capped.acquire('http://site3.example/', deadline=time.monotonic() + 0.05) is None
+
+    def test_no_dns_lookup_without_ip_cap(self, monkeypatch):
+        def resolve(host):
+            raise AssertionError(f"DNS-Abfrage für {host}")
+
+        monkeypatch.setattr(CrawlScheduler, '_resolve', staticmethod(resolve))
+
+        assert make_scheduler(min_gap=0).acquire('http://a.example/') is not None
+
+    def test_penalize_pauses_host(self):
+        scheduler = make_scheduler(min_gap=0)
+        scheduler.release(scheduler.acquire('http://a.example/'))
+        scheduler.penalize('http://a.example/', retry_after=0.2)
+
+        start = time.monotonic()
+        scheduler.acquire('http://a.example/')
+        assert time.monotonic() - start >= 0.18
+
+    def test_crawl_delay_from_robots_widens_gap(self, monkeypatch):
+        class Response:
+            status_code = 200
+
+            class raw:
+                @staticmethod
+                def read(size, decode_content=True):
+                    return b'User-agent: *\nCrawl-delay: 0.3\n'
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+        session = requests.Session()
+        monkeypatch.setattr(session, 'get', lambda url, **kwargs: Response())
+        scheduler = CrawlScheduler(session, min_gap=0, respect_robots=True)
+        try:
+            scheduler.release(scheduler.acquire('http://a.example/'))
+            # robots.txt wird im Hintergrund geladen
+            deadline = time.monotonic() + 2
+            while scheduler._hosts['a.example'].crawl_delay is None and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+            assert scheduler._hosts['a.example'].crawl_delay == 0.3
+
+            scheduler.release(scheduler.acquire('http://a.example/'))
+            start = time.monotonic()
+            scheduler.acquire('http://a.example/')
+            assert time.monotonic() - start >= 0.25
+        finally:
+            scheduler.close()
+
+
+class TestSubmit:
+    def test_waiting_host_does_not_block_pool_threads(self):
+        scheduler = make_scheduler(max_per_host=1, min_gap=0.3)
+        pool = ThreadPoolExecutor(max_workers=1)
+        order = []
+
+        def fetch(slot, name):
+            order.append(name)
+            scheduler.release(slot)
+            return name
+
+        try:
+            slow = [scheduler.submit(pool, 'http://slow.example/', None, fetch, f'slow-{i}') for i in range(3)]
+            fast = scheduler.submit(pool, 'http://fast.example/', None, fetch, 'fast')
+            wait(slow + [fast], timeout=5)
+        finally:
+            scheduler.close()
+            pool.shutdown()
+
+        # Der eine Pool-Thread bedient den zweiten Host, während slow wartet
+        assert order.index('fast') < order.index('slow-1')
+        assert [future.result() for future in slow] == ['slow-0', 'slow-1', 'slow-2']
+
+    def test_deadline_resolves_to_none_and_cancel_drops_fetch(self):
+        scheduler = make_scheduler(max_per_host=1, min_gap=10)
+        pool = ThreadPoolExecutor(max_workers=1)
+        calls = []
+
+        def fetch(slot, name):
+            calls.append(name)
+            return name
+
+        try:
+            assert scheduler.submit(pool, 'http://a.example/', None, fetch, 'first').result(1) == 'first'
+            late = scheduler.submit(pool, 'http://a.example/', time.monotonic() + 0.05, fetch, 'late')
+            cancelled = scheduler.submit(pool, 'http://a.example/', None, fetch, 'cancelled')
+            assert cancelled.cancel()
+
+            assert late.result(1) is None
+        finally:
+            scheduler.close()
+            pool.shutdown()
+
+        assert calls == ['first']
@@ -0,0 +1,50 @@
+"""Tests für Ereignis-Offsets und das gemeinsame ID-Format der SSE-Streams"""
+
+import pytest
+
+from job_events import EVENT_PROGRESS, EVENT_RESULT, EVENT_TRUNCATED, JobEventBus
+
+api = pytest.importorskip('api')
+
+
+class TestEventOffsets:
+    def test_offset_counts_results(self):
+        bus = JobEventBus(max_events=10)
+        channel = bus.open('job', results=2)
+        channel.publish(EVENT_PROGRESS, {'current': 1})
+        channel.publish(EVENT_RESULT, {'externalId': 'p3'})
+        channel.publish(EVENT_RESULT, {'externalId': 'p4'})
+
+        events, _ = bus.read('job', 0, timeout=0)
+
+        assert [event.offset for event in events] == [2, 3, 4]
+        assert [api.local_event_id(event) for event in events] == ['r2.1', 'r3.2', 'r4.3']
+
+    def test_truncation_gap_keeps_offset_before_first_result(self):
+        bus = JobEventBus(max_events=2)
+        channel = bus.open('job')
+        for i in range(4):
+            channel.publish(EVENT_RESULT, {'externalId': f'p{i}'})
+
+        events, _ = bus.read('job', 0, timeout=0)
+
+        assert events[0].type == EVENT_TRUNCATED
+        assert events[0].offset == 2
+        assert [event.offset for event in events[1:]] == [3, 4]
+
+
+class TestEventIds:
+    @pytest.mark.parametrize('value, expected', [
+        ('r5.12', (5, 12)),
+        ('r5', (5, None)),
+        ('12', (None, None)),
+        ('', (None, None)),
+        (None, (None, None)),
+        ('r5.x', (None, None)),
+    ])
+    def test_parse_event_id(self, value, expected):
+        assert api.parse_event_id(value) == expected
+
+    def test_round_trip(self):
+        assert api.parse_event_id(api.event_id(7)) == (7, None)
+        assert api.parse_event_id(api.event_id(7, 3)) == (7, 3)
@@ -0,0 +1,210 @@
+"""Tests für Claim/Lease der Job-Queue (MongoDB per mongomock)"""
+
+import threading
+import time
+
+import mongomock
+import pytest
+from bson import ObjectId
+
+from job_queue import JobQueue, JobQueueRunner
+from job_state import CancellationWatcher, ResultWriter
+
+
+@pytest.fixture
+def jobs():
+    return mongomock.MongoClient().db.customer_import_jobs
+
+
+def add_job(jobs, created_at: float, **fields) -> object:
+    return jobs.insert_one({'status': 'queued', 'createdAt': created_at, 'params': {}, **fields}).inserted_id
+
+
+def expire_lease(jobs, job_id):
+    jobs.update_one({'_id': job_id}, {'$set': {'leaseExpiresAt': time.time() - 1}})
+
+
+class TestClaim:
+    def test_claims_oldest_queued_job(self, jobs):
+        add_job(jobs, 2)
+        oldest = add_job(jobs, 1)
+
+        job = JobQueue(jobs, 'worker-a').claim()
+
+        assert job['_id'] == oldest
+        assert job['status'] == 'running'
+        assert job['workerId'] == 'worker-a'
+        assert job['attempts'] == 1
+        assert job['leaseExpiresAt'] > time.time()
+
+    def test_returns_none_without_free_jobs(self, jobs):
+        assert JobQueue(jobs, 'worker-a').claim() is None
+
+    def test_running_job_with_valid_lease_is_not_claimed(self, jobs):
+        add_job(jobs, 1)
+        JobQueue(jobs, 'worker-a').claim()
+
+        assert JobQueue(jobs, 'worker-b').claim() is None
+
+    def test_expired_lease_is_taken_over_with_new_lease_id(self, jobs):
+        job_id = add_job(jobs, 1)
+        first = JobQueue(jobs, 'worker-a').claim()
+        expire_lease(jobs, job_id)
+
+        second = JobQueue(jobs, 'worker-b').claim()
+
+        assert second['_id'] == job_id
+        assert second['workerId'] == 'worker-b'
+        assert second['attempts'] == 2
+        assert second['leaseId'] != first['leaseId']
+
+    def test_exhausted_jobs_fail_instead_of_being_claimed(self, jobs):
+        job_id = add_job(jobs, 1)
+        queue = JobQueue(jobs, 'worker-a', max_attempts=1)
+        queue.claim()
+        expire_lease(jobs, job_id)
+
+        assert queue.claim() is None
+        assert queue.fail_exhausted() == 1
+        assert jobs.find_one({'_id': job_id})['status'] == 'failed'
+
+
+class TestLease:
+    def test_renew_and_release(self, jobs):
+        add_job(jobs, 1)
+        queue = JobQueue(jobs, 'worker-a', lease_seconds=60)
+        lease = queue.lease_of(queue.claim())
+
+        assert queue.renew(lease)
+        queue.release(lease)
+        assert 'leaseExpiresAt' not in jobs.find_one({'_id': lease.job_id})
+
+    def test_renew_fails_after_takeover(self, jobs):
+        job_id = add_job(jobs, 1)
+        queue = JobQueue(jobs, 'worker-a')
+        lease = queue.lease_of(queue.claim())
+        expire_lease(jobs, job_id)
+        JobQueue(jobs, 'worker-b').claim()
+
+        assert not queue.renew(lease)
+
+    def test_renew_keeps_lease_of_cancelled_job(self, jobs):
+        job_id = add_job(jobs, 1)
+        queue = JobQueue(jobs, 'worker-a')
+        lease = queue.lease_of(queue.claim())
+        jobs.update_one({'_id': job_id}, {'$set': {'status': 'cancelled'}})
+
+        assert queue.renew(lease)
+
+    def test_same_worker_reclaim_invalidates_old_lease(self, jobs):
+        job_id = add_job(jobs, 1)
+        queue = JobQueue(jobs, 'worker-a')
+        old = queue.lease_of(queue.claim())
+        expire_lease(jobs, job_id)
+        queue.claim()
+
+        assert not queue.renew(old)
+
+    def test_writes_of_previous_owner_are_ignored(self, jobs):
+        job_id = add_job(jobs, 1)
+        queue = JobQueue(jobs, 'worker-a')
+        lease = queue.lease_of(queue.claim())
+        expire_lease(jobs, job_id)
+        JobQueue(jobs, 'worker-b').claim()
+
+        writer = ResultWriter(jobs, str(job_id), batch_size=1, owner=lease.owner)
+        writer.add({'externalId': 'p1'})
+
+        assert 'results' not in jobs.find_one({'_id': job_id})
+
+    def test_enqueue_resets_lease(self, jobs):
+        job_id = add_job(jobs, 1, status='completed', workerId='worker-a', leaseId='x')
+
+        assert JobQueue(jobs, 'worker-a').enqueue(str(job_id))
+        job = jobs.find_one({'_id': job_id})
+        assert job['status'] == 'queued'
+        assert 'workerId' not in job and 'leaseId' not in job
+
+
+class TestRunner:
+    def test_lost_lease_cancels_local_run(self, jobs):
+        job_id = add_job(jobs, 1)
+        queue = JobQueue(jobs, 'worker-a', lease_seconds=0.3)
+        observed = {}
+        started = threading.Event()
+
+        def process_job(job_key, lease):
+            watcher = CancellationWatcher(jobs, job_key, poll_interval=0.05, lease_revoked=lease.revoked)
+            with watcher:
+                started.set()
+                deadline = time.monotonic() + 5
+                while not watcher.cancelled and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                observed['cancelled'] = watcher.cancelled
+                observed['lease_lost'] = watcher.lease_lost
+
+        runner = JobQueueRunner(queue, process_job, slots=1, poll_interval=0.05)
+        runner.start()
+        try:
+            assert started.wait(2)
+            # Ein anderer Worker übernimmt den Job (atomar, ohne Heartbeat-Rennen)
+            jobs.update_one(
+                {'_id': job_id},
+                {'$set': {'workerId': 'worker-b', 'leaseId': ObjectId(), 'leaseExpiresAt': time.time() + 60}}
+            )
+
+            deadline = time.monotonic() + 3
+            while 'cancelled' not in observed and time.monotonic() < deadline:
+                time.sleep(0.02)
+        finally:
+            runner.stop()
+
+        assert observed == {'cancelled': True, 'lease_lost': True}
+        assert jobs.find_one({'_id': job_id})['workerId'] == 'worker-b'
+
+    def test_user_cancel_is_not_a_lost_lease(self, jobs):
+        job_id = add_job(jobs, 1)
+        queue = JobQueue(jobs, 'worker-a', lease_seconds=0.3)
+        observed = {}
+        started = threading.Event()
+
+        def process_job(job_key, lease):
+            watcher = CancellationWatcher(jobs, job_key, poll_interval=0.05, lease_revoked=lease.revoked)
+            with watcher:
+                started.set()
+                deadline = time.monotonic() + 5
+                while not watcher.cancelled and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                # Weitere Heartbeats abwarten, während der Abbruch gemeldet wird
+                time.sleep(0.3)
+                observed['cancelled'] = watcher.cancelled
+                observed['lease_lost'] = watcher.lease_lost
+
+        runner = JobQueueRunner(queue, process_job, slots=1, poll_interval=0.05)
+        runner.start()
+        try:
+            assert started.wait(2)
+            jobs.update_one({'_id': job_id}, {'$set': {'status': 'cancelled'}})
+
+            deadline = time.monotonic() + 3
+            while 'cancelled' not in observed and time.monotonic() < deadline:
+                time.sleep(0.02)
+        finally:
+            runner.stop()
+
+        assert observed == {'cancelled': True, 'lease_lost': False}
+
+    def test_reaper_fails_exhausted_jobs_without_claiming(self, jobs):
+        job_id = add_job(jobs, 1, status='running', attempts=3, workerId='worker-b', leaseExpiresAt=time.time() - 1)
+        queue = JobQueue(jobs, 'worker-a', max_attempts=3)
+        runner = JobQueueRunner(queue, lambda job_key, lease: None, slots=1, poll_interval=0.05, reap_interval=0.05)
+
+        runner.start()
+        try:
+            deadline = time.monotonic() + 2
+            while jobs.find_one({'_id': job_id})['status'] != 'failed' and time.monotonic() < deadline:
+                time.sleep(0.02)
+        finally:
+            runner.stop()
+
+        assert jobs.find_one({'_id': job_id})['status'] == 'failed'
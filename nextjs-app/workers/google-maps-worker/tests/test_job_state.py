@@ -0,0 +1,93 @@
+"""Tests für Ergebnis-Puffer und Checkpoint eines Jobs (MongoDB per mongomock)"""
+
+import threading
+
+import mongomock
+import pytest
+from pymongo.errors import AutoReconnect
+
+from job_state import JobCheckpoint, ResultWriter
+
+
+@pytest.fixture
+def jobs():
+    return mongomock.MongoClient().db.customer_import_jobs
+
+
+@pytest.fixture
+def job_id(jobs):
+    return str(jobs.insert_one({'status': 'running'}).inserted_id)
+
+
+def stored(jobs, job_id):
+    job = jobs.find_one()
+    return [result['externalId'] for result in job.get('results', [])], job.get('resultCount')
+
+
+class TestResultWriter:
+    def test_writes_full_batches_and_rest_on_close(self, jobs, job_id):
+        with ResultWriter(jobs, job_id, batch_size=2, flush_interval=60) as writer:
+            for place_id in ('p1', 'p2', 'p3'):
+                writer.add({'externalId': place_id})
+            assert stored(jobs, job_id) == (['p1', 'p2'], 2)
+
+        assert stored(jobs, job_id) == (['p1', 'p2', 'p3'], 3)
+
+    def test_failed_write_is_requeued_without_raising(self, jobs, job_id, monkeypatch):
+        writer = ResultWriter(jobs, job_id, batch_size=1)
+        update_one = jobs.update_one
+
+        def failing(*args, **kwargs):
+            raise AutoReconnect('primary stepped down')
+
+        monkeypatch.setattr(jobs, 'update_one', failing)
+        writer.add({'externalId': 'p1'})
+
+        monkeypatch.setattr(jobs, 'update_one', update_one)
+        writer.add({'externalId': 'p2'})
+
+        assert stored(jobs, job_id) == (['p1', 'p2'], 2)
+
+    def test_add_does_not_wait_for_running_write(self, jobs, job_id, monkeypatch):
+        writer = ResultWriter(jobs, job_id, batch_size=1)
+        update_one = jobs.update_one
+        writing = threading.Event()
+        release = threading.Event()
+
+        def slow(*args, **kwargs):
+            writing.set()
+            release.wait(5)
+            return update_one(*args, **kwargs)
+
+        monkeypatch.setattr(jobs, 'update_one', slow)
+        first = threading.Thread(target=writer.add, args=({'externalId': 'p1'},))
+        first.start()
+        assert writing.wait(5)
+
+        # Schreiben läuft noch: add() puffert nur
+        writer.add({'externalId': 'p2'})
+        assert writer.count == 2
+
+        release.set()
+        first.join(5)
+        writer.close()
+        assert stored(jobs, job_id) == (['p1', 'p2'], 2)
+
+
+class TestJobCheckpoint:
+    def test_stores_new_place_ids_once(self, jobs, job_id):
+        checkpoint = JobCheckpoint(jobs, job_id, JobCheckpoint.initial_state())
+        checkpoint.add_places(0, [{'id': 'p1'}, {'id': 'p2'}, {}])
+        checkpoint.add_places(1, [{'id': 'p2'}, {'id': 'p3'}])
+
+        assert jobs.find_one()['checkpoint']['places'] == [
+            {'id': 'p1', 'q': 0}, {'id': 'p2', 'q': 0}, {'id': 'p3', 'q': 1}
+        ]
+
+    def test_keeps_requested_search_fields(self, jobs, job_id):
+        checkpoint = JobCheckpoint(jobs, job_id, JobCheckpoint.initial_state())
+        place = {'id': 'p1', 'displayName': {'text': 'Beispiel Bau'}, 'location': {'latitude': 52.5}}
+        checkpoint.add_places(0, [place], ('id', 'displayName', 'websiteUri'))
+
+        resumed = JobCheckpoint(jobs, job_id, jobs.find_one()['checkpoint'])
+        assert resumed.places == [{'id': 'p1', 'q': 0, 'place': {'id': 'p1', 'displayName': {'text': 'Beispiel Bau'}}}]
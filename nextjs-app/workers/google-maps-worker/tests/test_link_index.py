@@ -0,0 +1,96 @@
+"""Tests für die Bewertung von Impressum-/Kontakt-Links"""
+
+import pytest
+from bs4 import BeautifulSoup
+
+from link_index import _last_segment, index_links, index_urls
+
+BASE_URL = 'https://www.beispiel-bau.de/'
+
+
+def links(html: str):
+    return index_links(BeautifulSoup(html, 'lxml'), BASE_URL)
+
+
+@pytest.mark.parametrize('path, segment', [
+    ('/impressum', 'impressum'),
+    ('/de/Impressum.html', 'impressum'),
+    ('/kontakt/', 'kontakt'),
+    ('/', ''),
+    ('', ''),
+])
+def test_last_segment(path, segment):
+    assert _last_segment(path) == segment
+
+
+class TestIndexLinks:
+    def test_finds_both_kinds_in_one_pass(self):
+        result = links('<a href="/impressum">Impressum</a><a href="kontakt.php">Kontakt</a>')
+
+        assert result == {
+            'impressum': 'https://www.beispiel-bau.de/impressum',
+            'kontakt': 'https://www.beispiel-bau.de/kontakt.php',
+        }
+
+    def test_exact_path_beats_keyword_in_text(self):
+        result = links(
+            '<a href="/ueber-uns">Kontakt und Anfahrt</a>'
+            '<a href="/kontakt">Schreiben Sie uns</a>'
+        )
+
+        assert result['kontakt'] == 'https://www.beispiel-bau.de/kontakt'
+
+    def test_footer_link_wins_tie(self):
+        result = links(
+            '<nav><a href="/impressum-alt">Impressum</a></nav>'
+            '<footer><a href="/impressum-neu">Impressum</a></footer>'
+        )
+
+        assert result['impressum'] == 'https://www.beispiel-bau.de/impressum-neu'
+
+    def test_external_links_are_penalized(self):
+        result = links(
+            '<a href="https://baukasten.example/impressum">Impressum</a>'
+            '<a href="/rechtliches">Rechtliches</a>'
+        )
+
+        assert result['impressum'] == 'https://www.beispiel-bau.de/rechtliches'
+
+    def test_skips_mailto_tel_and_anchors(self):
+        result = links(
+            '<a href="mailto:kontakt@beispiel-bau.de">Kontakt</a>'
+            '<a href="tel:+49301234">Kontakt</a>'
+            '<a href="#kontakt">Kontakt</a>'
+        )
+
+        assert result == {'impressum': None, 'kontakt': None}
+
+    def test_first_link_wins_on_equal_score(self):
+        result = links('<a href="/kontakt">Kontakt</a><a href="/de/kontakt">Kontakt</a>')
+
+        assert result['kontakt'] == 'https://www.beispiel-bau.de/kontakt'
+
+
+class TestIndexUrls:
+    def test_picks_matching_segment_and_prefers_shorter_path(self):
+        result = index_urls([
+            'https://beispiel-bau.de/leistungen/geruestbau',
+            'https://beispiel-bau.de/de/rechtliches/impressum',
+            'https://beispiel-bau.de/impressum',
+            'https://beispiel-bau.de/kontakt-anfahrt',
+        ], BASE_URL)
+
+        assert result == {
+            'impressum': 'https://beispiel-bau.de/impressum',
+            'kontakt': 'https://beispiel-bau.de/kontakt-anfahrt',
+        }
+
+    def test_ignores_other_domains(self):
+        result = index_urls(['https://andere-firma.de/impressum'], BASE_URL)
+
+        assert result['impressum'] is None
+
+    def test_keyword_only_in_query_does_not_count(self):
+        result = index_urls(['https://beispiel-bau.de/?page=kontakt'], BASE_URL)
+
+        assert result['kontakt'] is None
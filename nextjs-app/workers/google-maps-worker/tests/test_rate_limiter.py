@@ -0,0 +1,117 @@
+"""Tests für den Token-Bucket-Limiter und das Parsen von Retry-After"""
+
+import threading
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+import rate_limiter
+from rate_limiter import MAX_BACKOFF_SECONDS, TokenBucketRateLimiter, parse_retry_after
+
+
+class FakeClock:
+    """Ersetzt time.monotonic/time.sleep im Limiter durch eine steuerbare Uhr"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, 'monotonic', fake.monotonic)
+    monkeypatch.setattr(rate_limiter.time, 'sleep', fake.sleep)
+    return fake
+
+
+class TestParseRetryAfter:
+    def test_seconds(self):
+        assert parse_retry_after('7') == 7.0
+        assert parse_retry_after('1.5') == 1.5
+
+    def test_negative_seconds_are_clamped(self):
+        assert parse_retry_after('-3') == 0.0
+
+    @pytest.mark.parametrize('value', [None, '', 'soon', 'Mon, 99 Foo 2024'])
+    def test_invalid(self, value):
+        assert parse_retry_after(value) is None
+
+    def test_http_date(self):
+        retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+        delay = parse_retry_after(format_datetime(retry_at, usegmt=True))
+        assert 28 <= delay <= 30
+
+    def test_http_date_in_the_past(self):
+        retry_at = datetime.now(timezone.utc) - timedelta(minutes=5)
+        assert parse_retry_after(format_datetime(retry_at, usegmt=True)) == 0.0
+
+
+class TestTokenBucketRateLimiter:
+    def test_burst_without_waiting(self, clock):
+        limiter = TokenBucketRateLimiter(rate=10, burst=5)
+        for _ in range(5):
+            limiter.acquire()
+        assert clock.slept == []
+
+    def test_waits_for_refill_after_burst(self, clock):
+        limiter = TokenBucketRateLimiter(rate=10, burst=2)
+        for _ in range(3):
+            limiter.acquire()
+        assert sum(clock.slept) == pytest.approx(0.1)
+
+    def test_throttle_halves_rate_and_blocks(self, clock):
+        limiter = TokenBucketRateLimiter(rate=8, burst=8)
+        delay = limiter.on_throttled(retry_after=2)
+
+        assert delay == 2
+        assert limiter.rate == 4
+        limiter.acquire()
+        assert sum(clock.slept) >= 2
+
+    def test_rate_never_below_minimum(self, clock):
+        limiter = TokenBucketRateLimiter(rate=4, burst=4, min_rate=1)
+        for _ in range(5):
+            limiter.on_throttled(retry_after=0)
+        assert limiter.rate == 1
+
+    def test_retry_after_is_capped(self, clock):
+        limiter = TokenBucketRateLimiter(rate=4, burst=4)
+        assert limiter.on_throttled(retry_after=3600) == MAX_BACKOFF_SECONDS
+
+    def test_backoff_without_retry_after_grows(self, clock, monkeypatch):
+        monkeypatch.setattr(rate_limiter.random, 'uniform', lambda a, b: 1.0)
+        limiter = TokenBucketRateLimiter(rate=4, burst=4)
+        assert [limiter.on_throttled() for _ in range(3)] == [0.5, 1.0, 2.0]
+
+    def test_success_increases_rate_additively_up_to_max(self, clock):
+        limiter = TokenBucketRateLimiter(rate=10, burst=10)
+        limiter.on_throttled(retry_after=0)
+        assert limiter.rate == 5
+
+        limiter.on_success()
+        assert limiter.rate == pytest.approx(5.5)
+        for _ in range(20):
+            limiter.on_success()
+        assert limiter.rate == 10
+        assert limiter.consecutive_throttles == 0
+
+    def test_acquire_is_thread_safe(self, clock):
+        limiter = TokenBucketRateLimiter(rate=10, burst=50)
+        threads = [threading.Thread(target=limiter.acquire) for _ in range(50)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Uhr steht still: genau der Burst wurde verbraucht, niemand musste warten
+        assert limiter.tokens == pytest.approx(0)
+        assert clock.slept == []
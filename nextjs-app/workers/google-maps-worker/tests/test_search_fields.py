@@ -0,0 +1,14 @@
+"""Tests für den Feldumfang der Text Search"""
+
+from worker import resolve_search_fields, search_field_mask
+
+
+class TestSearchFields:
+    def test_job_tier(self):
+        tier, fields = resolve_search_fields({'suchFelder': 'ids'})
+
+        assert tier == 'ids'
+        assert search_field_mask(fields) == 'places.id,nextPageToken'
+
+    def test_unknown_tier_falls_back_to_basis(self):
+        assert resolve_search_fields({'suchFelder': 'alles'})[0] == 'basis'
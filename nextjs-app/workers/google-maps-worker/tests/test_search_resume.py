@@ -0,0 +1,98 @@
+"""Tests für das Fortsetzen einer unterbrochenen Suche aus dem Checkpoint"""
+
+import mongomock
+import pytest
+
+import worker
+from geo_tiles import make_rectangle
+from job_state import JobCheckpoint
+from worker import GoogleMapsWorker
+
+
+class FakePlaces:
+    """Text Search mit drei Seiten à 20 Places, Seiten über pageToken adressiert"""
+
+    def __init__(self):
+        self.requests = []
+
+    def search_text(self, data, field_mask):
+        page = int(data.get('pageToken', 0))
+        self.requests.append(page)
+        places = [{'id': f"p{page * 20 + i}"} for i in range(20)]
+        return {'places': places, 'nextPageToken': str(page + 1)} if page < 2 else {'places': places}
+
+
+@pytest.fixture
+def maps_worker():
+    # Ohne Runtime: nur der Places-Client wird gebraucht
+    maps_worker = GoogleMapsWorker.__new__(GoogleMapsWorker)
+    maps_worker.places = FakePlaces()
+    return maps_worker
+
+
+@pytest.fixture
+def checkpoint():
+    jobs = mongomock.MongoClient().db.customer_import_jobs
+    job_id = jobs.insert_one({'status': 'running', 'checkpoint': JobCheckpoint.initial_state()}).inserted_id
+    return JobCheckpoint(jobs, str(job_id), JobCheckpoint.initial_state())
+
+
+class TestQueryPages:
+    def test_cursor_follows_pages(self, maps_worker):
+        cursors = [cursor for _, cursor in maps_worker.iter_query_pages('Maler', 'Köln', 60, False)]
+
+        assert cursors == [{'pageToken': '1'}, {'pageToken': '2'}, {'done': True}]
+
+    def test_resumes_at_saved_page(self, maps_worker):
+        pages = list(maps_worker.iter_query_pages('Maler', 'Köln', 50, False, cursor={'found': 20, 'pageToken': '1'}))
+
+        assert maps_worker.places.requests == [1, 2]
+        # Nur noch 30 bis max_results
+        assert [len(places) for places, _ in pages] == [20, 10]
+        assert pages[-1][1] == {'done': True}
+
+    def test_tiled_search_resumes_with_open_tiles(self, maps_worker, monkeypatch):
+        searched = []
+        tile = make_rectangle(0.0, 0.0, 0.1, 0.1)
+
+        def search_tile(query, rectangle, fields=None):
+            searched.append(rectangle)
+            return [{'id': 'known'}, {'id': 'neu'}]
+
+        def geocode_viewport(location):
+            raise AssertionError('Viewport ist bereits gekachelt')
+
+        monkeypatch.setattr(maps_worker, 'search_tile', search_tile, raising=False)
+        monkeypatch.setattr(maps_worker, 'geocode_viewport', geocode_viewport, raising=False)
+        cursor = {'found': 1, 'tiles': [{'tile': tile, 'depth': 1}]}
+
+        pages = list(maps_worker.iter_query_pages('Maler', 'Köln', 100, True, cursor=cursor, seen={'known'}))
+
+        assert searched == [tile]
+        assert pages == [([{'id': 'neu'}], {'done': True})]
+
+
+class TestJobPlaceBatches:
+    def test_skips_finished_queries_and_continues_interrupted_one(self, maps_worker, checkpoint, monkeypatch):
+        monkeypatch.setattr(worker, 'SEARCH_PAGE_SIZE', 20)
+        checkpoint.add_places(0, [{'id': 'a1'}], cursor={'found': 1, 'unique': 1, 'done': True})
+        checkpoint.add_places(1, [{'id': f"p{i}"} for i in range(20)], cursor={'found': 20, 'unique': 20, 'pageToken': '1'})
+        resumed = JobCheckpoint(checkpoint.collection, str(checkpoint.job_id), checkpoint.collection.find_one()['checkpoint'])
+        query_stats = []
+
+        batches = list(maps_worker.iter_job_place_batches(
+            [('Maler', 'Köln'), ('Maler', 'Bonn')], 60, False, query_stats, checkpoint=resumed
+        ))
+
+        assert maps_worker.places.requests == [1, 2]
+        assert [(index, len(places)) for index, places, _ in batches] == [(1, 20), (1, 20)]
+        assert batches[-1][2] == {'found': 60, 'unique': 60, 'done': True}
+        assert [stats['found'] for stats in query_stats] == [1, 60]
+
+    def test_cursor_is_saved_with_the_places_before_it(self, checkpoint):
+        checkpoint.add_places(0, [{'id': 'p1'}], cursor={'found': 1, 'unique': 1, 'pageToken': 'next'})
+        checkpoint.add_places(0, [], cursor={'found': 1, 'unique': 1, 'done': True})
+
+        state = checkpoint.collection.find_one()['checkpoint']
+        assert state['places'] == [{'id': 'p1', 'q': 0}]
+        assert state['queries'] == {'0': {'found': 1, 'unique': 1, 'done': True}}
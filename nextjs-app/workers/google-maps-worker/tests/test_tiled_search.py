@@ -0,0 +1,78 @@
+"""Tests für die Kachelung von Suchgebieten und die gekachelte Suche"""
+
+import threading
+
+import pytest
+
+import worker
+from geo_tiles import make_rectangle, split_rectangle
+from worker import GoogleMapsWorker
+
+
+class TestSplitRectangle:
+    def test_grid_covers_area_row_by_row(self):
+        tiles = split_rectangle(make_rectangle(52.0, 13.0, 53.0, 14.0), 2, 2)
+
+        assert tiles == [
+            make_rectangle(52.0, 13.0, 52.5, 13.5),
+            make_rectangle(52.0, 13.5, 52.5, 14.0),
+            make_rectangle(52.5, 13.0, 53.0, 13.5),
+            make_rectangle(52.5, 13.5, 53.0, 14.0),
+        ]
+
+    def test_tiles_share_edges(self):
+        tiles = split_rectangle(make_rectangle(0.0, 0.0, 0.9, 0.9), 3, 3)
+
+        for left, right in zip(tiles, tiles[1:]):
+            if left['low']['latitude'] == right['low']['latitude']:
+                assert left['high']['longitude'] == pytest.approx(right['low']['longitude'])
+
+    def test_invalid_grid_is_one_tile(self):
+        rectangle = make_rectangle(1.0, 2.0, 3.0, 4.0)
+
+        assert split_rectangle(rectangle, 0, -1) == [rectangle]
+
+
+class TestTiledSearch:
+    """iter_tiled_places mit geokodiertem Viewport und simulierten Kachel-Suchen"""
+
+    @pytest.fixture
+    def tiled_worker(self, monkeypatch):
+        monkeypatch.setattr(worker, 'SEARCH_TILE_GRID', 3)
+        monkeypatch.setattr(worker, 'SEARCH_TILE_MAX_DEPTH', 3)
+        monkeypatch.setattr(worker, 'SEARCH_TILE_CONCURRENCY', 2)
+
+        searched = []
+        lock = threading.Lock()
+
+        def search_tile(query, tile, fields=None):
+            south, west = tile['low']['latitude'], tile['low']['longitude']
+            width = tile['high']['longitude'] - west
+            with lock:
+                searched.append(width)
+            places = [{'id': f"tile-{south:.4f}-{west:.4f}"}]
+            # Dichte Ecke im Südwesten: volle Kacheln bis zu einer Breite von 0,1
+            if south == 0 and west == 0 and width > 0.1:
+                places += [{'id': f"dense-{i}"} for i in range(worker.TEXT_SEARCH_MAX_RESULTS - 1)]
+            return places
+
+        # Ohne Runtime: nur die für die Kachelung nötigen Methoden
+        maps_worker = GoogleMapsWorker.__new__(GoogleMapsWorker)
+        monkeypatch.setattr(maps_worker, 'geocode_viewport', lambda location: make_rectangle(0.0, 0.0, 0.9, 0.9), raising=False)
+        monkeypatch.setattr(maps_worker, 'search_tile', search_tile, raising=False)
+        return maps_worker, searched
+
+    def test_full_tiles_are_split_and_places_deduplicated(self, tiled_worker):
+        maps_worker, searched = tiled_worker
+
+        ids = [place['id'] for place in maps_worker.iter_tiled_places('Maler', 'Berlin', 1000)]
+
+        # 9 Kacheln, volle Südwest-Kachel -> 4, deren Südwest-Kachel -> 4
+        assert len(searched) == 17
+        assert len(ids) == len(set(ids))
+        assert sum(1 for place_id in ids if place_id.startswith('dense-')) == worker.TEXT_SEARCH_MAX_RESULTS - 1
+
+    def test_stops_at_max_results(self, tiled_worker):
+        maps_worker, _ = tiled_worker
+
+        assert len(list(maps_worker.iter_tiled_places('Maler', 'Berlin', 5))) == 5
@@ -0,0 +1,58 @@
+"""Tests für die Cache-Revalidierung der Website-Analyse (MongoDB per mongomock)"""
+
+import mongomock
+import pytest
+
+from page_fetcher import FetchedPage
+from website_analyzer import WebsiteAnalyzer
+from website_cache import WebsiteAnalysisCache
+
+URL = 'https://www.beispiel-bau.de/'
+CACHED_RESULT = {
+    'beschreibung': 'Gerüstbau seit 1990',
+    'dienstleistungen': [],
+    'extractedEmails': ['info@beispiel-bau.de'],
+    'extractedPhones': [],
+    'ansprechpartner': [],
+    'truncatedPages': []
+}
+
+
+@pytest.fixture
+def cache():
+    cache = WebsiteAnalysisCache(mongomock.MongoClient().db.website_analysis_cache, 3600)
+    cache.set('beispiel-bau.de', URL, CACHED_RESULT, '"v1"', None, 'hash-v1')
+    return cache
+
+
+@pytest.fixture
+def analyzer(cache):
+    analyzer = WebsiteAnalyzer(cache=cache, discover_subpages=False, respect_crawl_delay=False)
+    yield analyzer
+    analyzer.close()
+
+
+class TestRevalidation:
+    def test_unreachable_site_returns_cached_result(self, analyzer, cache, monkeypatch):
+        monkeypatch.setattr(analyzer.fetcher, 'fetch', lambda *args, **kwargs: None)
+
+        assert analyzer.analyze_website(URL) == CACHED_RESULT
+        # Der gute Eintrag bleibt erhalten
+        assert cache.get('beispiel-bau.de')['result'] == CACHED_RESULT
+
+    def test_not_modified_returns_cached_result(self, analyzer, monkeypatch):
+        not_modified = FetchedPage(URL, 304, '', False, '"v1"', None, None)
+        monkeypatch.setattr(analyzer.fetcher, 'fetch', lambda *args, **kwargs: not_modified)
+
+        assert analyzer.analyze_website(URL) == CACHED_RESULT
+
+    def test_changed_page_replaces_cached_result(self, analyzer, cache, monkeypatch):
+        html = '<html><head><meta name="description" content="Neu"></head><body>neu@beispiel-bau.de</body></html>'
+        changed = FetchedPage(URL, 200, html, False, '"v2"', None, 'hash-v2')
+        monkeypatch.setattr(analyzer.fetcher, 'fetch', lambda *args, **kwargs: changed)
+
+        result = analyzer.analyze_website(URL)
+
+        assert result['beschreibung'] == 'Neu'
+        assert result['extractedEmails'] == ['neu@beispiel-bau.de']
+        assert cache.get('beispiel-bau.de')['etag'] == '"v2"'
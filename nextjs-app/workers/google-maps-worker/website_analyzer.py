@@ -3,64 +3,229 @@ Website-Analyzer für Kunden-Import
 Extrahiert E-Mails, Telefonnummern, Ansprechpartner und Unternehmensinformationen
 """
 
-import re
+import time
+import threading
 import requests
-from bs4 import BeautifulSoup
-from typing import Dict, List, Optional
-from urllib.parse import urljoin, urlparse
+from requests.adapters import HTTPAdapter
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
 import logging
+from website_cache import WebsiteAnalysisCache, cache_key, normalize_domain
+from page_parser import PAGE_CONTACT, PAGE_HOME, PageParser
+from page_fetcher import FetchedPage, PageFetcher
+from page_discovery import SubpageDiscovery
+from crawl_scheduler import CrawlScheduler, CrawlSlot
+from link_index import LINK_KEYWORDS
+from metrics import CACHE_LOOKUPS, SUBPAGES_FOUND
 
 logger = logging.getLogger(__name__)
 
+SOURCE_LINK = 'link'
+
+
+class SubpageFetches:
+    """
+    Abrufe der Impressum-/Kontakt-Seiten einer Analyse
+
+    Kandidaten kommen aus den Links der Startseite und aus der
+    SubpageDiscovery; jede Seite wird nur einmal geladen, egal wer sie
+    zuerst meldet. Nach close() werden keine Abrufe mehr gestartet.
+    """
+
+    def __init__(self, submit: Callable[[str], Future]):
+        self.submit = submit
+        # Quelle des ersten Funds pro Seitentyp
+        self.sources: Dict[str, str] = {}
+        self._pages: List[Tuple[int, int, Future]] = []
+        self._keys = set()
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def start(self, kind: str, url: str, source: str):
+        key = (normalize_domain(url), urlparse(url).path.rstrip('/').lower())
+        with self._lock:
+            if self._closed:
+                return
+            self.sources.setdefault(kind, source)
+            if key in self._keys:
+                return
+            self._keys.add(key)
+            rank = list(LINK_KEYWORDS).index(kind)
+            self._pages.append((rank, len(self._pages), self.submit(url)))
+
+    def covers_all(self) -> bool:
+        with self._lock:
+            return all(kind in self.sources for kind in LINK_KEYWORDS)
+
+    def close(self) -> List[Future]:
+        """Beendet die Annahme und liefert die Abrufe (erst Impressum, dann Kontakt)"""
+        with self._lock:
+            self._closed = True
+            return [future for _, _, future in sorted(self._pages, key=lambda page: page[:2])]
+
+
 class WebsiteAnalyzer:
-    def __init__(self, timeout: int = 10):
+    def __init__(
+        self,
+        timeout: int = 10,
+        cache: Optional[WebsiteAnalysisCache] = None,
+        site_budget: float = 15.0,
+        max_workers: int = 16,
+        parser: Optional[PageParser] = None,
+        max_page_bytes: int = 2 * 1024 * 1024,
+        discover_subpages: bool = True,
+        host_concurrency: int = 2,
+        ip_concurrency: int = 0,
+        host_min_gap: float = 0.2,
+        respect_crawl_delay: bool = True,
+        max_crawl_delay: float = 10.0
+    ):
         self.timeout = timeout
+        self.cache = cache
+        # Parsing/Extraktion getrennt vom Download (ggf. im Prozess-Pool)
+        self.parser = parser or PageParser()
+        # Gesamtbudget pro Website (Sekunden) über alle Seitenabrufe
+        self.site_budget = site_budget
+        # Unterseiten (Impressum/Kontakt) werden parallel geladen
+        self.page_executor = ThreadPoolExecutor(max_workers=max_workers)
+        # Eigener Pool für die Suche nach Unterseiten: sie läuft bis zu einem
+        # Fund bzw. Budgetende und soll keine Unterseiten-Abrufe verdrängen
+        self.discovery_executor = ThreadPoolExecutor(max_workers=max_workers) if discover_subpages else None
         self.session = requests.Session()
+        # Viele verschiedene Hosts, jeweils wenige Verbindungen
+        adapter = HTTPAdapter(pool_connections=max_workers * 4, pool_maxsize=max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
+        # Höfliche Abrufe: Slots pro Host/IP, Mindestabstand, Crawl-delay
+        self.scheduler = CrawlScheduler(
+            self.session,
+            max_per_host=host_concurrency,
+            max_per_ip=ip_concurrency,
+            min_gap=host_min_gap,
+            respect_robots=respect_crawl_delay,
+            max_crawl_delay=max_crawl_delay
+        )
+        # Streaming-Abruf mit Größenlimit, nur HTML
+        self.fetcher = PageFetcher(self.session, timeout, max_page_bytes, scheduler=self.scheduler)
+        # Impressum/Kontakt zusätzlich über sitemap.xml und übliche Pfade finden
+        self.discovery = SubpageDiscovery(self.fetcher) if discover_subpages else None
+    
+    def close(self):
+        """Beendet Thread-/Prozess-Pool und schließt die HTTP-Session"""
+        self.page_executor.shutdown(wait=False, cancel_futures=True)
+        if self.discovery_executor:
+            self.discovery_executor.shutdown(wait=False, cancel_futures=True)
+        self.scheduler.close()
+        self.parser.close()
+        self.session.close()
     
     def analyze_website(self, url: str) -> Dict:
         """
         Analysiert eine Website und extrahiert alle relevanten Informationen
         
+        Ist die Website (Domain + Pfad) im Cache, wird nur die Startseite bedingt abgefragt
+        (If-None-Match/If-Modified-Since). Bei 304 oder unverändertem Inhalt
+        wird das gespeicherte Ergebnis ohne weitere Seitenabrufe geliefert,
+        ebenso wenn die Startseite nicht geladen werden kann.
+        
+        Ohne Cache-Eintrag sucht die SubpageDiscovery Impressum und Kontakt
+        (sitemap.xml, HEAD auf übliche Pfade) parallel zum Abruf der
+        Startseite; gefundene Seiten werden sofort geladen. Die Links der
+        Startseite ergänzen diese Kandidaten. Die gesamte Analyse ist durch
+        das Website-Budget (site_budget) begrenzt.
+        
         Returns:
-            Dict mit beschreibung, dienstleistungen, extractedEmails, extractedPhones, ansprechpartner
+            Dict mit beschreibung, dienstleistungen, extractedEmails, extractedPhones,
+            ansprechpartner und truncatedPages (abgeschnittene Seiten)
         """
         result = {
             'beschreibung': None,
             'dienstleistungen': [],
             'extractedEmails': [],
             'extractedPhones': [],
-            'ansprechpartner': []
+            'ansprechpartner': [],
+            'truncatedPages': []
         }
         
+        site_key = cache_key(url)
+        cached = self.cache.get(site_key) if self.cache and site_key else None
+        deadline = time.monotonic() + self.site_budget
+        # Unterseiten warten beim CrawlScheduler, nicht in einem Pool-Thread
+        subpages = SubpageFetches(lambda page_url: self.scheduler.submit(
+            self.page_executor, page_url, deadline, self._fetch_page, page_url, deadline, result
+        ))
+        stop_discovery = threading.Event()
+        
         try:
-            # Hauptseite analysieren
-            main_content = self._fetch_page(url)
+            # Impressum/Kontakt parallel zur Startseite suchen (bei Cache-Eintrag
+            # ist die Startseite meist unverändert, die Suche wäre umsonst)
+            discovery = None
+            if self.discovery and not cached:
+                discovery = self.discovery_executor.submit(
+                    self.discovery.discover, url, deadline, subpages.start, stop_discovery
+                )
+            
+            # Hauptseite laden (bedingt, falls im Cache)
+            response = self.fetcher.fetch(url, self._conditional_headers(cached), deadline)
+            
+            if cached and response is None:
+                # Website nicht erreichbar (Timeout, DNS, 5xx): altes Ergebnis
+                # liefern statt es mit einer leeren Analyse zu überschreiben
+                logger.info(f"♻️ Website nicht erreichbar, nutze Cache: {site_key}")
+                CACHE_LOOKUPS.labels('website', 'stale_hit').inc()
+                return cached['result']
+            
+            if cached:
+                content_hash = response.content_hash
+                if response.status_code == 304 or (content_hash and content_hash == cached.get('contentHash')):
+                    logger.info(f"♻️ Website unverändert, nutze Cache: {site_key}")
+                    CACHE_LOOKUPS.labels('website', 'revalidated').inc()
+                    self.cache.mark_revalidated(site_key)
+                    return cached['result']
+            
+            if self.cache and site_key:
+                CACHE_LOOKUPS.labels('website', 'stale' if cached else 'miss').inc()
+            
+            main_content = self._parse(response, PAGE_HOME, result)
+            if main_content:
+                result['beschreibung'] = main_content['beschreibung']
+                result['dienstleistungen'] = main_content['dienstleistungen']
+                result['extractedEmails'].extend(main_content['emails'])
+                result['extractedPhones'].extend(main_content['phones'])
+            
+            # Links der Startseite mit den Funden der Suche abgleichen
+            # (bereits geladene Seiten werden nicht erneut abgerufen)
             if main_content:
-                result['beschreibung'] = self._extract_description(main_content)
-                result['dienstleistungen'] = self._extract_services(main_content)
-                result['extractedEmails'].extend(self._extract_emails(main_content))
-                result['extractedPhones'].extend(self._extract_phones(main_content))
-            
-            # Impressum/Kontakt-Seiten finden und analysieren
-            impressum_url = self._find_impressum(url, main_content)
-            if impressum_url:
-                impressum_content = self._fetch_page(impressum_url)
-                if impressum_content:
-                    result['extractedEmails'].extend(self._extract_emails(impressum_content))
-                    result['extractedPhones'].extend(self._extract_phones(impressum_content))
-                    result['ansprechpartner'].extend(self._extract_contacts(impressum_content))
-            
-            # Kontakt-Seite finden und analysieren
-            kontakt_url = self._find_kontakt(url, main_content)
-            if kontakt_url and kontakt_url != impressum_url:
-                kontakt_content = self._fetch_page(kontakt_url)
-                if kontakt_content:
-                    result['extractedEmails'].extend(self._extract_emails(kontakt_content))
-                    result['extractedPhones'].extend(self._extract_phones(kontakt_content))
-                    result['ansprechpartner'].extend(self._extract_contacts(kontakt_content))
+                for kind, key in (('impressum', 'impressumUrl'), ('kontakt', 'kontaktUrl')):
+                    if main_content[key]:
+                        subpages.start(kind, main_content[key], SOURCE_LINK)
+            
+            # Fehlt noch ein Seitentyp, auf die Suche warten (im Budget)
+            if discovery is not None and not subpages.covers_all():
+                wait([discovery], timeout=max(deadline - time.monotonic(), 0))
+            stop_discovery.set()
+            
+            futures = subpages.close()
+            for kind in LINK_KEYWORDS:
+                SUBPAGES_FOUND.labels(kind, subpages.sources.get(kind, 'none')).inc()
+            
+            done, not_done = wait(futures, timeout=max(deadline - time.monotonic(), 0))
+            
+            for future in not_done:
+                future.cancel()
+            if not_done:
+                logger.warning(f"⏱️ Website-Budget überschritten: {url}")
+            
+            # Reihenfolge beibehalten: erst Impressum, dann Kontakt
+            for future in futures:
+                if future in done:
+                    subpage_content = future.result()
+                    if subpage_content:
+                        self._collect_contact_data(result, subpage_content)
             
             # Duplikate entfernen
             result['extractedEmails'] = list(set(result['extractedEmails']))
@@ -78,174 +243,52 @@ class WebsiteAnalyzer:
             
             logger.info(f"✅ Website-Analyse: {len(result['extractedEmails'])} E-Mails, {len(result['extractedPhones'])} Telefone, {len(result['ansprechpartner'])} Ansprechpartner")
             
+            # Nur vollständige Analysen cachen
+            if self.cache and site_key and main_content and not not_done:
+                self.cache.set(
+                    site_key,
+                    url,
+                    result,
+                    response.etag,
+                    response.last_modified,
+                    response.content_hash
+                )
+            
         except Exception as e:
             logger.error(f"❌ Fehler bei Website-Analyse: {e}")
+        finally:
+            stop_discovery.set()
+            subpages.close()
         
         return result
     
-    def _fetch_page(self, url: str) -> Optional[BeautifulSoup]:
-        """Lädt eine Seite und gibt BeautifulSoup-Objekt zurück"""
-        try:
-            response = self.session.get(url, timeout=self.timeout, allow_redirects=True)
-            response.raise_for_status()
-            return BeautifulSoup(response.content, 'lxml')
-        except Exception as e:
-            logger.warning(f"Konnte Seite nicht laden: {url} - {e}")
-            return None
+    def _fetch_page(self, slot: CrawlSlot, url: str, deadline: Optional[float], result: Dict) -> Optional[Dict]:
+        """Lädt eine Impressum-/Kontakt-Seite und gibt die extrahierten Daten zurück"""
+        return self._parse(self.fetcher.fetch(url, deadline=deadline, slot=slot), PAGE_CONTACT, result)
     
-    def _find_impressum(self, base_url: str, soup: Optional[BeautifulSoup]) -> Optional[str]:
-        """Findet die Impressum-Seite"""
-        if not soup:
+    def _parse(self, page: Optional[FetchedPage], kind: str, result: Dict) -> Optional[Dict]:
+        """Übergibt den Inhalt einer Seite an die Parse-Stufe"""
+        if page is None or page.status_code == 304 or not page.text:
             return None
-        
-        # Suche nach Impressum-Links
-        impressum_keywords = ['impressum', 'imprint', 'legal', 'rechtliches']
-        for link in soup.find_all('a', href=True):
-            href = link['href'].lower()
-            text = link.get_text().lower()
-            
-            if any(kw in href or kw in text for kw in impressum_keywords):
-                return urljoin(base_url, link['href'])
-        
-        return None
+        if page.truncated:
+            result['truncatedPages'].append(page.url)
+        return self.parser.parse(page.text, page.url, kind)
     
-    def _find_kontakt(self, base_url: str, soup: Optional[BeautifulSoup]) -> Optional[str]:
-        """Findet die Kontakt-Seite"""
-        if not soup:
+    @staticmethod
+    def _conditional_headers(cached: Optional[Dict]) -> Optional[Dict]:
+        """Baut Header für eine bedingte Anfrage aus einem Cache-Eintrag"""
+        if not cached:
             return None
         
-        # Suche nach Kontakt-Links
-        kontakt_keywords = ['kontakt', 'contact', 'ansprechpartner']
-        for link in soup.find_all('a', href=True):
-            href = link['href'].lower()
-            text = link.get_text().lower()
-            
-            if any(kw in href or kw in text for kw in kontakt_keywords):
-                return urljoin(base_url, link['href'])
-        
-        return None
+        headers = {}
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('lastModified'):
+            headers['If-Modified-Since'] = cached['lastModified']
+        return headers or None
     
-    def _extract_description(self, soup: BeautifulSoup) -> Optional[str]:
-        """Extrahiert Unternehmensbeschreibung"""
-        # Meta-Description
-        meta_desc = soup.find('meta', attrs={'name': 'description'})
-        if meta_desc and meta_desc.get('content'):
-            return meta_desc['content'].strip()[:300]
-        
-        # Erster großer Textblock
-        for tag in soup.find_all(['p', 'div'], class_=re.compile('about|description|intro|hero', re.I)):
-            text = tag.get_text(strip=True)
-            if len(text) > 100:
-                return text[:300]
-        
-        return None
-    
-    def _extract_services(self, soup: BeautifulSoup) -> List[str]:
-        """Extrahiert Dienstleistungen"""
-        services = []
-        
-        # Suche nach "Leistungen", "Services", "Was wir tun" Sektionen
-        keywords = ['leistung', 'service', 'angebot', 'produkt']
-        for section in soup.find_all(['div', 'section'], class_=re.compile('|'.join(keywords), re.I)):
-            # Finde Listenelemente
-            for item in section.find_all(['li', 'h3', 'h4']):
-                text = item.get_text(strip=True)
-                if 10 < len(text) < 100:
-                    services.append(text)
-        
-        return services[:10]  # Maximal 10 Dienstleistungen
-    
-    def _extract_emails(self, soup: BeautifulSoup) -> List[str]:
-        """Extrahiert E-Mail-Adressen"""
-        emails = []
-        text = soup.get_text()
-        
-        # Regex für E-Mails
-        email_pattern = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
-        found_emails = re.findall(email_pattern, text)
-        
-        # Filtere gängige Spam/Placeholder-E-Mails
-        blacklist = ['example.com', 'domain.com', 'email.com', 'test.com', 'placeholder']
-        for email in found_emails:
-            if not any(bl in email.lower() for bl in blacklist):
-                emails.append(email.lower())
-        
-        return emails
-    
-    def _extract_phones(self, soup: BeautifulSoup) -> List[str]:
-        """Extrahiert Telefonnummern"""
-        phones = []
-        text = soup.get_text()
-        
-        # Verschiedene Telefon-Formate
-        phone_patterns = [
-            r'\+49[\s-]?\d{2,4}[\s-]?\d{3,9}',  # +49 ...
-            r'0\d{2,5}[\s-]?\d{3,9}',            # 0123 ...
-            r'\(\d{2,5}\)[\s-]?\d{3,9}',         # (0123) ...
-        ]
-        
-        for pattern in phone_patterns:
-            found_phones = re.findall(pattern, text)
-            phones.extend(found_phones)
-        
-        # Normalisiere Telefonnummern
-        normalized = []
-        for phone in phones:
-            # Entferne Whitespace und Bindestriche
-            clean = re.sub(r'[\s-]', '', phone)
-            if 6 <= len(clean) <= 20:  # Plausible Länge
-                normalized.append(clean)
-        
-        return normalized
-    
-    def _extract_contacts(self, soup: BeautifulSoup) -> List[Dict]:
-        """Extrahiert Ansprechpartner (Name, Position, E-Mail, Telefon)"""
-        contacts = []
-        
-        # Suche nach strukturierten Kontakt-Informationen
-        # Typische Muster: Name + Position + Kontaktdaten
-        
-        # Strategie: Finde Abschnitte mit Namen (oft in <strong>, <b>, <h3>, <h4>)
-        for elem in soup.find_all(['div', 'section', 'article', 'p']):
-            text = elem.get_text(separator='\n', strip=True)
-            lines = [line.strip() for line in text.split('\n') if line.strip()]
-            
-            # Suche nach Namens-Mustern (Vorname Nachname)
-            name_pattern = r'([A-ZÄÖÜ][a-zäöüß]+)\s+([A-ZÄÖÜ][a-zäöüß]+)'
-            
-            for i, line in enumerate(lines):
-                match = re.search(name_pattern, line)
-                if match and len(line) < 50:  # Nicht zu lang
-                    name = match.group(0)
-                    
-                    # Suche Position in nächster Zeile
-                    position = None
-                    if i + 1 < len(lines):
-                        next_line = lines[i + 1]
-                        # Typische Positionen
-                        position_keywords = ['geschäftsführer', 'leiter', 'inhaber', 'manager', 'direktor', 'chef']
-                        if any(kw in next_line.lower() for kw in position_keywords):
-                            position = next_line
-                    
-                    # Suche E-Mail und Telefon in den nächsten Zeilen
-                    email = None
-                    telefon = None
-                    for j in range(i, min(i + 5, len(lines))):
-                        if '@' in lines[j]:
-                            emails = self._extract_emails(BeautifulSoup(lines[j], 'html.parser'))
-                            if emails:
-                                email = emails[0]
-                        if re.search(r'[\d\+\(\)]', lines[j]):
-                            phones = self._extract_phones(BeautifulSoup(lines[j], 'html.parser'))
-                            if phones:
-                                telefon = phones[0]
-                    
-                    contacts.append({
-                        'name': name,
-                        'position': position,
-                        'email': email,
-                        'telefon': telefon
-                    })
-        
-        return contacts[:5]  # Maximal 5 Ansprechpartner
-
+    def _collect_contact_data(self, result: Dict, page: Dict):
+        """Übernimmt E-Mails, Telefonnummern und Ansprechpartner einer Unterseite"""
+        result['extractedEmails'].extend(page['emails'])
+        result['extractedPhones'].extend(page['phones'])
+        result['ansprechpartner'].extend(page['ansprechpartner'])
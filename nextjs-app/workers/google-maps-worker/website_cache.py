@@ -0,0 +1,139 @@
+"""
+Persistenter Cache für Website-Analysen
+Schlüssel ist die normalisierte URL (Domain + Pfad), Revalidierung über
+ETag/Last-Modified
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+from urllib.parse import urlparse
+from pymongo.collection import Collection
+from pymongo.errors import PyMongoError
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_domain(url: str) -> Optional[str]:
+    """
+    Normalisiert eine URL auf ihre Domain (ohne www., Port und Schema)
+
+    Beispiel: "https://WWW.Beispiel-Bau.de:443/kontakt" -> "beispiel-bau.de"
+    """
+    if not url:
+        return None
+
+    if '://' not in url:
+        url = f"http://{url}"
+
+    host = (urlparse(url).hostname or '').lower().rstrip('.')
+    if host.startswith('www.'):
+        host = host[4:]
+
+    return host or None
+
+
+def cache_key(url: str) -> Optional[str]:
+    """
+    Cache-Schlüssel einer Website: normalisierte Domain plus Pfad und Query
+
+    Auf geteilten Hosts (facebook.com/..., sites.google.com/..., Baukasten-
+    Unterpfade) gehören verschiedene Pfade verschiedenen Firmen. Für
+    Startseiten entspricht der Schlüssel der Domain.
+
+    Beispiel: "https://www.facebook.com/BeispielBau/" -> "facebook.com/BeispielBau"
+    """
+    domain = normalize_domain(url)
+    if not domain:
+        return None
+
+    if '://' not in url:
+        url = f"http://{url}"
+    parsed = urlparse(url)
+    key = domain + parsed.path.rstrip('/')
+    if parsed.query:
+        key += f"?{parsed.query}"
+    return key
+
+
+class WebsiteAnalysisCache:
+    """
+    Speichert Analyse-Ergebnisse pro Website (cache_key) in MongoDB
+
+    Einträge verfallen nach `max_age_seconds` (TTL-Index auf `expiresAt`);
+    innerhalb dieser Zeit wird nur die Startseite bedingt abgefragt.
+    Fehler der Datenbank werden als Cache-Miss behandelt.
+    """
+
+    def __init__(self, collection: Collection, max_age_seconds: int):
+        self.collection = collection
+        self.max_age_seconds = max_age_seconds
+        self._ensure_indexes()
+
+    def _ensure_indexes(self):
+        try:
+            self.collection.create_index('expiresAt', expireAfterSeconds=0)
+        except PyMongoError as e:
+            logger.warning(f"⚠️ TTL-Index für Website-Cache konnte nicht angelegt werden: {e}")
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Liefert den Cache-Eintrag einer Website
+
+        Einträge, deren gespeicherte URL nicht zum Schlüssel passt (ältere,
+        nur nach Domain abgelegte Analysen), gelten als Miss.
+
+        Returns:
+            Dict mit result, etag, lastModified, contentHash oder None
+        """
+        try:
+            entry = self.collection.find_one({
+                '_id': key,
+                'expiresAt': {'$gt': datetime.now(timezone.utc)}
+            })
+        except PyMongoError as e:
+            logger.warning(f"⚠️ Website-Cache nicht lesbar: {e}")
+            return None
+
+        if entry and cache_key(entry.get('url') or '') != key:
+            return None
+        return entry
+
+    def set(
+        self,
+        key: str,
+        url: str,
+        result: Dict,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        content_hash: Optional[str]
+    ):
+        """Speichert ein Analyse-Ergebnis samt Validatoren der Startseite"""
+        now = datetime.now(timezone.utc)
+        try:
+            self.collection.replace_one(
+                {'_id': key},
+                {
+                    'url': url,
+                    'result': result,
+                    'etag': etag,
+                    'lastModified': last_modified,
+                    'contentHash': content_hash,
+                    'analyzedAt': now,
+                    'revalidatedAt': now,
+                    'expiresAt': now + timedelta(seconds=self.max_age_seconds)
+                },
+                upsert=True
+            )
+        except PyMongoError as e:
+            logger.warning(f"⚠️ Website-Cache nicht beschreibbar: {e}")
+
+    def mark_revalidated(self, key: str):
+        """Vermerkt eine erfolgreiche Revalidierung (verlängert die Gültigkeit nicht)"""
+        try:
+            self.collection.update_one(
+                {'_id': key},
+                {'$set': {'revalidatedAt': datetime.now(timezone.utc)}}
+            )
+        except PyMongoError as e:
+            logger.warning(f"⚠️ Website-Cache nicht beschreibbar: {e}")
@@ -8,12 +8,28 @@ import os
 import sys
 import time
 import requests
-from typing import List, Dict, Optional
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from itertools import chain, groupby
+from typing import List, Dict, Iterator, Optional, Set, Tuple
 from pymongo import MongoClient
 from bson import ObjectId
 from dotenv import load_dotenv
 import logging
 from website_analyzer import WebsiteAnalyzer
+from page_parser import PageParser
+from website_cache import WebsiteAnalysisCache
+from rate_limiter import TokenBucketRateLimiter
+from places_client import PlacesClient
+from place_cache import CacheStats, LRUCache, PlaceDetailsCache
+from known_places import KnownPlacesRegistry
+from geo_tiles import split_rectangle
+from job_queue import JobLease
+from job_state import CancellationWatcher, JobCheckpoint, ProgressReporter, ResultWriter
+from job_events import EVENT_STATUS, JobEventBus, JobEventChannel
+from metrics import (
+    CACHE_LOOKUPS, JOB_PHASE_SECONDS, PHASE_DETAILS, PHASE_SEARCH, PHASE_SECONDS
+)
 
 # Logging konfigurieren
 logging.basicConfig(
@@ -26,89 +42,623 @@ logger = logging.getLogger(__name__)
 load_dotenv()
 
 # Konfiguration
-GOOGLE_MAPS_API_KEY = os.getenv('GOOGLE_MAPS_API_KEY')
-MONGODB_URI = os.getenv('MONGODB_URI')
 MONGODB_DB = os.getenv('MONGODB_DB', 'geruestbau_erp')
 
-# API Endpoints
-PLACES_SEARCH_URL = 'https://places.googleapis.com/v1/places:searchText'
-PLACE_DETAILS_URL = 'https://places.googleapis.com/v1/places'
+# Verbindungspool für MongoDB (geteilt von allen Jobs des Prozesses)
+MONGODB_MAX_POOL_SIZE = int(os.getenv('MONGODB_MAX_POOL_SIZE', '50'))
 
-class GoogleMapsWorker:
-    def __init__(self):
-        """Initialize worker with MongoDB and Google Maps API"""
-        if not GOOGLE_MAPS_API_KEY:
+# Anzahl paralleler Place-Details-Abfragen (inkl. Website-Analyse) pro Job
+DETAILS_CONCURRENCY = int(os.getenv('DETAILS_CONCURRENCY', '8'))
+
+# Google API Rate Limiting (prozessweit, gilt für alle parallelen Jobs)
+GOOGLE_API_QPS = float(os.getenv('GOOGLE_API_QPS', '10'))
+GOOGLE_API_BURST = int(os.getenv('GOOGLE_API_BURST', '20'))
+GOOGLE_API_MAX_RETRIES = int(os.getenv('GOOGLE_API_MAX_RETRIES', '4'))
+
+# Places-API-Client: Timeouts pro Anfrage (Sekunden) und Keep-Alive-Verbindungen im Pool
+PLACES_CONNECT_TIMEOUT = float(os.getenv('PLACES_CONNECT_TIMEOUT', '5'))
+PLACES_READ_TIMEOUT = float(os.getenv('PLACES_READ_TIMEOUT', '15'))
+PLACES_POOL_SIZE = int(os.getenv('PLACES_POOL_SIZE', str(DETAILS_CONCURRENCY * 4)))
+
+# Place-Details-Cache (In-Process-LRU + MongoDB mit TTL)
+PLACE_CACHE_MAX_ENTRIES = int(os.getenv('PLACE_CACHE_MAX_ENTRIES', '10000'))
+PLACE_CACHE_TTL_SECONDS = int(os.getenv('PLACE_CACHE_TTL_SECONDS', str(30 * 24 * 3600)))
+
+# Website-Analyse-Cache (pro Domain, Revalidierung über ETag/Last-Modified)
+WEBSITE_CACHE_MAX_AGE_SECONDS = int(os.getenv('WEBSITE_CACHE_MAX_AGE_SECONDS', str(14 * 24 * 3600)))
+
+# Bereits angereicherte Places (jobübergreifend) innerhalb dieses Zeitraums
+# nicht erneut abrufen (0 = aus); 'reuse' übernimmt das gespeicherte
+# Ergebnis, 'skip' lässt den Place im neuen Job weg
+KNOWN_PLACES_MAX_AGE_SECONDS = int(os.getenv('KNOWN_PLACES_MAX_AGE_SECONDS', str(7 * 24 * 3600)))
+KNOWN_PLACES_MODE = os.getenv('KNOWN_PLACES_MODE', 'reuse')
+
+# Gesamtbudget pro Website-Analyse in Sekunden (Startseite + Unterseiten)
+WEBSITE_SITE_BUDGET = float(os.getenv('WEBSITE_SITE_BUDGET', '15'))
+
+# Impressum/Kontakt zusätzlich über sitemap.xml und HEAD auf übliche Pfade
+# suchen (parallel zur Startseite, findet auch Links aus JS-Menüs)
+WEBSITE_DISCOVER_SUBPAGES = os.getenv('WEBSITE_DISCOVER_SUBPAGES', '1') != '0'
+
+# Höflichkeit gegenüber Websites (prozessweit): parallele Anfragen pro Host
+# und optional pro IP (0 = aus; hinter CDN-/Hoster-IPs liegen viele fremde
+# Websites), Mindestabstand zwischen Anfragen an einen Host, Crawl-delay aus
+# robots.txt (gedeckelt)
+WEBSITE_HOST_CONCURRENCY = int(os.getenv('WEBSITE_HOST_CONCURRENCY', '2'))
+WEBSITE_IP_CONCURRENCY = int(os.getenv('WEBSITE_IP_CONCURRENCY', '0'))
+WEBSITE_HOST_MIN_GAP = float(os.getenv('WEBSITE_HOST_MIN_GAP', '0.2'))
+WEBSITE_RESPECT_CRAWL_DELAY = os.getenv('WEBSITE_RESPECT_CRAWL_DELAY', '1') != '0'
+WEBSITE_MAX_CRAWL_DELAY = float(os.getenv('WEBSITE_MAX_CRAWL_DELAY', '10'))
+
+# Maximale Größe einer geladenen Seite in Bytes (Rest wird abgeschnitten)
+WEBSITE_MAX_PAGE_BYTES = int(os.getenv('WEBSITE_MAX_PAGE_BYTES', str(2 * 1024 * 1024)))
+
+# Prozess-Pool für HTML-Parsing (0 = im Download-Thread parsen)
+WEBSITE_PARSE_WORKERS = int(os.getenv('WEBSITE_PARSE_WORKERS', str(os.cpu_count() or 1)))
+# Maximal gleichzeitig an den Parse-Pool übergebene Seiten (Backpressure)
+WEBSITE_PARSE_QUEUE_SIZE = int(os.getenv('WEBSITE_PARSE_QUEUE_SIZE', str(WEBSITE_PARSE_WORKERS * 4)))
+
+# Ergebnisse werden gebündelt in das Job-Dokument geschrieben
+RESULT_BATCH_SIZE = int(os.getenv('RESULT_BATCH_SIZE', '10'))
+RESULT_FLUSH_INTERVAL = float(os.getenv('RESULT_FLUSH_INTERVAL', '2'))
+
+# Fortschritt wird höchstens alle x Sekunden (oder bei Phasenwechsel) geschrieben
+PROGRESS_INTERVAL = float(os.getenv('PROGRESS_INTERVAL', '1'))
+# Polling-Intervall für Abbrüche, falls kein Change Stream verfügbar ist
+CANCEL_POLL_INTERVAL = float(os.getenv('CANCEL_POLL_INTERVAL', '2'))
+
+# Live-Ereignisse pro Job (SSE): Puffergröße und Aufbewahrung nach Job-Ende
+JOB_EVENT_BUFFER = int(os.getenv('JOB_EVENT_BUFFER', '5000'))
+JOB_EVENT_RETENTION_SECONDS = float(os.getenv('JOB_EVENT_RETENTION_SECONDS', '300'))
+
+# Text Search liefert maximal 20 Places pro Seite und 60 pro Anfrage
+SEARCH_PAGE_SIZE = 20
+TEXT_SEARCH_MAX_RESULTS = 60
+
+# Gekachelte Suche für große Regionen: Raster der ersten Ebene (n x n),
+# maximale Unterteilungstiefe voller Kacheln und parallele Kachel-Suchen
+SEARCH_TILE_GRID = int(os.getenv('SEARCH_TILE_GRID', '3'))
+SEARCH_TILE_MAX_DEPTH = int(os.getenv('SEARCH_TILE_MAX_DEPTH', '3'))
+SEARCH_TILE_CONCURRENCY = int(os.getenv('SEARCH_TILE_CONCURRENCY', '4'))
+
+# Feldumfang der Text Search, falls der Job keinen vorgibt (siehe SEARCH_FIELD_TIERS)
+SEARCH_FIELD_TIER = os.getenv('SEARCH_FIELD_TIER', 'basis')
+
+# API Endpoints (Basis-URL überschreibbar, z.B. für den Benchmark-Stub)
+PLACES_API_BASE_URL = os.getenv('PLACES_API_BASE_URL', 'https://places.googleapis.com/v1').rstrip('/')
+PLACE_DETAILS_FIELDS = (
+    'id', 'displayName', 'formattedAddress', 'nationalPhoneNumber', 'websiteUri', 'types', 'addressComponents'
+)
+PLACE_DETAILS_FIELD_MASK = ','.join(PLACE_DETAILS_FIELDS)
+
+# Feldumfang der Text Search (Job-Parameter `suchFelder`):
+#   ids:     nur die place_id (günstigste Suche), Details pro Place
+#   basis:   Name, Adresse und Position, Details pro Place
+#   kontakt: zusätzlich Telefon, Website, Typen und Adressbestandteile;
+#            Ergebnisse entstehen direkt aus der Suche, ohne Details-Abruf
+SEARCH_FIELD_TIERS = {
+    'ids': ('id',),
+    'basis': ('id', 'displayName', 'formattedAddress', 'location'),
+    'kontakt': (
+        'id', 'displayName', 'formattedAddress', 'location',
+        'nationalPhoneNumber', 'websiteUri', 'types', 'addressComponents'
+    ),
+}
+
+def search_field_mask(fields: Tuple[str, ...]) -> str:
+    """FieldMask der Text Search für die gegebenen Place-Felder"""
+    return ','.join(f'places.{field}' for field in fields) + ',nextPageToken'
+
+def resolve_search_fields(params: Dict) -> Tuple[str, Tuple[str, ...]]:
+    """Ermittelt Stufe und Felder der Text Search eines Jobs"""
+    tier = params.get('suchFelder') or SEARCH_FIELD_TIER
+    if tier not in SEARCH_FIELD_TIERS:
+        logger.warning(f"⚠️ Unbekannte Suchfelder-Stufe '{tier}', nutze 'basis'")
+        tier = 'basis'
+    return tier, SEARCH_FIELD_TIERS[tier]
+
+def expand_queries(params: Dict) -> List[Tuple[str, str]]:
+    """
+    Ermittelt die Suchanfragen (branche, standort) eines Jobs
+    
+    Unterstützt:
+        - queries: Liste von {'branche', 'standort'} (Batch-Job)
+        - branchen + standorte: Kreuzprodukt (Batch-Job)
+        - branche + standort: einzelne Suche
+    
+    Doppelte Kombinationen werden entfernt, die Reihenfolge bleibt erhalten.
+    """
+    if params.get('queries'):
+        queries = [(q['branche'], q['standort']) for q in params['queries']]
+    elif params.get('branchen') and params.get('standorte'):
+        queries = [(b, s) for b in params['branchen'] for s in params['standorte']]
+    else:
+        queries = [(params['branche'], params['standort'])]
+    
+    return list(dict.fromkeys((b.strip(), s.strip()) for b, s in queries if b and s))
+
+google_rate_limiter = TokenBucketRateLimiter(GOOGLE_API_QPS, GOOGLE_API_BURST)
+place_details_lru = LRUCache(PLACE_CACHE_MAX_ENTRIES)
+
+class WorkerRuntime:
+    """
+    Langlebige Ressourcen, die von allen Jobs eines Prozesses geteilt werden
+    
+    Hält den MongoClient (mit Verbindungspool), den Places-API-Client
+    (Keep-Alive-Verbindungspool), die Caches und den WebsiteAnalyzer. Wird einmal beim Start
+    der API erzeugt und beim Herunterfahren geschlossen.
+    """
+    
+    def __init__(self, mongo_uri: Optional[str] = None, api_key: Optional[str] = None):
+        # Zugangsdaten erst hier lesen, damit zur Laufzeit gesetzte ENV greifen
+        self.api_key = api_key or os.getenv('GOOGLE_MAPS_API_KEY')
+        self.mongo_uri = mongo_uri or os.getenv('MONGODB_URI')
+        
+        if not self.api_key:
             raise ValueError("GOOGLE_MAPS_API_KEY not set in environment")
         
-        if not MONGODB_URI:
+        if not self.mongo_uri:
             raise ValueError("MONGODB_URI not set in environment")
         
-        self.api_key = GOOGLE_MAPS_API_KEY
-        self.mongo_client = MongoClient(MONGODB_URI)
+        self.mongo_client = MongoClient(self.mongo_uri, maxPoolSize=MONGODB_MAX_POOL_SIZE)
         self.db = self.mongo_client[MONGODB_DB]
-        self.jobs_collection = self.db['customer_import_jobs']
-        self.website_analyzer = WebsiteAnalyzer()
         
-        logger.info("✅ Worker initialized")
+        # Keep-Alive-Verbindungen zu places.googleapis.com wiederverwenden
+        self.places = PlacesClient(
+            self.api_key,
+            PLACES_API_BASE_URL,
+            google_rate_limiter,
+            pool_size=PLACES_POOL_SIZE,
+            max_retries=GOOGLE_API_MAX_RETRIES,
+            connect_timeout=PLACES_CONNECT_TIMEOUT,
+            read_timeout=PLACES_READ_TIMEOUT
+        )
+        
+        self.details_cache = PlaceDetailsCache(
+            self.db['place_details_cache'],
+            place_details_lru,
+            PLACE_CACHE_TTL_SECONDS
+        )
+        self.known_places = KnownPlacesRegistry(self.db['known_places'], KNOWN_PLACES_MAX_AGE_SECONDS)
+        # Live-Ereignisse der Jobs dieses Prozesses (für /jobs/{id}/events)
+        self.events = JobEventBus(JOB_EVENT_BUFFER, JOB_EVENT_RETENTION_SECONDS)
+        self.website_analyzer = WebsiteAnalyzer(
+            cache=WebsiteAnalysisCache(self.db['website_analysis_cache'], WEBSITE_CACHE_MAX_AGE_SECONDS),
+            site_budget=WEBSITE_SITE_BUDGET,
+            max_workers=DETAILS_CONCURRENCY * 2,
+            parser=PageParser(WEBSITE_PARSE_WORKERS, WEBSITE_PARSE_QUEUE_SIZE),
+            max_page_bytes=WEBSITE_MAX_PAGE_BYTES,
+            discover_subpages=WEBSITE_DISCOVER_SUBPAGES,
+            host_concurrency=WEBSITE_HOST_CONCURRENCY,
+            ip_concurrency=WEBSITE_IP_CONCURRENCY,
+            host_min_gap=WEBSITE_HOST_MIN_GAP,
+            respect_crawl_delay=WEBSITE_RESPECT_CRAWL_DELAY,
+            max_crawl_delay=WEBSITE_MAX_CRAWL_DELAY
+        )
+        
+        logger.info("✅ Worker-Runtime initialisiert")
+    
+    def process_job(self, job_id: str, lease: Optional[JobLease] = None):
+        """Verarbeitet einen Job mit den geteilten Ressourcen"""
+        GoogleMapsWorker(self).process_job(job_id, lease)
+    
+    def close(self):
+        """Gibt Verbindungen und Thread-Pools frei"""
+        self.website_analyzer.close()
+        self.places.close()
+        self.mongo_client.close()
+        logger.info("👋 Worker-Runtime geschlossen")
+
+class GoogleMapsWorker:
+    def __init__(self, runtime: Optional[WorkerRuntime] = None):
+        """
+        Initialize worker with MongoDB and Google Maps API
+        
+        Args:
+            runtime: Geteilte Runtime; ohne Angabe wird eine eigene erzeugt
+        """
+        self.runtime = runtime or WorkerRuntime()
+        self.api_key = self.runtime.api_key
+        self.places = self.runtime.places
+        self.mongo_client = self.runtime.mongo_client
+        self.db = self.runtime.db
+        self.jobs_collection = self.db['customer_import_jobs']
+        self.details_cache = self.runtime.details_cache
+        self.known_places = self.runtime.known_places
+        self.events = self.runtime.events
+        self.website_analyzer = self.runtime.website_analyzer
     
-    def search_places(self, query: str, location: str) -> List[Dict]:
+    def search_places(self, query: str, location: str, max_results: int = 60) -> List[Dict]:
         """
-        Suche nach Places mit Text Search API
+        Suche nach Places mit Text Search API (alle Seiten)
         
         Args:
             query: Suchquery (z.B. "Bauunternehmen")
             location: Standort (z.B. "Berlin")
+            max_results: Maximale Anzahl an Places
         
         Returns:
-            Liste von Place-IDs
+            Liste von Places
         """
-        headers = {
-            'Content-Type': 'application/json',
-            'X-Goog-Api-Key': self.api_key,
-            'X-Goog-FieldMask': 'places.id,places.displayName,places.formattedAddress,places.location'
-        }
+        places = list(self.iter_places(query, location, max_results))
+        logger.info(f"📍 {len(places)} Places gefunden für '{query} in {location}'")
+        return places
+    
+    def iter_places(
+        self,
+        query: str,
+        location: str,
+        max_results: int,
+        fields: Optional[Tuple[str, ...]] = None
+    ) -> Iterator[Dict]:
+        """
+        Sucht Places seitenweise und liefert sie aus, sobald eine Seite da ist
+        
+        Folgt dem nextPageToken, bis max_results erreicht ist oder keine
+        weitere Seite existiert.
+        
+        Args:
+            query: Suchquery (z.B. "Bauunternehmen")
+            location: Standort (z.B. "Berlin")
+            max_results: Maximale Anzahl an Places
+            fields: Angefragte Place-Felder (Default: SEARCH_FIELD_TIER)
+        
+        Yields:
+            Places in der Reihenfolge der Suchergebnisse
+        """
+        for places, _ in self.iter_query_pages(query, location, max_results, False, fields):
+            yield from places
+    
+    def iter_search(
+        self,
+        data: Dict,
+        max_results: int,
+        label: str,
+        fields: Optional[Tuple[str, ...]] = None
+    ) -> Iterator[Dict]:
+        """
+        Führt eine Text Search aus und folgt dem nextPageToken
+        
+        Args:
+            data: Request-Body (textQuery, pageSize, ggf. locationRestriction)
+            max_results: Maximale Anzahl an Places
+            label: Bezeichnung für das Logging
+            fields: Angefragte Place-Felder (Default: SEARCH_FIELD_TIER)
+        """
+        for places, _ in self.iter_search_pages(data, max_results, label, fields):
+            yield from places
+    
+    def iter_search_pages(
+        self,
+        data: Dict,
+        max_results: int,
+        label: str,
+        fields: Optional[Tuple[str, ...]] = None,
+        found: int = 0
+    ) -> Iterator[Tuple[List[Dict], Optional[str]]]:
+        """
+        Führt eine Text Search seitenweise aus
+        
+        Enthält `data` einen pageToken, beginnt die Suche bei dieser Seite.
+        
+        Args:
+            data: Request-Body (textQuery, pageSize, ggf. locationRestriction, pageToken)
+            max_results: Maximale Anzahl an Places
+            label: Bezeichnung für das Logging
+            fields: Angefragte Place-Felder (Default: SEARCH_FIELD_TIER)
+            found: Bereits gelieferte Places (zählen gegen max_results)
+        
+        Yields:
+            (Places einer Seite, nextPageToken oder None nach der letzten Seite)
+        """
+        field_mask = search_field_mask(fields or SEARCH_FIELD_TIERS[SEARCH_FIELD_TIER])
+        data = dict(data)
+        
+        page = 0
+        while found < max_results:
+            try:
+                with PHASE_SECONDS.labels(PHASE_SEARCH).time():
+                    result = self.places.search_text(data, field_mask)
+            except requests.exceptions.RequestException as e:
+                logger.error(f"❌ Fehler bei Places-Suche (Seite {page + 1}): {e}")
+                return
+            
+            page += 1
+            places = result.get('places', [])[:max_results - found]
+            found += len(places)
+            logger.info(f"📍 Seite {page}: {len(places)} Places für {label}")
+            
+            next_page_token = result.get('nextPageToken') if found < max_results else None
+            yield places, next_page_token
+            if not next_page_token:
+                return
+            data['pageToken'] = next_page_token
+    
+    def iter_tiled_places(
+        self,
+        query: str,
+        location: str,
+        max_results: int,
+        fields: Optional[Tuple[str, ...]] = None
+    ) -> Iterator[Dict]:
+        """
+        Gekachelte Suche für Regionen, die mehr Treffer haben als eine
+        Text Search liefert (max. 60)
+        
+        Der Standort wird einmal geokodiert und sein Viewport in ein Raster
+        aus locationRestriction-Rechtecken zerlegt. Die Kacheln werden
+        parallel durchsucht; liefert eine Kachel das Maximum, wird sie in
+        vier Teilkacheln unterteilt. Places werden über ihre ID dedupliziert
+        und ausgeliefert, sobald eine Kachel fertig ist.
+        """
+        for places, _ in self.iter_query_pages(query, location, max_results, True, fields):
+            yield from places
+    
+    def iter_query_pages(
+        self,
+        query: str,
+        location: str,
+        max_results: int,
+        tiled: bool,
+        fields: Optional[Tuple[str, ...]] = None,
+        cursor: Optional[Dict] = None,
+        seen: Optional[Set[str]] = None
+    ) -> Iterator[Tuple[List[Dict], Dict]]:
+        """
+        Liefert die Places einer Suchanfrage samt Fortsetzungspunkt
+        
+        Der Fortsetzungspunkt beschreibt, wo die Suche nach den gelieferten
+        Places weitergeht: `pageToken` der einfachen Suche, die offenen
+        Kacheln (`tiles`) der gekachelten Suche oder `done`. Mit einem
+        gespeicherten Fortsetzungspunkt (`cursor`, samt `found`) setzt die
+        Suche dort fort, statt bezahlte Seiten erneut abzurufen.
+        
+        Args:
+            tiled: Gekachelte Suche (Fallback auf die einfache Suche, wenn
+                der Standort nicht geokodierbar ist)
+            cursor: Gespeicherter Fortsetzungspunkt
+            seen: Bereits gelieferte place_ids der Suchanfrage (gekachelte Suche)
+        
+        Yields:
+            (Places einer Seite bzw. Kachel, Fortsetzungspunkt danach)
+        """
+        cursor = cursor or {}
+        found = cursor.get('found', 0)
+        
+        if tiled and not cursor.get('pageToken'):
+            tiles = cursor.get('tiles')
+            if tiles is None:
+                viewport = self.geocode_viewport(location)
+                if viewport is not None:
+                    tiles = [
+                        {'tile': tile, 'depth': 0}
+                        for tile in split_rectangle(viewport, SEARCH_TILE_GRID, SEARCH_TILE_GRID)
+                    ]
+                else:
+                    logger.warning(f"⚠️ Standort '{location}' nicht geokodierbar, nutze einfache Suche")
+            if tiles is not None:
+                for places, pending in self.iter_tiles(query, location, tiles, max_results, fields, seen, found):
+                    yield places, {'tiles': pending} if pending else {'done': True}
+                return
         
         data = {
             'textQuery': f"{query} in {location}",
-            'languageCode': 'de'
+            'languageCode': 'de',
+            'pageSize': max(1, min(max_results, SEARCH_PAGE_SIZE))
         }
+        if cursor.get('pageToken'):
+            data['pageToken'] = cursor['pageToken']
+        for places, next_page_token in self.iter_search_pages(
+            data, max_results, f"'{query} in {location}'", fields, found
+        ):
+            yield places, {'pageToken': next_page_token} if next_page_token else {'done': True}
+    
+    def iter_tiles(
+        self,
+        query: str,
+        location: str,
+        tiles: List[Dict],
+        max_results: int,
+        fields: Optional[Tuple[str, ...]] = None,
+        seen: Optional[Set[str]] = None,
+        found: int = 0
+    ) -> Iterator[Tuple[List[Dict], List[Dict]]]:
+        """
+        Durchsucht Kacheln parallel und unterteilt volle Kacheln
+        
+        Args:
+            tiles: Offene Kacheln als {'tile': Rechteck, 'depth': Unterteilungstiefe}
+            seen: Bereits gelieferte place_ids (werden nicht erneut geliefert)
+            found: Bereits gelieferte Places (zählen gegen max_results)
+        
+        Yields:
+            (neue Places einer fertigen Kachel, danach noch offene Kacheln)
+        """
+        seen = set(seen or ())
+        executor = ThreadPoolExecutor(max_workers=SEARCH_TILE_CONCURRENCY)
+        pending = {}
+        
+        def submit(entry: Dict):
+            pending[executor.submit(self.search_tile, query, entry['tile'], fields)] = entry
         
         try:
-            response = requests.post(PLACES_SEARCH_URL, headers=headers, json=data)
-            response.raise_for_status()
-            
-            result = response.json()
-            places = result.get('places', [])
+            for entry in tiles:
+                submit(entry)
             
-            logger.info(f"📍 {len(places)} Places gefunden für '{query} in {location}'")
-            return places
+            searched = 0
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    entry = pending.pop(future)
+                    places = future.result()
+                    searched += 1
+                    
+                    fresh = []
+                    for place in places:
+                        place_id = place.get('id')
+                        if not place_id or place_id in seen:
+                            continue
+                        seen.add(place_id)
+                        fresh.append(place)
+                        found += 1
+                        if found >= max_results:
+                            yield fresh, []
+                            return
+                    
+                    # Volle Kachel: es gibt vermutlich mehr Treffer als geliefert
+                    if len(places) >= TEXT_SEARCH_MAX_RESULTS and entry['depth'] < SEARCH_TILE_MAX_DEPTH:
+                        for sub_tile in split_rectangle(entry['tile'], 2, 2):
+                            submit({'tile': sub_tile, 'depth': entry['depth'] + 1})
+                    
+                    # Offen sind auch fertige, noch nicht ausgewertete Kacheln
+                    yield fresh, list(pending.values())
             
+            logger.info(f"🗺️ Gekachelte Suche: {found} Places aus {searched} Kacheln für '{query} in {location}'")
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def search_tile(self, query: str, tile: Dict, fields: Optional[Tuple[str, ...]] = None) -> List[Dict]:
+        """Sucht alle Places (max. 60) innerhalb eines Rechtecks"""
+        data = {
+            'textQuery': query,
+            'languageCode': 'de',
+            'pageSize': SEARCH_PAGE_SIZE,
+            'locationRestriction': {'rectangle': tile}
+        }
+        low, high = tile['low'], tile['high']
+        label = (
+            f"'{query}' in Kachel ({low['latitude']:.3f},{low['longitude']:.3f})-"
+            f"({high['latitude']:.3f},{high['longitude']:.3f})"
+        )
+        return list(self.iter_search(data, TEXT_SEARCH_MAX_RESULTS, label, fields))
+    
+    def geocode_viewport(self, location: str) -> Optional[Dict]:
+        """
+        Ermittelt den Viewport eines Standorts über die Text Search
+        
+        Returns:
+            Rechteck {'low': ..., 'high': ...} oder None
+        """
+        data = {'textQuery': location, 'languageCode': 'de', 'pageSize': 1}
+        
+        try:
+            with PHASE_SECONDS.labels(PHASE_SEARCH).time():
+                places = self.places.search_text(data, 'places.id,places.viewport').get('places', [])
         except requests.exceptions.RequestException as e:
-            logger.error(f"❌ Fehler bei Places-Suche: {e}")
-            return []
+            logger.error(f"❌ Fehler beim Geokodieren von '{location}': {e}")
+            return None
+        
+        viewport = places[0].get('viewport') if places else None
+        if not viewport or 'low' not in viewport or 'high' not in viewport:
+            return None
+        return viewport
     
-    def get_place_details(self, place_id: str) -> Optional[Dict]:
+    def iter_job_place_batches(
+        self,
+        queries: List[Tuple[str, str]],
+        max_results: int,
+        tiled: bool,
+        query_stats: List[Dict],
+        fields: Optional[Tuple[str, ...]] = None,
+        checkpoint: Optional[JobCheckpoint] = None
+    ) -> Iterator[Tuple[int, List[Dict], Optional[Dict]]]:
+        """
+        Liefert die Places aller Suchanfragen eines Jobs seitenweise
+        
+        Places, die bereits eine frühere Suchanfrage des Jobs gefunden hat,
+        werden vor Details-Abruf und Website-Analyse entfernt.
+        
+        Mit Checkpoint wird fortgesetzt: Places aus dem Checkpoint gelten als
+        gefunden, abgeschlossene Suchanfragen entfallen und eine unterbrochene
+        Suchanfrage setzt an ihrem Fortsetzungspunkt fort (nextPageToken bzw.
+        offene Kacheln).
+        
+        Args:
+            queries: Liste von (branche, standort)
+            max_results: Maximale Anzahl an Places pro Suchanfrage
+            tiled: Gekachelte Suche verwenden
+            query_stats: Wird pro Suchanfrage um found/unique ergänzt
+            fields: Angefragte Place-Felder
+            checkpoint: Checkpoint des Jobs
+        
+        Yields:
+            (Index der Suchanfrage, neue Places (max. eine Ergebnisseite),
+            Fortsetzungspunkt der Suchanfrage nach diesen Places oder None)
+        """
+        saved = checkpoint.places if checkpoint else []
+        seen = {entry['id'] for entry in saved}
+        for query_index, (branche, standort) in enumerate(queries):
+            cursor = checkpoint.queries.get(query_index) if checkpoint else None
+            stats = {'branche': branche, 'standort': standort, 'found': 0, 'unique': 0}
+            if cursor:
+                stats.update(found=cursor['found'], unique=cursor['unique'])
+            query_stats.append(stats)
+            if cursor and cursor.get('done'):
+                continue
+            
+            query_seen = {entry['id'] for entry in saved if entry['q'] == query_index}
+            for places, position in self.iter_query_pages(
+                branche, standort, max_results, tiled, fields, cursor, query_seen
+            ):
+                stats['found'] += len(places)
+                fresh = []
+                for place in places:
+                    place_id = place.get('id')
+                    if place_id in seen:
+                        continue
+                    seen.add(place_id)
+                    fresh.append(place)
+                stats['unique'] += len(fresh)
+                
+                # Der Fortsetzungspunkt gilt erst, wenn alle Places davor
+                # gespeichert sind -> mit dem letzten Block liefern
+                cursor = {'found': stats['found'], 'unique': stats['unique'], **position}
+                blocks = [fresh[i:i + SEARCH_PAGE_SIZE] for i in range(0, len(fresh), SEARCH_PAGE_SIZE)] or [[]]
+                for block in blocks[:-1]:
+                    yield query_index, block, None
+                yield query_index, blocks[-1], cursor
+    
+    def iter_checkpoint_batches(self, checkpoint: JobCheckpoint) -> Iterator[Tuple[int, List[Dict], None]]:
+        """
+        Liefert die im Checkpoint gespeicherten Suchergebnisse (ohne erneute Suche)
+        
+        Places mit gespeicherten Suchdaten werden mit diesen geliefert, alle
+        anderen nur mit ihrer place_id (Details werden dann abgerufen).
+        """
+        for query_index, entries in groupby(list(checkpoint.places), key=lambda entry: entry['q']):
+            entries = list(entries)
+            for start in range(0, len(entries), SEARCH_PAGE_SIZE):
+                yield query_index, [
+                    entry.get('place') or {'id': entry['id']}
+                    for entry in entries[start:start + SEARCH_PAGE_SIZE]
+                ], None
+    
+    def get_place_details(self, place_id: str, cache_stats: Optional[CacheStats] = None) -> Optional[Dict]:
         """
         Hole detaillierte Informationen zu einem Place
         
+        Treffer im Place-Details-Cache ersparen den API-Aufruf.
+        
         Args:
             place_id: Google Places ID
+            cache_stats: Optionaler Zähler für Cache-Treffer des Jobs
         
         Returns:
             Detaillierte Place-Informationen oder None
         """
-        headers = {
-            'Content-Type': 'application/json',
-            'X-Goog-Api-Key': self.api_key,
-            'X-Goog-FieldMask': 'id,displayName,formattedAddress,nationalPhoneNumber,websiteUri,types,addressComponents'
-        }
+        details, source = self.details_cache.get(place_id, PLACE_DETAILS_FIELD_MASK)
+        if cache_stats is not None:
+            cache_stats.record(source)
+        CACHE_LOOKUPS.labels('place_details', source or 'miss').inc()
+        if details is not None:
+            return details
         
         try:
-            url = f"{PLACE_DETAILS_URL}/{place_id}"
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
+            with PHASE_SECONDS.labels(PHASE_DETAILS).time():
+                details = self.places.get_place(place_id, PLACE_DETAILS_FIELD_MASK)
             
-            return response.json()
+            self.details_cache.set(place_id, PLACE_DETAILS_FIELD_MASK, details)
+            return details
             
         except requests.exceptions.RequestException as e:
             logger.error(f"❌ Fehler bei Place-Details für {place_id}: {e}")
@@ -129,13 +679,20 @@ class GoogleMapsWorker:
         logger.info(f"🌐 Website-Analyse für {website_url} (TODO)")
         return {'email': None, 'telefon': None}
     
-    def process_job(self, job_id: str):
+    def process_job(self, job_id: str, lease: Optional[JobLease] = None):
         """
         Verarbeitet einen Import-Job
         
+        Mit Lease (Job aus der Queue) schreibt der Job nur, solange dieser
+        Worker die Lease hält; geht sie verloren, wird abgebrochen.
+        
         Args:
             job_id: MongoDB ObjectId des Jobs
+            lease: Lease aus JobQueue.claim()
         """
+        # Schreibzugriffe nur als Inhaber der Lease
+        owner = lease.owner if lease else None
+        job_filter = {'_id': ObjectId(job_id), **(owner or {})}
         logger.info(f"🚀 Starte Job {job_id}")
         
         try:
@@ -146,131 +703,200 @@ class GoogleMapsWorker:
                 logger.error(f"❌ Job {job_id} nicht gefunden")
                 return
             
-            # Job-Status auf 'running' setzen
-            self.jobs_collection.update_one(
-                {'_id': ObjectId(job_id)},
-                {'$set': {'status': 'running', 'updatedAt': time.time()}}
-            )
+            # Mit Checkpoint (Worker neu gestartet bzw. Job übernommen) wird
+            # fortgesetzt: gespeicherte Ergebnisse bleiben, erledigte Places
+            # und eine abgeschlossene Suche werden nicht wiederholt.
+            checkpoint_state = job.get('checkpoint')
+            done_results = (job.get('results') or []) if checkpoint_state else []
+            if checkpoint_state:
+                update = {'status': 'running', 'updatedAt': time.time()}
+            else:
+                update = {
+                    'status': 'running',
+                    'results': [],
+                    'resultCount': 0,
+                    'checkpoint': JobCheckpoint.initial_state(),
+                    'updatedAt': time.time()
+                }
+            
+            # Job-Status auf 'running' setzen, Ergebnisse werden laufend angehängt
+            if self.jobs_collection.update_one(job_filter, {'$set': update}).matched_count == 0:
+                logger.warning(f"⚠️ Job {job_id} gehört einem anderen Worker, überspringe")
+                return
+            
+            checkpoint = JobCheckpoint(self.jobs_collection, job_id, checkpoint_state, owner)
+            done_ids = {r.get('externalId') for r in done_results} | checkpoint.failed
+            if checkpoint_state:
+                logger.info(
+                    f"♻️ Setze Job {job_id} fort: {len(done_ids)} Places erledigt, "
+                    f"Suche {'abgeschlossen' if checkpoint.search_complete else 'wird fortgesetzt'}"
+                )
+            events = self.events.open(job_id, len(done_results))
+            events.publish(EVENT_STATUS, {'status': 'running'})
             
             params = job['params']
-            branche = params['branche']
-            standort = params['standort']
+            # Batch-Jobs enthalten mehrere Suchanfragen (branche x standort)
+            queries = expand_queries(params)
             max_results = params['anzahlErgebnisse']
+            total = max_results * len(queries)
             analyze_website = params.get('websiteAnalysieren', False)
             extract_contacts = params.get('kontaktdatenHinzufuegen', False)
+            # Mehr Treffer als eine Text Search liefert -> gekachelte Suche
+            tiled_search = params.get('kachelSuche', max_results > TEXT_SEARCH_MAX_RESULTS)
+            search_tier, search_fields = resolve_search_fields(params)
             
-            results = []
-            
-            # Phase 1: Searching
-            self.update_job_progress(job_id, 0, max_results, 'searching')
-            places = self.search_places(branche, standort)
+            cache_stats = CacheStats()
+            enrich_website = analyze_website or extract_contacts
+            phase = 'analyzing_websites' if enrich_website else 'loading_details'
             
-            # Limitiere auf max_results
-            places = places[:max_results]
-            
-            # Phase 2: Loading Details
-            for i, place in enumerate(places):
-                # Check if job was cancelled
-                current_job = self.jobs_collection.find_one({'_id': ObjectId(job_id)})
-                if current_job and current_job.get('status') == 'cancelled':
-                    logger.info(f"⚠️ Job {job_id} wurde abgebrochen")
-                    return
-                
-                self.update_job_progress(job_id, i, max_results, 'loading_details')
-                
-                place_id = place.get('id')
-                if not place_id:
-                    continue
-                
-                # Detaillierte Informationen abrufen
-                details = self.get_place_details(place_id)
-                if not details:
-                    continue
-                
-                # Adresse parsen
-                address_components = details.get('addressComponents', [])
-                parsed_address = self.parse_address(address_components)
-                
-                result = {
-                    'id': place_id,
-                    'externalId': place_id,
-                    'firmenname': details.get('displayName', {}).get('text', ''),
-                    'standort': parsed_address.get('ort', standort),
-                    'adresse': parsed_address,
-                    'branche': self.extract_industry(details.get('types', [])),
-                    'telefon': details.get('nationalPhoneNumber'),
-                    'website': details.get('websiteUri'),
-                    'email': None,
-                    'websiteAnalyse': None,
-                    'ansprechpartner': None,
-                    'analyseScore': 70  # Basis-Score
-                }
-                
-                # Phase 3 & 4: Website-Analyse (wenn aktiviert)
-                if (analyze_website or extract_contacts) and result['website']:
-                    self.update_job_progress(job_id, i, max_results, 'analyzing_websites')
+            writer = ResultWriter(
+                self.jobs_collection, job_id, RESULT_BATCH_SIZE, RESULT_FLUSH_INTERVAL, events, len(done_results), owner
+            )
+            progress = ProgressReporter(self.jobs_collection, job_id, PROGRESS_INTERVAL, events, owner)
+            watcher = CancellationWatcher(
+                self.jobs_collection, job_id, CANCEL_POLL_INTERVAL, lease.revoked if lease else None
+            )
+            executor = ThreadPoolExecutor(max_workers=DETAILS_CONCURRENCY)
+            with writer, progress, watcher:
+                try:
+                    # Phase 1: Searching
+                    # Places werden seitenweise geliefert; Details und Website-Analyse
+                    # starten bereits, während weitere Seiten geladen werden.
+                    # Bereits bekannte Places werden pro Seite mit einer Abfrage erkannt.
+                    # Alle Suchanfragen eines Batch-Jobs teilen sich den Thread-Pool.
+                    # Fertige Places werden in Reihenfolge übernommen und aus der
+                    # Warteschlange entfernt, damit ihre Ergebnisse freigegeben werden.
+                    progress.report(0, total, 'searching')
+                    phase_start = time.monotonic()
+                    futures = deque()
+                    found = 0
+                    consumed = 0
+                    
+                    def consume():
+                        future, suchanfrage, place_id = futures.popleft()
+                        result = future.result()
+                        if result:
+                            # Suchanfrage, die den Place (zuerst) gefunden hat
+                            writer.add(dict(result, suchanfrage=suchanfrage))
+                        else:
+                            checkpoint.mark_failed(place_id)
+                    
+                    known_stats = {'reused': 0, 'skipped': 0}
+                    # Liefert die Suche alle Detail-Felder, entfällt der Details-Abruf;
+                    # die Felder kommen mit in den Checkpoint, damit auch ein
+                    # fortgesetzter Job keine Details abrufen muss
+                    search_details = set(PLACE_DETAILS_FIELDS) <= set(search_fields)
+                    checkpoint_fields = PLACE_DETAILS_FIELDS if search_details else ()
+                    if checkpoint.search_complete:
+                        query_stats = job.get('queryStats') or []
+                        place_batches = self.iter_checkpoint_batches(checkpoint)
+                    else:
+                        # Erst die bereits gefundenen Places, dann die Suche ab
+                        # dem gespeicherten Fortsetzungspunkt jeder Suchanfrage
+                        query_stats = []
+                        place_batches = chain(
+                            self.iter_checkpoint_batches(checkpoint),
+                            self.iter_job_place_batches(
+                                queries, max_results, tiled_search, query_stats, search_fields, checkpoint
+                            )
+                        )
+                    if search_details:
+                        logger.info(f"🔎 Suchfelder '{search_tier}': Ergebnisse direkt aus der Suche")
                     
-                    try:
-                        # Website analysieren
-                        website_data = self.website_analyzer.analyze_website(result['website'])
+                    for query_index, places, cursor in place_batches:
+                        if watcher.cancelled:
+                            break
+                        if not checkpoint.search_complete:
+                            checkpoint.add_places(query_index, places, checkpoint_fields, cursor)
                         
-                        if website_data:
-                            result['websiteAnalyse'] = website_data
-                            
-                            # Primäre E-Mail aus Website-Analyse
-                            if website_data.get('extractedEmails'):
-                                result['email'] = website_data['extractedEmails'][0]
-                                result['analyseScore'] += 15
-                            
-                            # Primärer Ansprechpartner
-                            if website_data.get('ansprechpartner') and len(website_data['ansprechpartner']) > 0:
-                                primary_contact = website_data['ansprechpartner'][0]
-                                result['ansprechpartner'] = {
-                                    'vorname': primary_contact.get('name', '').split()[0] if primary_contact.get('name') else None,
-                                    'nachname': ' '.join(primary_contact.get('name', '').split()[1:]) if primary_contact.get('name') and len(primary_contact.get('name', '').split()) > 1 else None,
-                                    'position': primary_contact.get('position'),
-                                    'telefon': primary_contact.get('telefon'),
-                                    'email': primary_contact.get('email')
-                                }
-                                result['analyseScore'] += 10
-                            
-                            # Bonus für Beschreibung
-                            if website_data.get('beschreibung'):
-                                result['analyseScore'] += 5
-                            
-                            logger.info(f"✅ Website analysiert: {result['firmenname']} - {len(website_data.get('extractedEmails', []))} E-Mails gefunden")
+                        places = [p for p in places if p.get('id') not in done_ids]
+                        if not places:
+                            continue
+                        
+                        branche, standort = queries[query_index]
+                        suchanfrage = f"{branche} in {standort}"
+                        known = self.known_places.lookup([p.get('id') for p in places], enrich_website)
+                        CACHE_LOOKUPS.labels('known_places', 'hit').inc(len(known))
+                        CACHE_LOOKUPS.labels('known_places', 'miss').inc(len(places) - len(known))
+                        
+                        for place in places:
+                            known_result = known.get(place.get('id'))
+                            if known_result is None:
+                                future = executor.submit(
+                                    self.process_place, place, standort, enrich_website, cache_stats, job_id,
+                                    search_details
+                                )
+                            elif KNOWN_PLACES_MODE == 'skip':
+                                known_stats['skipped'] += 1
+                                continue
+                            else:
+                                future = Future()
+                                future.set_result(known_result)
+                                known_stats['reused'] += 1
+                            futures.append((future, suchanfrage, place.get('id')))
+                            found += 1
+                        progress.report(len(done_ids) + found, total, 'searching')
+                        
+                        while futures and futures[0][0].done():
+                            consume()
+                            consumed += 1
                     
-                    except Exception as e:
-                        logger.error(f"❌ Fehler bei Website-Analyse für {result['firmenname']}: {e}")
-                        # Fortfahren ohne Website-Daten
-                
-                # Score begrenzen auf max 100
-                result['analyseScore'] = min(result['analyseScore'], 100)
-                
-                results.append(result)
-                
-                # Rate Limiting (500 Anfragen/Sekunde laut Google)
-                time.sleep(0.1)
+                    if not watcher.cancelled and not checkpoint.search_complete:
+                        checkpoint.complete_search(query_stats)
+                    logger.info(f"📍 {found} Places gefunden für {len(queries)} Suchanfrage(n)")
+                    if known_stats['reused'] or known_stats['skipped']:
+                        logger.info(f"♻️ Bereits bekannt: {known_stats['reused']} übernommen, {known_stats['skipped']} übersprungen")
+                    JOB_PHASE_SECONDS.labels('searching').observe(time.monotonic() - phase_start)
+                    
+                    # Phase 2: Loading Details (parallel, Reihenfolge bleibt erhalten)
+                    progress.report(0, total, 'loading_details')
+                    phase_start = time.monotonic()
+                    
+                    while futures:
+                        # Check if job was cancelled
+                        if watcher.cancelled:
+                            self.report_cancelled(job_id, watcher, events)
+                            return
+                        
+                        progress.report(len(done_ids) + consumed, total, phase)
+                        consume()
+                        consumed += 1
+                    
+                    if watcher.cancelled:
+                        self.report_cancelled(job_id, watcher, events)
+                        return
+                    
+                    # Restzeit nach der Suche (Details bzw. Website-Analyse)
+                    JOB_PHASE_SECONDS.labels(phase).observe(time.monotonic() - phase_start)
+                finally:
+                    executor.shutdown(wait=True, cancel_futures=True)
             
             # Job als completed markieren
-            self.jobs_collection.update_one(
-                {'_id': ObjectId(job_id)},
+            completed = self.jobs_collection.update_one(
+                job_filter,
                 {
                     '$set': {
                         'status': 'completed',
-                        'results': results,
+                        'resultCount': writer.count,
+                        'cacheStats': {'placeDetails': cache_stats.as_dict(), 'knownPlaces': known_stats},
+                        'queryStats': query_stats,
                         'completedAt': time.time(),
                         'updatedAt': time.time()
-                    }
+                    },
+                    '$unset': {'checkpoint': ''}
                 }
             )
+            if completed.matched_count == 0:
+                logger.warning(f"⚠️ Lease für Job {job_id} verloren, Abschluss verworfen")
+                return
             
-            logger.info(f"✅ Job {job_id} abgeschlossen - {len(results)} Ergebnisse")
+            events.publish(EVENT_STATUS, {'status': 'completed', 'resultCount': writer.count})
+            logger.info(f"✅ Job {job_id} abgeschlossen - {writer.count} Ergebnisse")
             
         except Exception as e:
             logger.error(f"❌ Fehler bei Job {job_id}: {e}")
             self.jobs_collection.update_one(
-                {'_id': ObjectId(job_id)},
+                job_filter,
                 {
                     '$set': {
                         'status': 'failed',
@@ -279,22 +905,135 @@ class GoogleMapsWorker:
                     }
                 }
             )
+            self.events.publish(job_id, EVENT_STATUS, {'status': 'failed', 'error': str(e)})
+        finally:
+            self.events.finish(job_id)
     
-    def update_job_progress(self, job_id: str, current: int, total: int, phase: str):
-        """Aktualisiert den Fortschritt eines Jobs"""
-        self.jobs_collection.update_one(
-            {'_id': ObjectId(job_id)},
-            {
-                '$set': {
-                    'progress': {
-                        'current': current,
-                        'total': total,
-                        'phase': phase
-                    },
-                    'updatedAt': time.time()
-                }
-            }
-        )
+    def report_cancelled(self, job_id: str, watcher: CancellationWatcher, events: JobEventChannel):
+        """Meldet einen abgebrochenen Job (Abbruch durch Nutzer oder verlorene Lease)"""
+        if watcher.lease_lost:
+            # Der neue Inhaber setzt den Job fort und meldet seinen Status selbst
+            logger.warning(f"⚠️ Job {job_id} von einem anderen Worker übernommen, breche ab")
+            return
+        logger.info(f"⚠️ Job {job_id} wurde abgebrochen")
+        events.publish(EVENT_STATUS, {'status': 'cancelled'})
+    
+    def process_place(
+        self,
+        place: Dict,
+        standort: str,
+        enrich_website: bool,
+        cache_stats: Optional[CacheStats] = None,
+        job_id: Optional[str] = None,
+        search_details: bool = False
+    ) -> Optional[Dict]:
+        """
+        Lädt Details (und optional Website-Daten) für einen einzelnen Place
+        
+        Läuft im Thread-Pool; Fehler werden pro Place abgefangen, damit ein
+        fehlerhafter Eintrag nicht den ganzen Job abbricht.
+        
+        Args:
+            place: Place aus der Text Search
+            standort: Standort des Jobs (Fallback für den Ort)
+            enrich_website: Ob die Website analysiert werden soll
+            cache_stats: Zähler für Cache-Treffer des Jobs
+            job_id: Job, der den Place angereichert hat (für das Place-Register)
+            search_details: Der Place stammt aus einer Suche mit allen Detail-Feldern
+        
+        Returns:
+            Ergebnis-Dict oder None
+        """
+        place_id = place.get('id')
+        if not place_id:
+            return None
+        
+        try:
+            # Detaillierte Informationen aus der Suche übernehmen oder abrufen
+            if search_details and place.get('displayName'):
+                details = place
+                self.details_cache.set(place_id, PLACE_DETAILS_FIELD_MASK, details)
+                if cache_stats is not None:
+                    cache_stats.record('search')
+                CACHE_LOOKUPS.labels('place_details', 'search').inc()
+            else:
+                details = self.get_place_details(place_id, cache_stats)
+            if not details:
+                return None
+            
+            result = self.build_result(place_id, details, standort)
+            
+            # Phase 3 & 4: Website-Analyse (wenn aktiviert)
+            if enrich_website and result['website']:
+                self.enrich_from_website(result)
+            
+            # Score begrenzen auf max 100
+            result['analyseScore'] = min(result['analyseScore'], 100)
+            
+            # Ohne Website gilt der Place auch für spätere Analyse-Jobs als vollständig
+            self.known_places.remember(result, enrich_website or not result['website'], job_id)
+            return result
+        
+        except Exception as e:
+            logger.error(f"❌ Fehler bei Place {place_id}: {e}")
+            return None
+    
+    def build_result(self, place_id: str, details: Dict, standort: str) -> Dict:
+        """Baut das Ergebnis-Dict aus den Place-Details"""
+        # Adresse parsen
+        address_components = details.get('addressComponents', [])
+        parsed_address = self.parse_address(address_components)
+        
+        return {
+            'id': place_id,
+            'externalId': place_id,
+            'firmenname': details.get('displayName', {}).get('text', ''),
+            'standort': parsed_address.get('ort', standort),
+            'adresse': parsed_address,
+            'branche': self.extract_industry(details.get('types', [])),
+            'telefon': details.get('nationalPhoneNumber'),
+            'website': details.get('websiteUri'),
+            'email': None,
+            'websiteAnalyse': None,
+            'ansprechpartner': None,
+            'analyseScore': 70  # Basis-Score
+        }
+    
+    def enrich_from_website(self, result: Dict):
+        """Ergänzt ein Ergebnis um Daten aus der Website-Analyse"""
+        try:
+            # Website analysieren
+            website_data = self.website_analyzer.analyze_website(result['website'])
+            
+            if website_data:
+                result['websiteAnalyse'] = website_data
+                
+                # Primäre E-Mail aus Website-Analyse
+                if website_data.get('extractedEmails'):
+                    result['email'] = website_data['extractedEmails'][0]
+                    result['analyseScore'] += 15
+                
+                # Primärer Ansprechpartner
+                if website_data.get('ansprechpartner') and len(website_data['ansprechpartner']) > 0:
+                    primary_contact = website_data['ansprechpartner'][0]
+                    result['ansprechpartner'] = {
+                        'vorname': primary_contact.get('name', '').split()[0] if primary_contact.get('name') else None,
+                        'nachname': ' '.join(primary_contact.get('name', '').split()[1:]) if primary_contact.get('name') and len(primary_contact.get('name', '').split()) > 1 else None,
+                        'position': primary_contact.get('position'),
+                        'telefon': primary_contact.get('telefon'),
+                        'email': primary_contact.get('email')
+                    }
+                    result['analyseScore'] += 10
+                
+                # Bonus für Beschreibung
+                if website_data.get('beschreibung'):
+                    result['analyseScore'] += 5
+                
+                logger.info(f"✅ Website analysiert: {result['firmenname']} - {len(website_data.get('extractedEmails', []))} E-Mails gefunden")
+        
+        except Exception as e:
+            logger.error(f"❌ Fehler bei Website-Analyse für {result['firmenname']}: {e}")
+            # Fortfahren ohne Website-Daten
     
     def parse_address(self, address_components: List[Dict]) -> Dict:
         """Parst address_components in strukturierte Adresse"""
@@ -335,20 +1074,25 @@ class GoogleMapsWorker:
         
         return None
 
-def process_job_sync(job_id: str):
+def process_job_sync(job_id: str, runtime: Optional[WorkerRuntime] = None):
     """
     Synchrone Funktion zum Verarbeiten eines Jobs
-    Wird von der FastAPI aufgerufen
+    Wird von der FastAPI (mit geteilter Runtime) oder per CLI aufgerufen
     """
     logger.info(f"🚀 Starting worker for job {job_id}")
     
+    own_runtime = runtime is None
     try:
-        worker = GoogleMapsWorker()
-        worker.process_job(job_id)
+        if own_runtime:
+            runtime = WorkerRuntime()
+        runtime.process_job(job_id)
         logger.info(f"✅ Worker completed for job {job_id}")
     except Exception as e:
         logger.error(f"❌ Worker failed for job {job_id}: {str(e)}")
         raise
+    finally:
+        if own_runtime and runtime:
+            runtime.close()
 
 def main():
     """Main entry point for command-line execution"""